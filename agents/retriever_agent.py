@@ -1,13 +1,16 @@
 import json
 import os
-from utils.helpers import load_json, save_json
+from utils.json_store import get_store
 from inference.groq_client import query_llama
+from utils.metrics import record_lookup
 import requests
 
 CACHE_PATH = "core/knowledge_base/cache.json"
+cache_store = get_store(CACHE_PATH)
 
 def retrieve_concept_explanation(term):
-    cache = load_json(CACHE_PATH)
+    cache = cache_store.read()
+    record_lookup("concept_explanations", term in cache)
     if term in cache:
         print(f"[Junior] Retrieved '{term}' from local KB. ")
         return cache[term]
@@ -15,13 +18,13 @@ def retrieve_concept_explanation(term):
     explanation = search_online(term)
     if not explanation:
         print(f"[Junior] Asking LLaMA 3 for '{term}'....")
-        explanation = query_llama(f"Explain '{term}' in the context of programming.")
+        explanation = query_llama(f"Explain '{term}' in the context of programming.", site="term_explanation")
         if explanation:
             explanation = f"(AI-generated) {explanation}"
 
     if explanation:
-        cache[term] = explanation
-        save_json(CACHE_PATH, cache)
+        with cache_store.transaction() as cache:
+            cache[term] = explanation
     return explanation
 
 def search_online(term):
@@ -0,0 +1,40 @@
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Header, Request
+from fastapi.responses import StreamingResponse
+from core.event_bus import event_bus, format_sse
+from api.folder_routes import require_watcher_owner
+
+router = APIRouter()
+
+# Comment lines keep proxies from closing an idle stream
+KEEPALIVE_SECONDS = 15
+
+@router.get("/events")
+async def stream_events(
+    request: Request,
+    path_prefix: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None)
+):
+    """Server-sent stream of watcher progress and per-file result deltas"""
+    require_watcher_owner()
+    after = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    subscription = event_bus.subscribe(path_prefix, after)
+
+    async def stream():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,5 +1,8 @@
-from fastapi import APIRouter
-from watcher.folder_watcher import start_watch
+import os
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException
+from watcher.folder_watcher import watcher_manager
+from utils.workers import owns_watcher, watcher_lock
 from pydantic import BaseModel
 
 
@@ -7,9 +10,33 @@ router = APIRouter()
 
 class WatchRequest(BaseModel):
     paths: list[str]
-    file_types: list[str]
+    file_types: list[str] = []
+    excludes: Optional[List[str]] = None
+
+class UnwatchRequest(BaseModel):
+    paths: list[str]
+
+def require_watcher_owner():
+    """Watch state lives in the process that owns the watcher; refuse elsewhere"""
+    if not owns_watcher():
+        raise HTTPException(status_code=409, detail=f"Folder watcher runs in process {watcher_lock.owner_pid()}")
 
 @router.post("/start-watch")
 def start_watcher(req: WatchRequest):
-    start_watch(req.paths, req.file_types)
-    return {"status": "Watcher started"}
\ No newline at end of file
+    require_watcher_owner()
+    missing = [path for path in req.paths if not os.path.isdir(path)]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Not a directory: {', '.join(missing)}")
+    watches = [watcher_manager.add_root(path, req.file_types, req.excludes) for path in req.paths]
+    return {"status": "Watcher started", "watches": watches}
+
+@router.post("/stop-watch")
+def stop_watcher(req: UnwatchRequest):
+    require_watcher_owner()
+    removed = [path for path in req.paths if watcher_manager.remove_root(path)]
+    return {"status": "Watcher stopped", "removed": removed}
+
+@router.get("/watches")
+def list_watches():
+    require_watcher_owner()
+    return {"watches": watcher_manager.list_watches(), "queue_depth": watcher_manager.queue_depth()}
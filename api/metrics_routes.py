@@ -0,0 +1,22 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from utils.metrics import metrics
+from inference.router import model_router
+from core.ai_analyzer import ai_analyzer
+
+router = APIRouter()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus text exposition of this worker's metrics, labelled with its pid"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@router.get("/llm/routes")
+def get_llm_routes():
+    """Model routing table with per-site latency, tokens, cost and escalation rate"""
+    return model_router.report()
+
+@router.get("/llm/json")
+def get_llm_json():
+    """How often model replies needed repair, a continuation or a reformat to yield JSON"""
+    return ai_analyzer.json_report()
@@ -1,13 +1,28 @@
-from fastapi import APIRouter, HTTPException, Body
+from fastapi import APIRouter, HTTPException, Body, Query, Request, Response
 from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from pydantic import BaseModel
 import os
+import hashlib
 from core.error_detector import analyze_file_for_errors
 from core.problem_solver import ProblemSolver
-from utils.helpers import load_json
+from core.results_index import results_index
+from inference.scheduler import llm_priority, Priority
 
 router = APIRouter()
 problem_solver = ProblemSolver()
-ERROR_ANALYSIS_PATH = "core/error_analysis.json"
+
+MAX_BATCH_PROBLEMS = 50
+BATCH_WORKERS = 8
+
+class ProblemRequest(BaseModel):
+    problem: str
+    language: str = "python"
+
+def _etag(*parts) -> str:
+    """Weak ETag from the results index version plus the query it answers"""
+    digest = hashlib.md5(repr(parts).encode("utf-8")).hexdigest()[:12]
+    return f'W/"{results_index.version}-{digest}"'
 
 @router.get("/")
 def read_root():
@@ -27,28 +42,91 @@ def trigger_analysis(file_path: str = Body(...)):
     return results
 
 @router.get("/errors")
-def get_errors(file_path: Optional[str] = None):
-    """Get error analysis results for all files or specific file"""
-    if not os.path.exists(ERROR_ANALYSIS_PATH):
-        return {"errors": []}
-        
-    error_data = load_json(ERROR_ANALYSIS_PATH)
-    
+def get_errors(
+    request: Request,
+    response: Response,
+    file_path: Optional[str] = None,
+    severity: Optional[str] = None,
+    error_type: Optional[str] = None,
+    path_prefix: Optional[str] = None,
+    since: Optional[float] = None,
+    source: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0)
+):
+    """Get the analysis for one file, or a filtered page of issues across files.
+
+    Without ``file_path`` the response is ``{"errors": [issue, ...], "total",
+    "limit", "offset"}``, not the whole results file keyed by path as before.
+    Issues cover detector errors (``source=detector``) and AI findings
+    (``source=ai``).
+    """
+    etag = _etag(file_path, severity, error_type, path_prefix, since, source, limit, offset)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
     if file_path:
-        return {"errors": error_data.get(file_path, {})}
-    
-    return {"errors": error_data}
+        return {"errors": results_index.get_file(file_path) or {}}
 
-@router.post("/solve-problem")
-def solve_problem(problem: str = Body(...), language: str = Body("python")):
-    """Generate a solution for a programming problem"""
-    analysis = problem_solver.analyze_problem(problem)
-    solution = problem_solver.generate_solution(analysis, language)
+    issues, total = results_index.query(severity, error_type, path_prefix, since, limit, offset, source)
     return {
-        "analysis": analysis,
-        "solution": solution
+        "errors": issues,
+        "total": total,
+        "limit": limit,
+        "offset": offset
     }
 
+@router.get("/errors/summary")
+def get_error_summary(request: Request, response: Response, path_prefix: Optional[str] = None):
+    """Issue counts by severity, type and source without loading any issues"""
+    etag = _etag("summary", path_prefix)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return results_index.summary(path_prefix)
+
+def _solve(problem: str, language: str, mode: str) -> Dict[str, Any]:
+    if mode == "two_step":
+        analysis = problem_solver.analyze_problem(problem)
+        solution = problem_solver.generate_solution(analysis, language)
+        return {
+            "analysis": analysis,
+            "solution": solution
+        }
+    return problem_solver.solve(problem, language)
+
+@router.post("/solve-problem")
+def solve_problem(problem: str = Body(...), language: str = Body("python"), mode: str = Body("combined")):
+    """Generate a solution for a programming problem.
+
+    ``combined`` (default) asks for analysis and solution in one LLM call;
+    ``two_step`` analyses first and then solves, as two calls.
+    """
+    if mode not in ("combined", "two_step"):
+        raise HTTPException(status_code=400, detail="mode must be 'combined' or 'two_step'")
+    return _solve(problem, language, mode)
+
+@router.post("/solve-problems")
+def solve_problems(problems: List[ProblemRequest] = Body(...), mode: str = Body("combined")):
+    """Solve many problems concurrently; duplicates and cached problems cost no extra LLM calls"""
+    if mode not in ("combined", "two_step"):
+        raise HTTPException(status_code=400, detail="mode must be 'combined' or 'two_step'")
+    if len(problems) > MAX_BATCH_PROBLEMS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_PROBLEMS} problems per batch")
+
+    def run(req: ProblemRequest) -> Dict[str, Any]:
+        # Batches yield to interactive requests at the LLM scheduler
+        with llm_priority(Priority.BULK):
+            try:
+                return {"problem": req.problem, **_solve(req.problem, req.language, mode)}
+            except Exception as e:
+                return {"problem": req.problem, "error": str(e)}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(BATCH_WORKERS, len(problems)))) as pool:
+        results = list(pool.map(run, problems))
+    return {"results": results}
+
 @router.post("/translate-math")
 def translate_math(expression: str = Body(...), language: str = Body("python")):
     """Translate mathematical expressions to code"""
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+from utils.tracing import trace_store
+
+router = APIRouter()
+
+class ArmRequest(BaseModel):
+    path: str
+    profile: bool = False
+
+@router.get("/traces")
+def list_traces(limit: int = Query(20, ge=1, le=100)):
+    """Most recent traces first; send ``X-Junior-Trace: 1`` (or ``profile``) to record one"""
+    return {
+        "traces": [trace.summary() for trace in trace_store.recent(limit)],
+        "armed": trace_store.armed()
+    }
+
+@router.get("/traces/{trace_id}")
+def get_trace(trace_id: str):
+    trace = trace_store.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found or already evicted")
+    return trace.to_dict()
+
+@router.post("/traces/arm")
+def arm_trace(req: ArmRequest):
+    """Trace the watcher's next analysis of a file"""
+    trace_store.arm(req.path, req.profile)
+    return {"status": "armed", "path": req.path, "profile": req.profile}
@@ -0,0 +1,180 @@
+"""HTTP load generator for the backend endpoints.
+
+    python -m benchmarks.mock_llm_server --latency 0.5 &
+    LLM_BASE_URL=http://127.0.0.1:8090/v1 uvicorn main:app --port 8000 &
+    LLM_BASE_URL=http://127.0.0.1:8090/v1 uvicorn fastapi_app:app --port 8001 &
+    python -m benchmarks.load_test --rps 20 --duration 30 --output load.json
+
+Requests are sent open-loop: they start on schedule at the target rate
+whether or not earlier ones have finished, so queueing inside the server
+shows up as latency instead of silently lowering the offered load.
+/analyze and /upload live on main.py; /solve-problem and /errors on
+fastapi_app.py, hence the two base URLs.
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from typing import Any, Dict, List, Optional
+import httpx
+
+SAMPLE_CODE = '''import json
+
+def load(path):
+    try:
+        return json.load(open(path))
+    except:
+        return None
+
+def total(items):
+    result = 0
+    for i in range(len(items)):
+        result += items[i]
+    return result
+'''
+PROBLEMS = [
+    "Find the longest substring without repeating characters.",
+    "Merge overlapping intervals in a list of [start, end] pairs.",
+    "Return the k most frequent words in a text."
+]
+DEFAULT_MIX = "analyze=4,upload=1,solve=1,errors=4"
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class LoadTest:
+    """Fires a weighted mix of endpoint calls at a target rate and records outcomes"""
+
+    def __init__(self, api_url: str, watcher_url: str, unique: bool, timeout: float, seed: int):
+        self.api_url = api_url.rstrip("/")
+        self.watcher_url = watcher_url.rstrip("/")
+        self.unique = unique
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        self.samples: Dict[str, List[Dict[str, Any]]] = {}
+        self.counter = 0
+
+    def _code(self) -> str:
+        self.counter += 1
+        # A distinct comment defeats the analysis caches so every call reaches the LLM
+        return f"# request {self.counter}\n{SAMPLE_CODE}" if self.unique else SAMPLE_CODE
+
+    def build(self, endpoint: str) -> Dict[str, Any]:
+        if endpoint == "analyze":
+            return {"method": "POST", "url": f"{self.api_url}/analyze",
+                    "json": {"code": self._code(), "file_path": f"load/sample_{self.counter}.py", "session_id": "load"}}
+        if endpoint == "upload":
+            return {"method": "POST", "url": f"{self.api_url}/upload",
+                    "files": {"file": (f"sample_{self.counter}.py", self._code().encode("utf-8"), "text/x-python")}}
+        if endpoint == "solve":
+            problem = self.rng.choice(PROBLEMS) + (f" (variant {self.counter})" if self.unique else "")
+            self.counter += 1
+            return {"method": "POST", "url": f"{self.watcher_url}/solve-problem",
+                    "json": {"problem": problem, "language": "python"}}
+        if endpoint == "errors":
+            return {"method": "GET", "url": f"{self.watcher_url}/errors", "params": {"limit": 50}}
+        raise ValueError(f"Unknown endpoint: {endpoint}")
+
+    async def fire(self, client: httpx.AsyncClient, endpoint: str) -> None:
+        request = self.build(endpoint)
+        started = time.perf_counter()
+        sample = {"endpoint": endpoint}
+        try:
+            response = await client.request(**request)
+            sample["status"] = response.status_code
+            sample["ok"] = response.status_code < 400
+        except httpx.HTTPError as e:
+            sample["status"] = type(e).__name__
+            sample["ok"] = False
+        sample["latency"] = time.perf_counter() - started
+        self.samples.setdefault(endpoint, []).append(sample)
+
+    async def run(self, rps: float, duration: float, mix: Dict[str, float], concurrency: int) -> float:
+        endpoints, weights = zip(*mix.items())
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits) as client:
+            tasks, started, offset = [], time.perf_counter(), 0.0
+            while True:
+                # Poisson arrivals around the target rate
+                offset += self.rng.expovariate(rps)
+                if offset >= duration:
+                    break
+                delay = started + offset - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                endpoint = self.rng.choices(endpoints, weights)[0]
+                tasks.append(asyncio.create_task(self.fire(client, endpoint)))
+            await asyncio.gather(*tasks)
+            return time.perf_counter() - started
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        endpoints = {}
+        for endpoint, samples in sorted(self.samples.items()):
+            latencies = sorted(s["latency"] for s in samples)
+            errors = [s for s in samples if not s["ok"]]
+            statuses: Dict[str, int] = {}
+            for s in samples:
+                statuses[str(s["status"])] = statuses.get(str(s["status"]), 0) + 1
+            endpoints[endpoint] = {
+                "requests": len(samples),
+                "errors": len(errors),
+                "error_rate": len(errors) / len(samples),
+                "throughput_rps": len(samples) / elapsed if elapsed else None,
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "max": latencies[-1],
+                "statuses": statuses
+            }
+        return {"elapsed": elapsed, "endpoints": endpoints}
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Drive backend endpoints at a target request rate")
+    parser.add_argument("--api-url", default="http://127.0.0.1:8000", help="main.py app (/analyze, /upload)")
+    parser.add_argument("--watcher-url", default="http://127.0.0.1:8001", help="fastapi_app.py app (/solve-problem, /errors)")
+    parser.add_argument("--rps", type=float, default=10.0, help="Target requests per second across all endpoints")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to generate load for")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Endpoint weights, e.g. analyze=4,errors=4")
+    parser.add_argument("--concurrency", type=int, default=200, help="Maximum open connections")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--repeat-payloads", action="store_true", help="Send identical payloads so caches can hit")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    load_test = LoadTest(args.api_url, args.watcher_url, not args.repeat_payloads, args.timeout, args.seed)
+    elapsed = asyncio.run(load_test.run(args.rps, args.duration, parse_mix(args.mix), args.concurrency))
+    report = {"target_rps": args.rps, "duration": args.duration, "mix": parse_mix(args.mix), **load_test.report(elapsed)}
+
+    for endpoint, stats in report["endpoints"].items():
+        print(
+            f"{endpoint:<8} n={stats['requests']:<6} err={stats['error_rate']:6.1%} "
+            f"p50={stats['p50'] * 1000:8.1f}ms p95={stats['p95'] * 1000:8.1f}ms p99={stats['p99'] * 1000:8.1f}ms",
+            file=sys.stderr
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""Local OpenAI-compatible chat completions server for load tests.
+
+    python -m benchmarks.mock_llm_server --port 8090 --latency 0.8 --rate-limit-rpm 30
+    LLM_BASE_URL=http://127.0.0.1:8090/v1 uvicorn main:app
+
+Serves ``POST /v1/chat/completions`` (plain and ``stream: true``) and
+``GET /v1/models``, with configurable latency, per-token streaming delay,
+injected 5xx errors and 429s (random, or from a requests-per-minute limit).
+``GET /stats`` reports what was served.
+"""
+import json
+import time
+import random
+import argparse
+import threading
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+ANALYSIS_REPLY = {
+    "bugs": ["Possible None dereference when the input list is empty"],
+    "optimizations": ["Use enumerate instead of range(len(...))"],
+    "documentation": ["Add a docstring describing the return value"],
+    "security": [],
+    "performance": ["Avoid repeated string concatenation in the loop"]
+}
+TEXT_REPLY = (
+    "1. What's wrong: the value can be None here.\n"
+    "2. How to fix it: guard the access or provide a default.\n"
+    "3. Example:\n    value = data.get('key') or default"
+)
+
+
+class MockSettings:
+    def __init__(self, args: argparse.Namespace):
+        self.latency = args.latency
+        self.jitter = args.jitter
+        self.token_delay = args.token_delay
+        self.error_rate = args.error_rate
+        self.rate_limit_rate = args.rate_limit_rate
+        self.rate_limit_rpm = args.rate_limit_rpm
+        self.retry_after = args.retry_after
+        self.rng = random.Random(args.seed)
+        self.stats = Counter()
+        self.recent = deque()
+        self.lock = threading.Lock()
+
+    def admit(self) -> int:
+        """Decide the outcome of one request: 200, 429 or 500"""
+        now = time.monotonic()
+        with self.lock:
+            self.stats["requests"] += 1
+            while self.recent and now - self.recent[0] > 60:
+                self.recent.popleft()
+            if self.rate_limit_rpm and len(self.recent) >= self.rate_limit_rpm:
+                status = 429
+            elif self.rng.random() < self.rate_limit_rate:
+                status = 429
+            elif self.rng.random() < self.error_rate:
+                status = 500
+            else:
+                status = 200
+                self.recent.append(now)
+            self.stats[str(status)] += 1
+            return status
+
+    def delay(self) -> float:
+        with self.lock:
+            return max(0.0, self.rng.gauss(self.latency, self.jitter)) if self.jitter else self.latency
+
+
+def reply_for(messages: List[Dict[str, Any]]) -> str:
+    """JSON for the code-analysis prompts (they are parsed as JSON), prose otherwise"""
+    prompt = " ".join(str(m.get("content", "")) for m in messages)
+    if "analyzing code" in prompt or "Analyze the following code" in prompt:
+        return json.dumps(ANALYSIS_REPLY)
+    return TEXT_REPLY
+
+
+def count_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    settings: MockSettings = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass  # Keep load-test output readable
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._json(200, {"object": "list", "data": [{"id": "mock-llm", "object": "model", "owned_by": "local"}]})
+        elif self.path == "/stats":
+            with self.settings.lock:
+                self._json(200, dict(self.settings.stats))
+        else:
+            self._json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._json(404, {"error": {"message": "not found"}})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._json(400, {"error": {"message": "invalid JSON"}})
+            return
+
+        status = self.settings.admit()
+        if status == 429:
+            self._json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+                       {"Retry-After": str(self.settings.retry_after)})
+            return
+        time.sleep(self.settings.delay())
+        if status == 500:
+            self._json(500, {"error": {"message": "Injected upstream failure", "type": "server_error"}})
+            return
+
+        messages = body.get("messages", [])
+        content = reply_for(messages)
+        usage = {
+            "prompt_tokens": count_tokens(" ".join(str(m.get("content", "")) for m in messages)),
+            "completion_tokens": count_tokens(content)
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        with self.settings.lock:
+            self.settings.stats["completion_tokens"] += usage["completion_tokens"]
+        model = body.get("model", "mock-llm")
+        if body.get("stream"):
+            self._stream(model, content, usage)
+        else:
+            self._json(200, {
+                "id": f"chatcmpl-mock-{time.time_ns()}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage
+            })
+
+    def _stream(self, model: str, content: str, usage: Dict[str, int]) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        chunk_id, created = f"chatcmpl-mock-{time.time_ns()}", int(time.time())
+
+        def send(delta: Dict[str, Any], finish: str = None, extra: Dict[str, Any] = None):
+            chunk = {
+                "id": chunk_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}], **(extra or {})
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        send({"role": "assistant", "content": ""})
+        # Roughly one token per four characters, as the usage numbers assume
+        for start in range(0, len(content), 4):
+            if self.settings.token_delay:
+                time.sleep(self.settings.token_delay)
+            send({"content": content[start:start + 4]})
+        send({}, "stop", {"usage": usage})
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+    def _json(self, status: int, payload: Dict[str, Any], headers: Dict[str, str] = None) -> None:
+        raw = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(raw)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible mock LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=float, default=0.5, help="Mean seconds before the first byte")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Std-dev of the latency in seconds")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="Seconds between streamed tokens")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--rate-limit-rpm", type=int, default=0, help="Answer 429 above this many requests a minute")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--seed", type=int, default=1234)
+    return parser
+
+
+def serve(args: argparse.Namespace) -> ThreadingHTTPServer:
+    handler = type("ConfiguredMockHandler", (MockHandler,), {"settings": MockSettings(args)})
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv: List[str] = None) -> None:
+    args = build_parser().parse_args(argv)
+    server = serve(args)
+    print(f"[Junior] Mock LLM listening on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""Offline benchmarks for the analysis hot paths.
+
+Run from the repository root:
+
+    python -m benchmarks.run_benchmarks --output bench.json
+    python -m benchmarks.run_benchmarks --quick --compare bench.json
+
+Everything runs in a throwaway working directory, so the caches, knowledge
+base and results stores in the repo are never touched. The LLM and the
+embedding model are replaced by deterministic fakes; no network is needed.
+"""
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+from unittest import mock
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Repo modules build their LLM clients at import time, which needs a key. Every
+# call is faked here, so use a dummy key and an endpoint that refuses at once.
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+os.environ["LLM_BASE_URL"] = "http://127.0.0.1:9/v1"
+FILE_SIZES = [1_000, 10_000, 100_000, 1_000_000, 5_000_000]
+QUICK_FILE_SIZES = [1_000, 10_000, 100_000]
+CORPUS_SIZES = [100, 1_000, 10_000]
+QUICK_CORPUS_SIZES = [100, 1_000]
+EMBEDDING_DIM = 384
+SEED = 1234
+
+
+def measure(name: str, fn: Callable[[], Any], repeat: int = 5, number: int = 1, **params) -> Dict[str, Any]:
+    """Time ``fn`` ``number`` times per sample; report per-call seconds"""
+    fn()  # Warm-up: imports, regex compilation, first-touch allocations
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - started) / number)
+    samples.sort()
+    result = {
+        "name": name,
+        "params": params,
+        "repeat": repeat,
+        "number": number,
+        "min": samples[0],
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "max": samples[-1],
+        "ops_per_sec": 1 / samples[0] if samples[0] else None
+    }
+    label = ", ".join(f"{k}={v}" for k, v in params.items())
+    print(f"{name:<40} {label:<28} median {result['median'] * 1000:10.3f} ms", file=sys.stderr)
+    return result
+
+
+def synthetic_python(size: int, seed: int = SEED) -> str:
+    """Deterministic Python source of roughly ``size`` bytes with typical findings"""
+    rng = random.Random(seed)
+    parts = ["import os\nimport sys\nimport json\nimport re\n\n"]
+    length, index = len(parts[0]), 0
+    while length < size:
+        name = f"func_{index}"
+        body = rng.choice([
+            f"def {name}(items):\n    total = 0\n    for i in range(len(items)):\n        total += items[i]\n    return total\n\n",
+            f"def {name}(path):\n    try:\n        return open(path).read()\n    except:\n        return None\n\n",
+            f"def {name}(value):\n    print('value', value)\n    return json.dumps({{'v': value}})\n\n",
+            f"class Model{index}:\n    def __init__(self, x):\n        self.x = x\n\n    def get(self):\n        try:\n            return self.x\n        except Exception:\n            return None\n\n",
+            f"def {name}(a, b):\n    result = sorted(a)\n    result.extend(b)\n    return result\n\n",
+        ])
+        parts.append(body)
+        length += len(body)
+        index += 1
+    return "".join(parts)
+
+
+class FakeLLM:
+    """Deterministic stand-in for query_llama with optional simulated latency"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def __call__(self, prompt: str, *args, **kwargs) -> str:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        digest = hashlib.md5(prompt.encode("utf-8")).hexdigest()[:8]
+        return f"1. What's wrong: synthetic finding {digest}\n2. How to fix it: apply the fix\n3. Example:\n    pass"
+
+
+def fake_embedding(text: str, dim: int = EMBEDDING_DIM):
+    """Unit vector seeded from the text, so equal texts embed identically"""
+    import numpy as np
+    seed = int(hashlib.md5(text.encode("utf-8")).hexdigest()[:8], 16)
+    vector = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class FakeEncoder:
+    """Quacks like the SentenceTransformer ``model`` the context manager exposes"""
+
+    def encode(self, texts, normalize_embeddings: bool = True):
+        import numpy as np
+        if isinstance(texts, str):
+            return fake_embedding(texts)
+        return np.vstack([fake_embedding(t) for t in texts]) if texts else np.zeros((0, EMBEDDING_DIM), np.float32)
+
+
+@contextmanager
+def isolated_workspace():
+    """Run inside a temp directory so relative state paths land there"""
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="junior-bench-") as workspace:
+        os.makedirs(os.path.join(workspace, "core", "knowledge_base"), exist_ok=True)
+        os.chdir(workspace)
+        try:
+            yield workspace
+        finally:
+            os.chdir(previous)
+
+
+def bench_detectors(sizes: List[int]) -> List[Dict[str, Any]]:
+    from core.error_detector import PythonErrorDetector
+    results = []
+    for size in sizes:
+        code = synthetic_python(size)
+        repeat = 5 if size <= 100_000 else 3
+        results.append(measure("check_common_mistakes", lambda: PythonErrorDetector.check_common_mistakes(code),
+                               repeat=repeat, size_bytes=len(code)))
+        results.append(measure("detect_syntax_errors", lambda: PythonErrorDetector.detect_syntax_errors(code, "bench.py"),
+                               repeat=repeat, size_bytes=len(code)))
+    return results
+
+
+def bench_caches(workspace: str) -> List[Dict[str, Any]]:
+    from pathlib import Path
+    from core.cache_manager import LRUCache, FileCache, SQLiteCache
+    value = {"summary": "x" * 200, "issues": list(range(20))}
+    keys = [f"analysis_/repo/file_{i}.py" for i in range(1000)]
+    results = []
+
+    for capacity in (100, 1000):
+        lru = LRUCache(capacity)
+        results.append(measure("LRUCache.set", lambda: [lru.set(k, value) for k in keys], number=1, capacity=capacity, ops=len(keys)))
+        hot = keys[-min(capacity, len(keys)):]
+        results.append(measure("LRUCache.get_hit", lambda: [lru.get(k) for k in hot], capacity=capacity, ops=len(hot)))
+        results.append(measure("LRUCache.get_miss", lambda: [lru.get(f"missing_{i}") for i in range(len(hot))], capacity=capacity, ops=len(hot)))
+
+    file_cache = FileCache(Path(workspace) / "bench_file_cache")
+    subset = keys[:200]
+    results.append(measure("FileCache.set", lambda: [file_cache.set(str(i), value) for i in range(len(subset))], repeat=3, ops=len(subset)))
+    results.append(measure("FileCache.get", lambda: [file_cache.get(str(i)) for i in range(len(subset))], repeat=3, ops=len(subset)))
+
+    sqlite_cache = SQLiteCache(Path(workspace) / "bench_cache.db")
+    results.append(measure("SQLiteCache.set", lambda: [sqlite_cache.set(k, value) for k in subset], repeat=3, ops=len(subset)))
+    results.append(measure("SQLiteCache.get", lambda: [sqlite_cache.get(k) for k in subset], repeat=3, ops=len(subset)))
+    return results
+
+
+def bench_knowledge_base(corpus_sizes: List[int]) -> List[Dict[str, Any]]:
+    from core.cache_manager import KnowledgeBase
+    results = []
+    for size in corpus_sizes:
+        kb = KnowledgeBase()
+        # The built-in Embeddings is a zero-vector placeholder; use seeded vectors instead
+        kb.embeddings.get_embedding = lambda text: fake_embedding(text).tolist()
+        for i in range(size):
+            text = f"document {i} about topic {i % 37}"
+            kb.add_document({"text": text, "embedding": fake_embedding(text).tolist()})
+        results.append(measure("KnowledgeBase.search", lambda: kb.search("how do I fix an unused import"),
+                               repeat=3 if size >= 10_000 else 5, corpus=size))
+    return results
+
+
+def bench_analyze_file(workspace: str, sizes: List[int], llm_latency: float) -> List[Dict[str, Any]]:
+    import core.error_detector as error_detector
+    from core.semantic_cache import semantic_cache
+    from core.code_index import code_index
+
+    fake_llm, encoder = FakeLLM(llm_latency), FakeEncoder()
+    embed_finding = lambda error, context: encoder.encode(f"{error['message']}\n{context}")
+    results = []
+    with mock.patch.object(error_detector, "query_llama", fake_llm), \
+            mock.patch.object(semantic_cache, "_embed", embed_finding), \
+            mock.patch.object(code_index, "_embed", encoder.encode):
+        for size in sizes:
+            path = os.path.join(workspace, f"bench_{size}.py")
+            code = synthetic_python(size, seed=SEED + size)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(code)
+            code_index.index_file(path, code, "python", root=workspace)
+
+            def cold():
+                # Forget cached answers so every finding takes the full path
+                with error_detector.solutions_store.transaction() as solutions:
+                    solutions.clear()
+                semantic_cache.clear()
+                return error_detector.analyze_file_for_errors(path)
+
+            for label, fn in (("cold", cold), ("warm", lambda: error_detector.analyze_file_for_errors(path))):
+                calls_before = fake_llm.calls
+                result = measure(f"analyze_file_for_errors[{label}]", fn, repeat=3, size_bytes=len(code))
+                runs = result["repeat"] * result["number"] + 1  # Including the warm-up
+                result["llm_calls_per_run"] = (fake_llm.calls - calls_before) / runs
+                results.append(result)
+    return results
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict[str, Any], baseline_path: str) -> None:
+    """Print median ratios against a previous run (>1.0 means slower now)"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    key = lambda r: (r["name"], json.dumps(r["params"], sort_keys=True))
+    before = {key(r): r for r in baseline["results"]}
+    print(f"\nCompared with {baseline.get('revision') or baseline_path}:", file=sys.stderr)
+    for result in current["results"]:
+        old = before.get(key(result))
+        if old and old["median"]:
+            ratio = result["median"] / old["median"]
+            label = ", ".join(f"{k}={v}" for k, v in result["params"].items())
+            print(f"{result['name']:<40} {label:<28} x{ratio:6.2f}", file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Benchmark the analysis hot paths offline")
+    parser.add_argument("--quick", action="store_true", help="Skip the 1 MB/5 MB files and the largest corpus")
+    parser.add_argument("--only", choices=["detectors", "caches", "knowledge_base", "analyze"], action="append",
+                        help="Run only the named group (repeatable)")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds the fake LLM sleeps per call")
+    parser.add_argument("--output", help="Write JSON results to this path instead of stdout")
+    parser.add_argument("--compare", help="Baseline JSON from an earlier run to compare medians against")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, REPO_ROOT)
+    file_sizes = QUICK_FILE_SIZES if args.quick else FILE_SIZES
+    corpus_sizes = QUICK_CORPUS_SIZES if args.quick else CORPUS_SIZES
+    groups = set(args.only or ["detectors", "caches", "knowledge_base", "analyze"])
+
+    results: List[Dict[str, Any]] = []
+    with isolated_workspace() as workspace:
+        if "detectors" in groups:
+            results += bench_detectors(file_sizes)
+        if "caches" in groups:
+            results += bench_caches(workspace)
+        if "knowledge_base" in groups:
+            results += bench_knowledge_base(corpus_sizes)
+        if "analyze" in groups:
+            results += bench_analyze_file(workspace, file_sizes[:3], args.llm_latency)
+
+    report = {
+        "revision": git_revision(),
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": args.quick,
+        "results": results
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+    if args.compare:
+        compare(report, args.compare)
+    return report
+
+
+if __name__ == "__main__":
+    main()
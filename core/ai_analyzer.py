@@ -1,5 +1,10 @@
 import os
 import json
+import time
+import hashlib
+import copy
+import threading
+from collections import Counter
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
 from langchain_openai import ChatOpenAI
@@ -17,20 +22,49 @@ from langchain_core.prompts.chat import ChatPromptValue
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough
 from core.cache_manager import cache_manager
+from inference.groq_client import LLM_TIMEOUT, LLM_BASE_URL, LLM_MODEL
+from core.language_hub import language_hub
+from core.code_index import code_index
+from core.analysis_sink import analysis_sink
+from utils.json_store import get_store
+from utils.tracing import traced
+from utils.json_extract import JSONExtractor, extract_json, strip_fences
+from utils.metrics import metrics
+from inference.router import model_router
+
+CONTINUE_PROMPT = (
+    "Your previous reply was cut off before the JSON was complete. Continue it exactly where it "
+    "stopped: output only the remaining characters, without repeating anything or adding prose."
+)
+REFORMAT_PROMPT = (
+    "Rewrite the following code review as a single JSON object with the keys \"bugs\", "
+    "\"optimizations\", \"documentation\", \"security\" and \"performance\", each a list of "
+    "strings. Output only the JSON.\n\n{answer}"
+)
+# Parse outcomes (parsed, repaired, continued, reformatted, prose, failed) that cost an extra LLM call
+REQUERY_OUTCOMES = ("continued", "reformatted")
+
+json_outcomes = metrics.counter(
+    "junior_llm_json_outcomes_total", "How model replies were parsed into JSON, by site", ("site", "outcome")
+)
 
 # Initialize Groq client with OpenAI compatibility
 llm = ChatOpenAI(
-    base_url="https://api.groq.com/openai/v1",
-    model_name="llama3-70b-8192",
+    base_url=LLM_BASE_URL,
+    model_name=LLM_MODEL,
     api_key=os.getenv("OPENAI_API_KEY"),
     temperature=0.3,
-    max_completion_tokens=1024
+    max_completion_tokens=1024,
+    timeout=LLM_TIMEOUT,
+    max_retries=0
 )
 
 class AIAnalyzer:
     def __init__(self):
         self.llm = llm
         self.parser = JsonOutputParser()
+        self._outcomes: Counter = Counter()
+        self._outcomes_lock = threading.Lock()
         self.prompts = {
             "code_analysis": """
             You are a senior software engineer analyzing code. 
@@ -40,6 +74,10 @@ class AIAnalyzer:
             3. Documentation improvements
             4. Security concerns
             5. Performance bottlenecks
+
+            Respond with only a JSON object with the keys "bugs", "optimizations",
+            "documentation", "security" and "performance", each a list of strings.
+            Refer to code locations as "line N".
             
             Current Context: {context}
             Previous Steps: {steps}
@@ -55,64 +93,230 @@ class AIAnalyzer:
             """,
         }
 
-    async def analyze_code(self, code: str, file_path: str = "") -> Dict[str, Any]:
+    @traced("AIAnalyzer.analyze_code")
+    async def analyze_code(
+        self,
+        code: str,
+        file_path: str = "",
+        session_id: Optional[str] = None,
+        project: Optional[str] = None
+    ) -> Dict[str, Any]:
         try:
-            # Check cache first
-            cache_key = f"analysis_{file_path}"
-            cached_result = cache_manager.get(cache_key, "short_term")
+            # Check cache first; key on content so an edited file is not served stale results
+            digest = hashlib.md5(code.encode("utf-8")).hexdigest()
+            cached_result = cache_manager.get(f"analysis_{file_path}_{digest}", "short_term")
             if cached_result:
                 return cached_result
 
-            # Create system message
-            system_message = SystemMessage(content=self.prompts["code_analysis"])
+            result = await self._request_analysis(code, file_path, session_id, project)
             
-            # Create human message with code
-            human_message = HumanMessage(content=code)
-            
-            # Get response using existing Groq implementation
-            response = self.llm.invoke([system_message, human_message])
-            result = self.parser.parse(response.content)
-            
-            # Cache the result
-            cache_manager.set(cache_key, result, "short_term", timedelta(hours=1))
+            # Cache the result, and keep a long-lived copy to serve during outages
+            cache_manager.set(f"analysis_{file_path}_{digest}", result, "short_term", timedelta(hours=1))
+            if file_path:
+                cache_manager.set(f"last_analysis_{file_path}", result, "long_term", timedelta(days=7))
+            # Queued for a batched insert into Supabase; never waits on the database. Only
+            # project analyses are kept: uploads and ad-hoc requests have no owner to file them under
+            if project and not file_path.startswith("uploads/"):
+                analysis_sink.submit(code, result, context=file_path or None)
+
+            # Remember what this session looked at for follow-up prompts
+            cache_manager.add_to_context({"file": file_path}, session_id, project)
+            cache_manager.add_to_memory({"action": "analyze_code", "file": file_path}, session_id, project)
             
             return result
         except Exception as e:
             print(f"Error analyzing code: {str(e)}")
-            return {
-                "suggestions": ["Failed to analyze code. Please try again."],
-                "errors": [str(e)],
-                "security_issues": [],
-                "performance": [],
-                "documentation": []
-            }
+            return self._fallback_analysis(code, file_path, e)
+
+    @traced("AIAnalyzer.analyze_region")
+    async def analyze_region(
+        self,
+        code: str,
+        file_path: str,
+        session_id: Optional[str] = None,
+        project: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Analyse an edited part of a file.
+
+        Unlike analyze_code this leaves no trace: nothing is cached under the
+        file's keys, added to session history or sent to the analysis sink.
+        """
+        try:
+            return await self._request_analysis(code, file_path, session_id, project)
+        except Exception as e:
+            print(f"Error analyzing region of {file_path}: {str(e)}")
+            return {"degraded": True, "degraded_reason": str(e)}
+
+    async def _request_analysis(
+        self, code: str, file_path: str, session_id: Optional[str], project: Optional[str]
+    ) -> Dict[str, Any]:
+        # Create system message with this session's context and steps
+        system_message = SystemMessage(content=self.prompts["code_analysis"].format(
+            context=self._format_history(cache_manager.get_recent_context(session_id, project)),
+            steps=self._format_history(cache_manager.get_memory_steps(session_id, project)),
+            code="provided in the next message"
+        ))
+        
+        # Create human message with code plus definitions it uses from elsewhere
+        related = code_index.related_context(code, file_path) if file_path else ""
+        prompt_code = f"{code}\n\nRelated definitions from the codebase:\n{related}" if related else code
+        human_message = HumanMessage(content=prompt_code)
+        
+        # Get response using existing Groq implementation
+        # Small model first; a reply with no JSON at all is re-asked on the large one
+        messages = [system_message, human_message]
+        response = await model_router.acall("code_analysis", self.llm, messages, validate=self._parses)
+        return await self._complete_json(
+            "code_analysis", messages, response.content, model_router.answered_by(response)
+        )
+
+    def _fallback_analysis(self, code: str, file_path: str, error: Exception) -> Dict[str, Any]:
+        """Serve the last good analysis, or static checks only, when the LLM fails"""
+        last_result = cache_manager.get(f"last_analysis_{file_path}", "long_term") if file_path else None
+        if last_result:
+            return {**last_result, "degraded": True, "degraded_reason": str(error)}
+
+        static_findings = []
+        if language_hub.get_language_for_path(file_path) == "python":
+            from core.error_detector import PythonErrorDetector
+            static_findings.extend(PythonErrorDetector.detect_syntax_errors(code, file_path))
+            static_findings.extend(PythonErrorDetector.check_common_mistakes(code))
+        return {
+            "suggestions": ["AI analysis is temporarily unavailable; showing static checks only."],
+            "errors": static_findings,
+            "security_issues": [],
+            "performance": [],
+            "documentation": [],
+            "degraded": True,
+            "degraded_reason": str(error)
+        }
             
     def fix_error(self, error: str, code: str, context: str) -> Dict[str, Any]:
         """Generate error fix suggestions using AI"""
-        prompt = PromptTemplate.from_template(self.prompts["error_fix"])
-        chain = LLMChain(llm=self.llm, prompt=prompt)
+        prompt = self.prompts["error_fix"].format(
+            error=error,
+            code=code,
+            context=context,
+            steps=self._format_history(cache_manager.get_memory_steps())
+        )
         
         try:
-            result = chain.invoke({
-                "error": error,
-                "code": code,
-                "context": context
-            })
-            return self._parse_fix(result)
+            result = model_router.call("error_fix", self.llm, [HumanMessage(content=prompt)])
+            return self._parse_analysis(result.content)
         except Exception as e:
             return {"error": str(e)}
             
+    def _parses(self, content: str) -> bool:
+        """Truncated JSON counts as usable here; _complete_json repairs or continues it"""
+        return extract_json(content, dict)[1] != "failed"
+
+    async def _complete_json(
+        self, site: str, messages: List[BaseMessage], content: str, answered_by: str = "large"
+    ) -> Dict[str, Any]:
+        """Turn a reply into a dict, spending an extra LLM call only on the part that is missing.
+
+        Complete JSON (prose or fences around it allowed) is used as is. JSON cut
+        off by the output cap is finished with a continuation request for just the
+        tail, or repaired locally if that fails. A reply with no JSON falls back to
+        its prose sections, and only then to asking for the answer reformatted.
+        """
+        extractor = JSONExtractor(dict)
+        extractor.feed(content)
+        value, status = extractor.result()
+        if status == "ok" and isinstance(value, dict):
+            self._record_outcome(site, "parsed")
+            return value
+
+        if status == "repaired" and isinstance(value, dict):
+            continued = await self._continue_json(messages, content, extractor, answered_by)
+            if continued is not None:
+                self._record_outcome(site, "continued")
+                return continued
+            self._record_outcome(site, "repaired")
+            return {**value, "truncated": True}
+
+        points = self._extract_key_points(content)
+        if any(points.values()):
+            self._record_outcome(site, "prose")
+            return {"raw_analysis": content, "parsed": points}
+
+        try:
+            response = await model_router.acall(
+                "json_reformat", self.llm, [HumanMessage(content=REFORMAT_PROMPT.format(answer=content))],
+                validate=lambda text: extract_json(text, dict)[1] == "ok"
+            )
+            value, status = extract_json(response.content, dict)
+            if status == "ok" and isinstance(value, dict):
+                self._record_outcome(site, "reformatted")
+                return value
+        except Exception as e:
+            print(f"[Junior] Reformat request for {site} failed: {e}")
+        self._record_outcome(site, "failed")
+        raise ValueError(f"No usable JSON in {site} reply")
+
+    async def _continue_json(
+        self, messages: List[BaseMessage], content: str, extractor: JSONExtractor, answered_by: str
+    ) -> Optional[Dict[str, Any]]:
+        """Ask the model that wrote a truncated reply for the rest, and splice it onto the partial JSON"""
+        def finish(tail: str) -> Optional[Dict[str, Any]]:
+            tail = strip_fences(tail)
+            # Some models start over instead of continuing
+            if tail.lstrip().startswith("{"):
+                value, status = extract_json(tail, dict)
+                if status == "ok" and isinstance(value, dict):
+                    return value
+            joined = copy.deepcopy(extractor)
+            joined.feed(tail)
+            value, status = joined.result()
+            return value if status == "ok" and isinstance(value, dict) else None
+
+        try:
+            response = await model_router.acall_on(
+                answered_by, "json_continuation", self.llm,
+                messages + [AIMessage(content=content), HumanMessage(content=CONTINUE_PROMPT)]
+            )
+            return finish(response.content)
+        except Exception as e:
+            print(f"[Junior] Continuation request failed: {e}")
+            return None
+
+    def _record_outcome(self, site: str, outcome: str) -> None:
+        with self._outcomes_lock:
+            self._outcomes[(site, outcome)] += 1
+        json_outcomes.inc(site=site, outcome=outcome)
+
+    def json_report(self) -> Dict[str, Any]:
+        """Per-site parse outcomes and how often an extra LLM call was needed"""
+        with self._outcomes_lock:
+            outcomes = dict(self._outcomes)
+        report: Dict[str, Any] = {}
+        for (site, outcome), count in outcomes.items():
+            report.setdefault(site, {"outcomes": {}})["outcomes"][outcome] = count
+        for entry in report.values():
+            total = sum(entry["outcomes"].values())
+            requeried = sum(entry["outcomes"].get(o, 0) for o in REQUERY_OUTCOMES)
+            entry["replies"] = total
+            entry["requery_rate"] = requeried / total if total else None
+        return report
+
+    @staticmethod
+    def _format_history(entries: List[Dict[str, Any]]) -> str:
+        """Render context/memory entries for a prompt slot"""
+        if not entries:
+            return "None"
+        return "\n".join(json.dumps(entry) for entry in entries)
+
     def _parse_analysis(self, result: str) -> Dict[str, Any]:
         """Parse AI analysis results"""
-        try:
-            # Try to parse as JSON first
-            return json.loads(result)
-        except json.JSONDecodeError:
-            # If not JSON, create structured response
-            return {
-                "raw_analysis": result,
-                "parsed": self._extract_key_points(result)
-            }
+        # Try JSON first, tolerating surrounding prose and truncation
+        value, status = extract_json(result, dict)
+        if status != "failed" and isinstance(value, dict):
+            return {**value, "truncated": True} if status == "repaired" else value
+        # If not JSON, create structured response
+        return {
+            "raw_analysis": result,
+            "parsed": self._extract_key_points(result)
+        }
             
     def _extract_key_points(self, text: str) -> Dict[str, List[str]]:
         """Extract key points from free-form text"""
@@ -143,12 +347,11 @@ class AIAnalyzer:
     def _save_analysis(self, file_path: str, analysis: Dict[str, Any]):
         """Save analysis results to persistent storage"""
         analysis_path = "core/analysis_results.json"
-        existing_data = load_json(analysis_path, default={})
-        existing_data[file_path] = {
-            "timestamp": time.time(),
-            "analysis": analysis
-        }
-        save_json(analysis_path, existing_data)
+        with get_store(analysis_path).transaction() as existing_data:
+            existing_data[file_path] = {
+                "timestamp": time.time(),
+                "analysis": analysis
+            }
 
 # Initialize the analyzer
 ai_analyzer = AIAnalyzer()
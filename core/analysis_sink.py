@@ -0,0 +1,473 @@
+"""Write-behind persistence of analysis results to the Supabase ``code_analysis`` table.
+
+``analysis_sink.submit`` only appends to a bounded in-memory buffer; a writer
+thread drains it and inserts rows in multi-row batches, once ``BATCH_SIZE``
+rows are waiting or ``FLUSH_SECONDS`` have passed. When the buffer is full, or
+the database is unreachable, rows go to an on-disk spool that is replayed once
+writes succeed again, so neither a slow database nor an outage holds up
+analysis or grows memory. Rows the database rejects outright (a constraint or
+data error) go to a dead-letter file instead of being retried, and both files
+stop accepting rows past ``ANALYSIS_SINK_SPOOL_MAX_MB``.
+
+Only analyses that belong to a project are submitted: files under a watch
+root, and repositories fetched through ``/github/repo``. Uploads and
+``/analyze`` calls without a ``project`` are never persisted, since every row
+is written as the single ``ANALYSIS_SINK_USER_ID`` rather than the caller.
+
+Set ``ANALYSIS_SINK_URL`` to a Postgres DSN (the Supabase connection string),
+or to ``sqlite:///path/to/file.db`` for a local stand-in with the same table.
+"""
+import os
+import json
+import time
+import queue
+import atexit
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from utils.metrics import metrics
+from utils.workers import after_fork, connect_sqlite
+
+try:
+    import psycopg2
+    import psycopg2.extras
+    import psycopg2.pool
+except ImportError:  # Only needed when ANALYSIS_SINK_URL points at Postgres
+    psycopg2 = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: the spool is only shared within one process
+    fcntl = None
+
+# Empty disables the sink; results then only land in the local stores
+ANALYSIS_SINK_URL = os.getenv("ANALYSIS_SINK_URL", "")
+# code_analysis.user_id is NOT NULL: the profile the backend writes as
+ANALYSIS_SINK_USER_ID = os.getenv("ANALYSIS_SINK_USER_ID", "")
+ANALYSIS_SINK_BUFFER = int(os.getenv("ANALYSIS_SINK_BUFFER", "5000"))
+BATCH_SIZE = int(os.getenv("ANALYSIS_SINK_BATCH", "200"))
+FLUSH_SECONDS = float(os.getenv("ANALYSIS_SINK_FLUSH_SECONDS", "2"))
+POOL_SIZE = int(os.getenv("ANALYSIS_SINK_POOL", "2"))
+SPOOL_PATH = os.getenv("ANALYSIS_SINK_SPOOL", "core/cache/analysis_spool.jsonl")
+# Rows the database rejected outright (bad user id, invalid JSON text), kept for inspection
+DEAD_LETTER_PATH = os.getenv("ANALYSIS_SINK_DEAD_LETTER", "core/cache/analysis_dead_letter.jsonl")
+# Past this size new rows are dropped instead of spooled
+SPOOL_MAX_BYTES = int(float(os.getenv("ANALYSIS_SINK_SPOOL_MAX_MB", "100")) * 1024 * 1024)
+MAX_BACKOFF_SECONDS = 60.0
+# Stay well under SQLite's bound-parameter limit
+SQLITE_ROWS_PER_STATEMENT = 150
+
+COLUMNS = ("user_id", "code", "context", "analysis", "web_resources", "created_at")
+
+sink_rows = metrics.counter(
+    "junior_analysis_sink_rows_total", "Analysis rows by what the sink did with them", ("outcome",)
+)
+sink_batches = metrics.histogram(
+    "junior_analysis_sink_batch_seconds", "Time to insert one batch of analysis rows", ("backend",)
+)
+
+
+class DeliveryError(Exception):
+    """A transient write failure; ``rows`` are the rows that were not written"""
+
+    def __init__(self, rows: List[Tuple], cause: Exception):
+        super().__init__(str(cause))
+        self.rows = rows
+
+
+class PostgresBackend:
+    """Multi-row inserts over a small pool of connections"""
+    name = "postgres"
+
+    def __init__(self, dsn: str, pool_size: int = POOL_SIZE):
+        if psycopg2 is None:
+            raise RuntimeError("psycopg2 is required for a Postgres ANALYSIS_SINK_URL")
+        # Retrying these cannot succeed: the rows themselves are bad
+        self.permanent_errors = (psycopg2.IntegrityError, psycopg2.DataError)
+        self.dsn = dsn
+        self.pool_size = pool_size
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = psycopg2.pool.ThreadedConnectionPool(1, self.pool_size, self.dsn)
+        return self._pool
+
+    def write(self, rows: List[Tuple]) -> None:
+        pool = self._get_pool()
+        conn = pool.getconn()
+        broken = False
+        try:
+            with conn, conn.cursor() as cur:
+                psycopg2.extras.execute_values(
+                    cur,
+                    f"INSERT INTO code_analysis ({', '.join(COLUMNS)}) VALUES %s",
+                    rows,
+                    template="(%s, %s, %s, %s::jsonb, %s::jsonb, %s::timestamptz)",
+                    page_size=len(rows)
+                )
+        except psycopg2.OperationalError:
+            broken = True
+            raise
+        finally:
+            pool.putconn(conn, close=broken)
+
+    def reset(self) -> None:
+        # Pooled connections must not be carried into a forked worker
+        self._pool = None
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.closeall()
+            self._pool = None
+
+
+class SQLiteBackend:
+    """Local stand-in for the Supabase table, for development and tests"""
+    name = "sqlite"
+    permanent_errors = (sqlite3.IntegrityError, sqlite3.DataError)
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = connect_sqlite(self.path)
+            with self._conn:
+                self._conn.execute("""
+                    CREATE TABLE IF NOT EXISTS code_analysis (
+                        id TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
+                        user_id TEXT NOT NULL,
+                        code TEXT NOT NULL,
+                        context TEXT,
+                        analysis TEXT NOT NULL,
+                        web_resources TEXT,
+                        created_at TEXT NOT NULL,
+                        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+        return self._conn
+
+    def write(self, rows: List[Tuple]) -> None:
+        conn = self._connect()
+        placeholders = "(" + ", ".join("?" for _ in COLUMNS) + ")"
+        with conn:
+            for start in range(0, len(rows), SQLITE_ROWS_PER_STATEMENT):
+                chunk = rows[start:start + SQLITE_ROWS_PER_STATEMENT]
+                conn.execute(
+                    f"INSERT INTO code_analysis ({', '.join(COLUMNS)}) VALUES "
+                    + ", ".join(placeholders for _ in chunk),
+                    [value for row in chunk for value in row]
+                )
+
+    def reset(self) -> None:
+        self._conn = None
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def make_backend(url: str):
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///"):])
+    return PostgresBackend(url)
+
+
+class RetrySpool:
+    """Append-only JSONL file of rows that could not be written yet.
+
+    Appends take an ``flock`` only for the write itself. A replay claims the
+    whole file by renaming it, then streams it back in batches without holding
+    that lock, so appends never wait on the database. A second lock keeps
+    replays in different workers from running at once.
+    """
+
+    def __init__(self, path: str = SPOOL_PATH, max_bytes: int = SPOOL_MAX_BYTES):
+        self.path = path
+        self.claimed_path = path + ".replaying"
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _flock(self, suffix: str, blocking: bool = True):
+        """Open and lock a side file; None if ``blocking`` is off and another process holds it"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        lock_file = open(self.path + suffix, "a+")
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except OSError:
+                lock_file.close()
+                return None
+        return lock_file
+
+    def append(self, rows: List[Tuple]) -> int:
+        """Spool rows; returns how many were kept, which is none once the spool is full"""
+        if not rows:
+            return 0
+        with self._lock, self._flock(".lock"):
+            if self._size() >= self.max_bytes:
+                print(f"[Junior] Spool {self.path} is full, dropping {len(rows)} rows")
+                return 0
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(row) + "\n" for row in rows))
+        return len(rows)
+
+    def _size(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def pending(self) -> bool:
+        return self._size() > 0 or os.path.exists(self.claimed_path)
+
+    def replay(self, write: Callable[[List[Tuple]], None], batch_size: int) -> int:
+        """Write spooled rows in batches; rows not written when ``write`` fails go back to the spool"""
+        replay_lock = self._flock(".replay.lock", blocking=False)
+        if replay_lock is None:
+            return 0  # Another worker is replaying
+        with replay_lock:
+            # A claimed file left over from a crashed replay is finished first
+            if not os.path.exists(self.claimed_path):
+                with self._lock, self._flock(".lock"):
+                    if self._size() == 0:
+                        return 0
+                    os.replace(self.path, self.claimed_path)
+            written = 0
+            with open(self.claimed_path, "r", encoding="utf-8") as f:
+                batch: List[Tuple] = []
+                try:
+                    for line in f:
+                        try:
+                            batch.append(tuple(json.loads(line)))
+                        except ValueError:
+                            if line.strip():
+                                print(f"[Junior] Skipping corrupt line in {self.path}")
+                            continue
+                        if len(batch) >= batch_size:
+                            write(batch)
+                            written, batch = written + len(batch), []
+                    if batch:
+                        write(batch)
+                        written, batch = written + len(batch), []
+                except Exception as e:
+                    self._requeue(getattr(e, "rows", batch), f)
+                    os.remove(self.claimed_path)
+                    raise
+            os.remove(self.claimed_path)
+            return written
+
+    def _requeue(self, rows: List[Tuple], rest) -> None:
+        with self._lock, self._flock(".lock"):
+            with open(self.path, "a", encoding="utf-8") as out:
+                out.write("".join(json.dumps(row) + "\n" for row in rows))
+                for line in rest:
+                    out.write(line)
+
+
+class AnalysisSink:
+    def __init__(
+        self,
+        url: str = ANALYSIS_SINK_URL,
+        user_id: str = ANALYSIS_SINK_USER_ID,
+        buffer_size: int = ANALYSIS_SINK_BUFFER,
+        batch_size: int = BATCH_SIZE,
+        flush_seconds: float = FLUSH_SECONDS,
+        spool_path: str = SPOOL_PATH,
+        dead_letter_path: str = DEAD_LETTER_PATH,
+        spool_max_bytes: int = SPOOL_MAX_BYTES
+    ):
+        self.enabled = bool(url and user_id)
+        self.user_id = user_id
+        self.buffer_size = buffer_size
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.backend = make_backend(url) if self.enabled else None
+        self.spool = RetrySpool(spool_path, spool_max_bytes)
+        self.dead_letter = RetrySpool(dead_letter_path, spool_max_bytes)
+        self._init_state()
+        after_fork(self._after_fork)
+        if self.enabled:
+            atexit.register(self.close)
+
+    def _init_state(self) -> None:
+        self._queue: queue.Queue = queue.Queue(maxsize=self.buffer_size)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._retry_at = 0.0
+        self._backoff = 0.0
+
+    def _after_fork(self) -> None:
+        # The writer thread does not survive a fork; rows buffered in the parent stay there
+        self._init_state()
+        if self.backend is not None:
+            self.backend.reset()
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, code: str, analysis: Dict[str, Any], context: Optional[str] = None,
+               web_resources: Optional[Any] = None) -> None:
+        """Queue one result for insertion without waiting on the database"""
+        if not self.enabled:
+            return
+        row = (
+            self.user_id,
+            code,
+            context,
+            json.dumps(analysis, default=str),
+            json.dumps(web_resources, default=str) if web_resources is not None else None,
+            datetime.now(timezone.utc).isoformat()
+        )
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            # Backpressure: the database is not keeping up, so spill to disk instead of memory
+            kept = self.spool.append([row])
+            sink_rows.inc(outcome="overflow" if kept else "dropped")
+
+    def _ensure_writer(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="analysis-sink", daemon=True)
+                self._thread.start()
+
+    def _next_batch(self) -> List[Tuple]:
+        """Block for the first row, then gather more until the batch is full or the flush interval passes"""
+        try:
+            batch = [self._queue.get(timeout=self.flush_seconds)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_seconds
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            try:
+                if batch:
+                    self._write(batch)
+                elif self.spool.pending() and time.monotonic() >= self._retry_at:
+                    self._replay()
+            except Exception as e:
+                # e.g. the spool's disk is full; keep the writer alive
+                print(f"[Junior] Analysis sink writer error: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, rows: List[Tuple]) -> None:
+        # While backing off, don't hit the database with every batch
+        if time.monotonic() < self._retry_at:
+            self._spool(rows)
+            return
+        try:
+            written = self._deliver(rows)
+        except DeliveryError as e:
+            self._back_off(e)
+            self._spool(e.rows)
+            return
+        self._backoff = 0.0
+        sink_rows.inc(written, outcome="written")
+        if self.spool.pending():
+            self._replay()
+
+    def _deliver(self, rows: List[Tuple]) -> int:
+        """Insert rows, dead-lettering any the database rejects; raises DeliveryError on transient failures"""
+        try:
+            with sink_batches.time(backend=self.backend.name):
+                self.backend.write(rows)
+            return len(rows)
+        except self.backend.permanent_errors as e:
+            if len(rows) == 1:
+                self._dead_letter(rows, e)
+                return 0
+        except Exception as e:
+            raise DeliveryError(rows, e)
+
+        # One bad row fails the whole statement; find it by writing the rows one at a time
+        written = 0
+        for i, row in enumerate(rows):
+            try:
+                self.backend.write([row])
+                written += 1
+            except self.backend.permanent_errors as e:
+                self._dead_letter([row], e)
+            except Exception as e:
+                raise DeliveryError(rows[i:], e)
+        return written
+
+    def _dead_letter(self, rows: List[Tuple], error: Exception) -> None:
+        print(f"[Junior] Analysis sink rejected {len(rows)} rows, moving them to {self.dead_letter.path}: {error}")
+        self.dead_letter.append(rows)
+        sink_rows.inc(len(rows), outcome="dead_letter")
+
+    def _spool(self, rows: List[Tuple]) -> None:
+        kept = self.spool.append(rows)
+        sink_rows.inc(kept, outcome="spooled")
+        if kept < len(rows):
+            sink_rows.inc(len(rows) - kept, outcome="dropped")
+
+    def _back_off(self, error: Exception) -> None:
+        self._backoff = min(MAX_BACKOFF_SECONDS, self._backoff * 2 or 1.0)
+        self._retry_at = time.monotonic() + self._backoff
+        print(f"[Junior] Analysis sink write failed, retrying in {self._backoff:.0f}s: {error}")
+
+    def _replay(self) -> None:
+        replayed = 0
+
+        def write(rows: List[Tuple]) -> None:
+            nonlocal replayed
+            replayed += self._deliver(rows)
+
+        try:
+            self.spool.replay(write, self.batch_size)
+        except Exception as e:
+            self._back_off(e)
+        if replayed:
+            print(f"[Junior] Replayed {replayed} spooled analysis rows")
+            sink_rows.inc(replayed, outcome="replayed")
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every buffered row has been written or spooled"""
+        with self._queue.all_tasks_done:
+            return self._queue.all_tasks_done.wait_for(lambda: not self._queue.unfinished_tasks, timeout)
+
+    def close(self) -> None:
+        """Stop the writer and write what is still buffered; rows that fail are spooled for the next start"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_seconds + 5)
+        leftover = []
+        while True:
+            try:
+                leftover.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            self._queue.task_done()
+        for start in range(0, len(leftover), self.batch_size):
+            self._write(leftover[start:start + self.batch_size])
+        if self.backend is not None:
+            self.backend.close()
+
+
+# Initialize the analysis sink
+analysis_sink = AnalysisSink()
+metrics.gauge("junior_analysis_sink_buffered", "Analysis rows waiting to be written", analysis_sink.depth)
@@ -1,10 +1,17 @@
 import os
 import json
+import atexit
+import threading
+from collections import OrderedDict, deque
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
-import sqlite3
 from utils.helpers import load_json, save_json
+from utils.metrics import record_lookup, cache_evictions
+from utils.workers import after_fork, connect_sqlite, shared_cache_enabled
+
+# Key used by the context/memory ring buffers when no session or file is given
+DEFAULT_CACHE_KEY = "default"
 
 class CacheManager:
     def __init__(self):
@@ -13,11 +20,18 @@ class CacheManager:
         
         # Initialize different cache layers
         self.caches = {
-            "short_term": LRUCache(100),  # In-memory cache for quick access
+            "short_term": LRUCache(100, name="short_term"),  # In-memory cache for quick access
             "medium_term": FileCache(self.cache_dir / "medium_term"),  # Disk-based cache
             "long_term": SQLiteCache(self.cache_dir / "long_term.db"),  # Persistent storage
-            "context": ContextCache(self.cache_dir / "context.json"),  # Context tracking
-            "memory": MemoryCache(self.cache_dir / "memory.json")  # Step memory
+            "context": ContextCache(self.cache_dir / "context.jsonl"),  # Context tracking
+            "memory": MemoryCache(self.cache_dir / "memory.jsonl")  # Step memory
+        } if not shared_cache_enabled() else {
+            # Several worker processes: keep every layer in SQLite so they all see it
+            "short_term": SQLiteLRUCache(self.cache_dir / "shared.db", 100, name="short_term"),
+            "medium_term": FileCache(self.cache_dir / "medium_term"),
+            "long_term": SQLiteCache(self.cache_dir / "long_term.db"),
+            "context": SharedContextCache(self.cache_dir / "shared.db"),
+            "memory": SharedMemoryCache(self.cache_dir / "shared.db")
         }
         
         # Initialize RAG components
@@ -26,35 +40,53 @@ class CacheManager:
         
     def get(self, key: str, cache_type: str = "short_term") -> Optional[Any]:
         """Get value from specified cache layer"""
-        return self.caches[cache_type].get(key)
+        value = self.caches[cache_type].get(key)
+        record_lookup(cache_type, value is not None)
+        return value
         
     def set(self, key: str, value: Any, cache_type: str = "short_term", ttl: Optional[timedelta] = None) -> None:
         """Set value in specified cache layer"""
         self.caches[cache_type].set(key, value, ttl)
         
-    def add_to_context(self, context: Dict[str, Any]) -> None:
+    @staticmethod
+    def scope_key(session_id: Optional[str] = None, project: Optional[str] = None) -> str:
+        """Build the context/memory key for a session within a project"""
+        if not session_id and not project:
+            return DEFAULT_CACHE_KEY
+        return f"{project or '*'}::{session_id or '*'}"
+
+    def add_to_context(self, context: Dict[str, Any], session_id: Optional[str] = None, project: Optional[str] = None) -> None:
         """Add new context information"""
-        self.caches["context"].add(context)
+        self.caches["context"].add(context, self.scope_key(session_id, project))
         
-    def add_to_memory(self, step: Dict[str, Any]) -> None:
+    def add_to_memory(self, step: Dict[str, Any], session_id: Optional[str] = None, project: Optional[str] = None) -> None:
         """Add a new step to memory"""
-        self.caches["memory"].add(step)
+        self.caches["memory"].add(step, self.scope_key(session_id, project))
         
-    def get_recent_context(self) -> List[Dict[str, Any]]:
+    def get_recent_context(self, session_id: Optional[str] = None, project: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get recent context information"""
-        return self.caches["context"].get_recent()
+        return self.caches["context"].get_recent(self.scope_key(session_id, project))
         
-    def get_memory_steps(self) -> List[Dict[str, Any]]:
+    def get_memory_steps(self, session_id: Optional[str] = None, project: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get all memory steps"""
-        return self.caches["memory"].get_steps()
+        return self.caches["memory"].get_steps(self.scope_key(session_id, project))
+
+    def set_context_window(self, size: int, session_id: Optional[str] = None, project: Optional[str] = None) -> None:
+        """Configure how many context entries are kept for a session or project"""
+        self.caches["context"].set_window(self.scope_key(session_id, project), size)
+
+    def set_memory_window(self, size: int, session_id: Optional[str] = None, project: Optional[str] = None) -> None:
+        """Configure how many memory steps are kept for a session or project"""
+        self.caches["memory"].set_window(self.scope_key(session_id, project), size)
         
     def search_knowledge_base(self, query: str) -> List[Dict[str, Any]]:
         """Search knowledge base using RAG"""
         return self.knowledge_base.search(query)
 
 class LRUCache:
-    def __init__(self, capacity: int):
+    def __init__(self, capacity: int, name: str = "lru"):
         self.capacity = capacity
+        self.name = name
         self.cache = {}
         self.order = []
         
@@ -69,6 +101,7 @@ class LRUCache:
         if len(self.cache) >= self.capacity:
             oldest = self.order.pop(0)
             del self.cache[oldest]
+            cache_evictions.inc(cache=self.name)
             
         self.cache[key] = value
         self.order.append(key)
@@ -91,8 +124,16 @@ class FileCache:
 class SQLiteCache:
     def __init__(self, db_path: Path):
         self.db_path = db_path
-        self.conn = sqlite3.connect(str(db_path))
+        # Shared by the API and the watcher thread, so serialize access ourselves
+        self.conn = connect_sqlite(db_path)
+        self._lock = threading.Lock()
         self._create_tables()
+        after_fork(self._reopen)
+
+    def _reopen(self):
+        # A connection must not be carried into a forked worker
+        self.conn = connect_sqlite(self.db_path)
+        self._lock = threading.Lock()
         
     def _create_tables(self):
         with self.conn:
@@ -106,9 +147,9 @@ class SQLiteCache:
             """)
             
     def get(self, key: str) -> Optional[Any]:
-        with self.conn:
+        with self._lock, self.conn:
             result = self.conn.execute(
-                "SELECT value FROM cache WHERE key = ? AND expires_at > ?",
+                "SELECT value FROM cache WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
                 (key, datetime.now())
             ).fetchone()
             if result:
@@ -120,7 +161,7 @@ class SQLiteCache:
         if ttl:
             expires_at = datetime.now() + ttl
             
-        with self.conn:
+        with self._lock, self.conn:
             self.conn.execute(
                 """
                 INSERT OR REPLACE INTO cache (key, value, created_at, expires_at)
@@ -129,45 +170,351 @@ class SQLiteCache:
                 (key, json.dumps(value), datetime.now(), expires_at)
             )
 
-class ContextCache:
-    def __init__(self, file_path: Path):
-        self.file_path = file_path
-        self.context = []
-        self.max_context = 5
-        
-    def add(self, context: Dict[str, Any]):
-        self.context.append({
-            "timestamp": datetime.now().isoformat(),
-            "data": context
-        })
-        self.context = self.context[-self.max_context:]
-        self._save()
-        
-    def get_recent(self) -> List[Dict[str, Any]]:
-        return self.context
-        
-    def _save(self):
-        save_json(self.file_path, self.context)
+class RingLogCache:
+    """Keyed ring buffers persisted through an append-only JSON-lines log.
+
+    Entries are kept in bounded deques (one per key, e.g. a session or a file)
+    and only queued for disk on ``add``; a background timer appends the batch
+    to the log and the log is compacted down to the live windows once it grows
+    past ``compact_after`` lines. The log is replayed on start-up. At most
+    ``max_keys`` keys stay resident; the least recently used one is evicted.
+    Per-key window sizes are logged as ``{"key", "window"}`` records, so they
+    survive a restart, and are forgotten with their key's buffer.
+    """
 
-class MemoryCache:
-    def __init__(self, file_path: Path):
+    # Label for this cache's eviction metrics
+    name = "ring_log"
+
+    def __init__(
+        self,
+        file_path: Path,
+        max_entries: int,
+        payload_field: str,
+        flush_interval: float = 2.0,
+        compact_after: int = 1000,
+        max_keys: int = 256,
+    ):
         self.file_path = file_path
-        self.steps = []
-        self.max_steps = 10
-        
-    def add(self, step: Dict[str, Any]):
-        self.steps.append({
+        self.max_entries = max_entries
+        self.payload_field = payload_field
+        self.flush_interval = flush_interval
+        self.compact_after = compact_after
+        self.max_keys = max_keys
+        self.windows: Dict[str, int] = {}
+        self.buffers: "OrderedDict[str, deque]" = OrderedDict()
+        self._pending: List[Dict[str, Any]] = []
+        self._log_lines = 0
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._load()
+        atexit.register(self.flush)
+        after_fork(self._after_fork)
+
+    def _after_fork(self) -> None:
+        # The parent's flush timer does not exist in a forked child
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+        if self._pending:
+            self._schedule_flush()
+
+    def set_window(self, key: str, size: int) -> None:
+        """Resize the ring buffer for a single key"""
+        with self._lock:
+            self._resize(key, size)
+            self._pending.append({"key": key, "window": size})
+            self._schedule_flush()
+
+    def _resize(self, key: str, size: int) -> None:
+        self.windows[key] = size
+        buffer = self._buffer(key)
+        if buffer.maxlen != size:
+            self.buffers[key] = deque(buffer, maxlen=size)
+
+    def add(self, payload: Dict[str, Any], key: str = DEFAULT_CACHE_KEY) -> None:
+        entry = {
             "timestamp": datetime.now().isoformat(),
-            "step": step
-        })
-        self.steps = self.steps[-self.max_steps:]
-        self._save()
-        
-    def get_steps(self) -> List[Dict[str, Any]]:
-        return self.steps
-        
-    def _save(self):
-        save_json(self.file_path, self.steps)
+            self.payload_field: payload
+        }
+        with self._lock:
+            buffer = self._buffer(key)
+            if len(buffer) == buffer.maxlen:
+                cache_evictions.inc(cache=self.name)
+            buffer.append(entry)
+            self._pending.append({"key": key, **entry})
+            self._schedule_flush()
+
+    def entries(self, key: str = DEFAULT_CACHE_KEY) -> List[Dict[str, Any]]:
+        with self._lock:
+            buffer = self.buffers.get(key)
+            if buffer is None:
+                return []
+            self.buffers.move_to_end(key)
+            return list(buffer)
+
+    def flush(self) -> None:
+        """Append queued entries to the log, compacting it when it gets long"""
+        # Disk I/O happens outside _lock so add() never waits on it; _flush_lock keeps flushes in order
+        with self._flush_lock:
+            with self._lock:
+                self._timer = None
+                pending, self._pending = self._pending, []
+                if not pending:
+                    return
+                compact = self._log_lines + len(pending) > self.compact_after
+                snapshot = self._snapshot() if compact else None
+            if snapshot is not None:
+                self._compact(snapshot)
+                return
+            with open(self.file_path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(record) + "\n" for record in pending))
+            self._log_lines += len(pending)
+
+    def _buffer(self, key: str) -> deque:
+        if key in self.buffers:
+            self.buffers.move_to_end(key)
+            return self.buffers[key]
+        buffer = self.buffers[key] = deque(maxlen=self.windows.get(key, self.max_entries))
+        while len(self.buffers) > self.max_keys:
+            # Evicted keys are dropped from the log at the next compaction
+            evicted, _ = self.buffers.popitem(last=False)
+            self.windows.pop(evicted, None)
+            cache_evictions.inc(cache=self.name)
+        return buffer
+
+    def _schedule_flush(self) -> None:
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_interval, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _snapshot(self) -> List[Tuple[str, Optional[int], List[Dict[str, Any]]]]:
+        return [(key, self.windows.get(key), list(buffer)) for key, buffer in self.buffers.items()]
+
+    def _compact(self, snapshot: List[Tuple[str, Optional[int], List[Dict[str, Any]]]]) -> None:
+        """Rewrite the log so it only holds what the ring buffers contained at ``snapshot``"""
+        tmp_path = self.file_path.with_suffix(self.file_path.suffix + ".tmp")
+        lines = 0
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for key, window, entries in snapshot:
+                if window is not None:
+                    f.write(json.dumps({"key": key, "window": window}) + "\n")
+                    lines += 1
+                for entry in entries:
+                    f.write(json.dumps({"key": key, **entry}) + "\n")
+                    lines += 1
+        os.replace(tmp_path, self.file_path)
+        self._log_lines = lines
+
+    def _load(self) -> None:
+        if not self.file_path.exists():
+            return
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Torn write from an interrupted flush
+                key = record.pop("key", DEFAULT_CACHE_KEY)
+                if "window" in record:
+                    self._resize(key, record["window"])
+                else:
+                    self._buffer(key).append(record)
+                self._log_lines += 1
+        if self._log_lines > self.compact_after:
+            self._compact(self._snapshot())
+
+class ContextCache(RingLogCache):
+    name = "context"
+
+    def __init__(self, file_path: Path, max_context: int = 5, **kwargs):
+        super().__init__(file_path, max_context, "data", **kwargs)
+
+    def get_recent(self, key: str = DEFAULT_CACHE_KEY) -> List[Dict[str, Any]]:
+        return self.entries(key)
+
+class MemoryCache(RingLogCache):
+    name = "memory"
+
+    def __init__(self, file_path: Path, max_steps: int = 10, **kwargs):
+        super().__init__(file_path, max_steps, "step", **kwargs)
+
+    def get_steps(self, key: str = DEFAULT_CACHE_KEY) -> List[Dict[str, Any]]:
+        return self.entries(key)
+
+class SQLiteLRUCache:
+    """Bounded cache in a SQLite table, shared by every worker process.
+
+    Stands in for ``LRUCache`` when several workers serve the API; entries
+    past ``capacity`` are evicted least recently used first.
+    """
+
+    # Seconds before a hit refreshes accessed_at, which takes the database write lock
+    TOUCH_INTERVAL = 60.0
+
+    def __init__(self, db_path: Path, capacity: int, name: str = "lru"):
+        self.db_path = db_path
+        self.capacity = capacity
+        self.name = name
+        self.table = f"lru_{name}"
+        self.conn = connect_sqlite(db_path)
+        self._lock = threading.Lock()
+        with self.conn:
+            self.conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.table} (
+                    key TEXT PRIMARY KEY,
+                    value TEXT,
+                    expires_at REAL,
+                    accessed_at REAL
+                )
+            """)
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_accessed ON {self.table}(accessed_at)")
+        after_fork(self._reopen)
+
+    def _reopen(self):
+        self.conn = connect_sqlite(self.db_path)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = datetime.now().timestamp()
+        with self._lock:
+            row = self.conn.execute(
+                f"SELECT value, accessed_at FROM {self.table} WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            # Hits stay read-only; recency only needs refreshing now and then for eviction order
+            if row[1] is None or now - row[1] > self.TOUCH_INTERVAL:
+                with self.conn:
+                    self.conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+            return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: Optional[timedelta] = None) -> None:
+        now = datetime.now().timestamp()
+        expires_at = now + ttl.total_seconds() if ttl else None
+        with self._lock, self.conn:
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), expires_at, now)
+            )
+            evicted = self.conn.execute(f"""
+                DELETE FROM {self.table} WHERE key IN (
+                    SELECT key FROM {self.table} ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.capacity,)).rowcount
+        if evicted > 0:
+            cache_evictions.inc(evicted, cache=self.name)
+
+class SQLiteRingCache:
+    """Keyed ring buffers in a SQLite table, shared by every worker process.
+
+    Same interface as ``RingLogCache``: each key keeps its last
+    ``max_entries`` entries (or its own window), and at most ``max_keys``
+    keys are kept, dropping the least recently written.
+    """
+
+    name = "ring"
+    # Key pruning scans the table, so only do it every so many writes
+    PRUNE_EVERY = 64
+
+    def __init__(self, db_path: Path, max_entries: int, payload_field: str, max_keys: int = 256):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.payload_field = payload_field
+        self.max_keys = max_keys
+        self.table = f"ring_{self.name}"
+        self.conn = connect_sqlite(db_path)
+        self._lock = threading.Lock()
+        self._writes = 0
+        with self.conn:
+            self.conn.executescript(f"""
+                CREATE TABLE IF NOT EXISTS {self.table} (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    key TEXT,
+                    timestamp TEXT,
+                    payload TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_{self.table}_key ON {self.table}(key, id);
+                CREATE TABLE IF NOT EXISTS {self.table}_windows (
+                    key TEXT PRIMARY KEY,
+                    size INTEGER
+                );
+            """)
+        after_fork(self._reopen)
+
+    def _reopen(self):
+        self.conn = connect_sqlite(self.db_path)
+        self._lock = threading.Lock()
+
+    def _window(self, key: str) -> int:
+        row = self.conn.execute(f"SELECT size FROM {self.table}_windows WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else self.max_entries
+
+    def set_window(self, key: str, size: int) -> None:
+        with self._lock, self.conn:
+            self.conn.execute(f"INSERT OR REPLACE INTO {self.table}_windows (key, size) VALUES (?, ?)", (key, size))
+            self._trim(key, size)
+
+    def add(self, payload: Dict[str, Any], key: str = DEFAULT_CACHE_KEY) -> None:
+        with self._lock, self.conn:
+            self.conn.execute(
+                f"INSERT INTO {self.table} (key, timestamp, payload) VALUES (?, ?, ?)",
+                (key, datetime.now().isoformat(), json.dumps(payload))
+            )
+            self._trim(key, self._window(key))
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                self._prune_keys()
+
+    def entries(self, key: str = DEFAULT_CACHE_KEY) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT timestamp, payload FROM {self.table} WHERE key = ? ORDER BY id",
+                (key,)
+            ).fetchall()
+        return [{"timestamp": timestamp, self.payload_field: json.loads(payload)} for timestamp, payload in rows]
+
+    def flush(self) -> None:
+        """Writes are already durable; kept for parity with ``RingLogCache``"""
+
+    def _trim(self, key: str, size: int) -> None:
+        evicted = self.conn.execute(f"""
+            DELETE FROM {self.table} WHERE key = ? AND id NOT IN (
+                SELECT id FROM {self.table} WHERE key = ? ORDER BY id DESC LIMIT ?
+            )
+        """, (key, key, size)).rowcount
+        if evicted > 0:
+            cache_evictions.inc(evicted, cache=self.name)
+
+    def _prune_keys(self) -> None:
+        stale = [row[0] for row in self.conn.execute(f"""
+            SELECT key FROM {self.table} GROUP BY key ORDER BY MAX(id) DESC LIMIT -1 OFFSET ?
+        """, (self.max_keys,))]
+        for key in stale:
+            self.conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self.conn.execute(f"DELETE FROM {self.table}_windows WHERE key = ?", (key,))
+        if stale:
+            cache_evictions.inc(len(stale), cache=self.name)
+
+class SharedContextCache(SQLiteRingCache):
+    name = "context"
+
+    def __init__(self, db_path: Path, max_context: int = 5, **kwargs):
+        super().__init__(db_path, max_context, "data", **kwargs)
+
+    def get_recent(self, key: str = DEFAULT_CACHE_KEY) -> List[Dict[str, Any]]:
+        return self.entries(key)
+
+class SharedMemoryCache(SQLiteRingCache):
+    name = "memory"
+
+    def __init__(self, db_path: Path, max_steps: int = 10, **kwargs):
+        super().__init__(db_path, max_steps, "step", **kwargs)
+
+    def get_steps(self, key: str = DEFAULT_CACHE_KEY) -> List[Dict[str, Any]]:
+        return self.entries(key)
 
 class KnowledgeBase:
     def __init__(self):
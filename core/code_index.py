@@ -0,0 +1,274 @@
+import os
+import ast
+import re
+import threading
+import numpy as np
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from utils.tracing import span
+from utils.workers import after_fork, connect_sqlite
+
+CODE_INDEX_PATH = Path("core/cache/code_index.db")
+MAX_CHUNK_CHARS = 2000
+WINDOW_LINES = 40
+DEFAULT_TOKEN_BUDGET = 1500
+MAX_LOOKUP_NAMES = 100
+
+_CALL = re.compile(r"\b([A-Za-z_]\w*)\s*\(")
+_CAPITALIZED = re.compile(r"\b([A-Z]\w+)\b")
+_JS_DECLARATION = re.compile(r"^\s*(?:export\s+)?(?:async\s+)?(?:function\s+(\w+)|class\s+(\w+)|(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s*)?\()", re.M)
+
+
+def chunk_python(code: str) -> List[Dict[str, Any]]:
+    """One chunk per top-level function/class and per method"""
+    tree = ast.parse(code)
+    lines = code.split("\n")
+    chunks = []
+
+    def add(node, kind, qualified):
+        # Decorators can span lines or be separated by comments, so start at the first one
+        start = min([d.lineno for d in node.decorator_list] + [node.lineno])
+        text = "\n".join(lines[start - 1:node.end_lineno])
+        chunks.append({
+            "name": node.name,
+            "qualified": qualified,
+            "kind": kind,
+            "start_line": start,
+            "end_line": node.end_lineno,
+            "text": text[:MAX_CHUNK_CHARS]
+        })
+
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            add(node, "function", node.name)
+        elif isinstance(node, ast.ClassDef):
+            add(node, "class", node.name)
+            for item in node.body:
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    add(item, "method", f"{node.name}.{item.name}")
+    return chunks
+
+
+def chunk_by_window(code: str) -> List[Dict[str, Any]]:
+    """Fixed line windows, named after the first declaration they contain"""
+    lines = code.split("\n")
+    chunks = []
+    for start in range(0, len(lines), WINDOW_LINES):
+        text = "\n".join(lines[start:start + WINDOW_LINES])
+        if not text.strip():
+            continue
+        match = _JS_DECLARATION.search(text)
+        name = next((g for g in match.groups() if g), None) if match else None
+        chunks.append({
+            "name": name,
+            "qualified": name,
+            "kind": "window",
+            "start_line": start + 1,
+            "end_line": min(start + WINDOW_LINES, len(lines)),
+            "text": text[:MAX_CHUNK_CHARS]
+        })
+    return chunks
+
+
+def referenced_names(snippet: str) -> List[str]:
+    """Called functions and capitalized (class-like) names in a code snippet"""
+    names = _CALL.findall(snippet) + _CAPITALIZED.findall(snippet)
+    return list(dict.fromkeys(names))[:MAX_LOOKUP_NAMES]
+
+
+class CodeIndex:
+    """Chunk-level embedding index over the watched folders.
+
+    Chunks live in SQLite (embeddings as float32 blobs, with a name index for
+    exact symbol lookups); similarity search runs against an in-memory matrix
+    that is rebuilt lazily after files are re-indexed. Each chunk records the
+    watch root it was indexed under, and retrieval only returns chunks from the
+    root containing the file being asked about, so projects never see each
+    other's code. Files outside every indexed root (uploads, ad-hoc paths) get
+    no related context at all.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = connect_sqlite(db_path)
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None
+        self._ids: List[int] = []
+        self._id_roots: np.ndarray = np.zeros(0, dtype=object)
+        self._roots: List[str] = []
+        self._data_version: Optional[int] = None
+        self._create_tables()
+        after_fork(self._reopen)
+
+    def _reopen(self):
+        # A connection must not be carried into a forked worker
+        self.conn = connect_sqlite(self.db_path)
+        self._lock = threading.Lock()
+        self._data_version = None
+
+    def _create_tables(self):
+        with self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS chunks (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    path TEXT,
+                    name TEXT,
+                    qualified TEXT,
+                    kind TEXT,
+                    start_line INTEGER,
+                    end_line INTEGER,
+                    text TEXT,
+                    embedding BLOB,
+                    root TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_chunks_path ON chunks(path);
+                CREATE INDEX IF NOT EXISTS idx_chunks_name ON chunks(name);
+            """)
+            # Indexes created before chunks were scoped to a root; old rows stay unreachable until re-indexed
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(chunks)")]
+            if "root" not in columns:
+                self.conn.execute("ALTER TABLE chunks ADD COLUMN root TEXT")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_root ON chunks(root, name)")
+
+    def index_file(self, file_path: str, code: str, language: str, root: Optional[str] = None) -> int:
+        """Replace the chunks stored for a file under its watch root; returns the number indexed"""
+        try:
+            chunks = chunk_python(code) if language == "python" else chunk_by_window(code)
+        except SyntaxError:
+            chunks = chunk_by_window(code)
+
+        embeddings = self._embed([f"{c['qualified'] or ''}\n{c['text']}" for c in chunks]) if chunks else []
+        rows = [
+            (file_path, c["name"], c["qualified"], c["kind"], c["start_line"], c["end_line"], c["text"], e.tobytes(),
+             os.path.abspath(root) if root else None)
+            for c, e in zip(chunks, embeddings)
+        ]
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM chunks WHERE path = ?", (file_path,))
+            self.conn.executemany(
+                """
+                INSERT INTO chunks (path, name, qualified, kind, start_line, end_line, text, embedding, root)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows
+            )
+            self._matrix = None
+        return len(rows)
+
+    def remove_file(self, file_path: str) -> None:
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM chunks WHERE path = ?", (file_path,))
+            self._matrix = None
+
+    def root_for(self, file_path: str) -> Optional[str]:
+        """The innermost indexed root containing an absolute path, or None"""
+        if not file_path or not os.path.isabs(file_path):
+            return None
+        self._load_matrix()
+        file_path = os.path.abspath(file_path)
+        containing = [r for r in self._roots if file_path.startswith(r + os.sep)]
+        return max(containing, key=len) if containing else None
+
+    def lookup(self, names: List[str], root: str) -> List[Dict[str, Any]]:
+        """Chunks under a root defining any of the given names (index lookup, no embeddings)"""
+        if not names:
+            return []
+        placeholders = ",".join("?" for _ in names)
+        with self._lock:
+            rows = self.conn.execute(
+                f"""
+                SELECT id, path, qualified, kind, start_line, end_line, text FROM chunks
+                WHERE root = ? AND name IN ({placeholders})
+                """,
+                [root, *names]
+            ).fetchall()
+        return [self._row_to_chunk(row) for row in rows]
+
+    def search(self, query: str, root: str, k: int = 5) -> List[Dict[str, Any]]:
+        """Top-k chunks under a root by cosine similarity to the query"""
+        matrix, ids = self._load_matrix()
+        if matrix is None or not len(ids):
+            return []
+        in_root = np.flatnonzero(self._id_roots == root)
+        if not len(in_root):
+            return []
+        scores = matrix[in_root] @ self._embed([query])[0]
+        top = np.argsort(-scores)[:k]
+        wanted = [ids[in_root[i]] for i in top]
+        placeholders = ",".join("?" for _ in wanted)
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT id, path, qualified, kind, start_line, end_line, text FROM chunks WHERE id IN ({placeholders})",
+                wanted
+            ).fetchall()
+        by_id = {row[0]: self._row_to_chunk(row) for row in rows}
+        return [dict(by_id[i], score=float(scores[top[n]])) for n, i in enumerate(wanted) if i in by_id]
+
+    def related_context(
+        self,
+        snippet: str,
+        file_path: str = "",
+        line: Optional[int] = None,
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+        k: int = 5
+    ) -> str:
+        """Definitions the snippet refers to, then similar chunks, within a token budget.
+
+        With a ``line`` only the chunk containing it is skipped; without one the
+        snippet is taken to be the whole file and all of its chunks are skipped.
+        Only chunks from the watch root containing ``file_path`` are considered;
+        a file outside every root gets no context.
+        """
+        root = self.root_for(file_path)
+        if root is None:
+            return ""
+        candidates = self.lookup(referenced_names(snippet), root) + self.search(snippet, root, k)
+        budget_chars = token_budget * 4
+        parts, seen = [], set()
+        for chunk in candidates:
+            if chunk["id"] in seen:
+                continue
+            seen.add(chunk["id"])
+            # Skip the code the snippet was taken from
+            if chunk["path"] == file_path and (not line or chunk["start_line"] <= line <= chunk["end_line"]):
+                continue
+            block = f"# {chunk['path']}:{chunk['start_line']} ({chunk['qualified'] or chunk['kind']})\n{chunk['text']}"
+            if len(block) > budget_chars:
+                continue
+            parts.append(block)
+            budget_chars -= len(block)
+        return "\n\n".join(parts)
+
+    def _load_matrix(self) -> Tuple[Optional[np.ndarray], List[int]]:
+        with self._lock:
+            # data_version moves when another process (e.g. the watcher) commits
+            data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version != self._data_version:
+                self._matrix, self._data_version = None, data_version
+            if self._matrix is None:
+                rows = self.conn.execute("SELECT id, root, embedding FROM chunks").fetchall()
+                self._ids = [row[0] for row in rows]
+                self._id_roots = np.array([row[1] for row in rows], dtype=object)
+                self._roots = sorted({row[1] for row in rows if row[1]})
+                self._matrix = (
+                    np.vstack([np.frombuffer(row[2], dtype=np.float32) for row in rows])
+                    if rows else np.zeros((0, 0), dtype=np.float32)
+                )
+            return self._matrix, self._ids
+
+    @staticmethod
+    def _row_to_chunk(row: tuple) -> Dict[str, Any]:
+        keys = ("id", "path", "qualified", "kind", "start_line", "end_line", "text")
+        return dict(zip(keys, row))
+
+    @staticmethod
+    def _embed(texts: List[str]) -> np.ndarray:
+        # Reuse the MiniLM instance the context manager already loaded
+        from core.context_manager import model
+        with span("embed", texts=len(texts)):
+            return np.asarray(model.encode(texts, normalize_embeddings=True), dtype=np.float32)
+
+
+# Initialize the code index
+code_index = CodeIndex(CODE_INDEX_PATH)
@@ -2,18 +2,24 @@ import os
 import json
 import ast
 from sentence_transformers  import SentenceTransformer
-from utils.helpers import detect_language, extract_python_metadata, load_json, save_json
+from utils.helpers import extract_python_metadata
+from core.language_hub import language_hub
+from core.code_index import code_index
+from utils.json_store import get_store
+from utils.tracing import span, traced
 
 model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
 METADATA_PATH = "core/code_metadata.json"
+metadata_store = get_store(METADATA_PATH, flush_interval=1.0)
 
-def analyze_file_event(file_path):
+@traced("analyze_file_event")
+def analyze_file_event(file_path, root=None):
     print(f"[Junior] Detected change in {file_path}")
     try:
         with open(file_path, "r", encoding="utf-8") as f:
             code = f.read()
 
-        language = detect_language(file_path)
+        language = language_hub.get_language_for_path(file_path)
         metadata = {
             "file": file_path,
             "language": language,
@@ -24,16 +30,16 @@ def analyze_file_event(file_path):
         if language == "python":
             metadata["summary"] = extract_python_metadata(code)
 
-        metadata["embedding"] = model.encode(metadata["summary"]).tolist()
+        with span("embed", texts=1):
+            metadata["embedding"] = model.encode(metadata["summary"]).tolist()
 
-        # Initialize metadata if file doesn't exist
-        if not os.path.exists(METADATA_PATH):
-            os.makedirs(os.path.dirname(METADATA_PATH), exist_ok=True)
-            save_json(METADATA_PATH, {})
-            
-        all_meta = load_json(METADATA_PATH)
-        all_meta[file_path] = metadata
-        save_json(METADATA_PATH, all_meta)
+        with metadata_store.transaction() as all_meta:
+            all_meta[file_path] = metadata
+
+        # Keep the retrieval index in step with the file
+        with span("code_index.index_file"):
+            chunk_count = code_index.index_file(file_path, code, language, root)
+        print(f"[Junior] Indexed {chunk_count} code chunks")
 
         print(f"[Junior] Scanned {len(code)} characters of code")
     except Exception as e:
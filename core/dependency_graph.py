@@ -0,0 +1,189 @@
+import os
+import re
+import json
+import hashlib
+import threading
+from collections import defaultdict, deque
+from typing import Any, Dict, List, Set
+from utils.helpers import extract_python_symbols
+from utils.json_store import get_store
+
+DEPENDENCY_GRAPH_PATH = "core/dependency_graph.json"
+MAX_MODULE_DEPTH = 6
+# A directory imported from JS/TS resolves to its index file
+_JS_EXTENSIONS = (".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx")
+
+_JS_IMPORT = re.compile(r"""(?:\bfrom\s*|\bimport\s*|\brequire\(\s*)['"](\.{1,2}/[^'"]+)['"]""")
+_JS_EXPORT = re.compile(r"^\s*export\s+(?:default\s+)?(?:async\s+)?(?:function\*?|class|const|let|var)\s+\w+[^\n{=]*", re.M)
+
+
+def _dotted(path: str) -> List[str]:
+    """Path components without extension, and without a trailing __init__ (Python) or index (JS/TS)"""
+    root, ext = os.path.splitext(os.path.abspath(path))
+    parts = [p for p in root.split(os.sep) if p]
+    package_file = "index" if ext in _JS_EXTENSIONS else "__init__"
+    if parts and parts[-1] == package_file:
+        parts = parts[:-1]
+    return parts
+
+
+def module_names(file_path: str) -> List[str]:
+    """Every dotted suffix a file can be imported by: c, b.c, a.b.c, ..."""
+    parts = _dotted(file_path)
+    start = max(0, len(parts) - MAX_MODULE_DEPTH)
+    names = [".".join(parts[i:]) for i in range(start, len(parts))]
+    if start > 0:
+        names.append(".".join(parts))  # Absolute form used by relative imports
+    return names
+
+
+def python_import_candidates(file_path: str, imp: Dict[str, Any]) -> List[str]:
+    """Module names an import may refer to, most specific first"""
+    if imp["level"]:
+        base = _dotted(os.path.dirname(os.path.abspath(file_path)) + os.sep + "__init__.py")
+        base = base[:len(base) - (imp["level"] - 1)] if imp["level"] > 1 else base
+        module = ".".join(base + ([imp["module"]] if imp["module"] else []))
+    else:
+        module = imp["module"]
+    candidates = [f"{module}.{imp['name']}"] if imp["name"] and imp["name"] != "*" else []
+    parts = module.split(".")
+    candidates.extend(".".join(parts[:i]) for i in range(len(parts), 0, -1))
+    return [c for c in candidates if c]
+
+
+def js_import_candidates(file_path: str, spec: str) -> List[str]:
+    target = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(file_path)), spec))
+    return [".".join(_dotted(target + ".js"))]
+
+
+class DependencyGraph:
+    """Incremental import graph and public-API fingerprints for watched files.
+
+    ``dependents`` maps a file to the files importing it, so "who depends on
+    X" is a dict lookup. Imports that point at files not seen yet are parked
+    by module name and resolved as soon as a matching file is registered.
+    """
+
+    def __init__(self, path: str):
+        self.store = get_store(path, flush_interval=1.0)
+        self._lock = threading.RLock()
+        self.module_index: Dict[str, Set[str]] = defaultdict(set)
+        self.dependencies: Dict[str, Set[str]] = defaultdict(set)
+        self.dependents: Dict[str, Set[str]] = defaultdict(set)
+        self.unresolved: Dict[str, Set[str]] = defaultdict(set)
+        self._load()
+
+    def dependents_of(self, file_path: str) -> Set[str]:
+        with self._lock:
+            return set(self.dependents.get(file_path, ()))
+
+    def update_file(self, file_path: str, code: str, language: str) -> bool:
+        """Record a file's imports and API; True if its dependents need re-analysis"""
+        try:
+            imports, api = self._parse(file_path, code, language)
+        except SyntaxError:
+            return False  # Keep the last good edges until the file parses again
+        api_hash = hashlib.md5(json.dumps(api, sort_keys=True).encode("utf-8")).hexdigest()
+
+        with self._lock:
+            previous = self.store.get(file_path)
+            with self.store.transaction() as data:
+                data[file_path] = {"imports": imports, "api": api_hash}
+            is_new = previous is None
+            if is_new:
+                self._register(file_path)
+            self._resolve(file_path, imports)
+            changed = not is_new and previous.get("api") != api_hash
+            return (changed or is_new) and bool(self.dependents.get(file_path))
+
+    def remove_file(self, file_path: str) -> List[str]:
+        """Forget a deleted file; returns its former dependents in analysis order"""
+        with self._lock:
+            affected = self.affected(file_path)
+            for dep in self.dependencies.pop(file_path, set()):
+                self.dependents[dep].discard(file_path)
+            for dependent in self.dependents.pop(file_path, set()):
+                self.dependencies[dependent].discard(file_path)
+            for name in module_names(file_path):
+                self.module_index[name].discard(file_path)
+            for waiting in self.unresolved.values():
+                waiting.discard(file_path)
+            with self.store.transaction() as data:
+                data.pop(file_path, None)
+            return affected
+
+    def affected(self, file_path: str) -> List[str]:
+        """Transitive dependents, ordered so each comes after what it imports"""
+        with self._lock:
+            seen, frontier = set(), deque([file_path])
+            while frontier:
+                for dependent in self.dependents.get(frontier.popleft(), ()):
+                    if dependent not in seen and dependent != file_path:
+                        seen.add(dependent)
+                        frontier.append(dependent)
+
+            indegree = {f: len(self.dependencies.get(f, set()) & seen) for f in seen}
+            ready = deque(sorted(f for f, d in indegree.items() if d == 0))
+            order = []
+            while ready:
+                current = ready.popleft()
+                order.append(current)
+                for dependent in sorted(self.dependents.get(current, ())):
+                    if dependent in indegree:
+                        indegree[dependent] -= 1
+                        if indegree[dependent] == 0:
+                            ready.append(dependent)
+            # Import cycles never reach indegree 0; analyse them last
+            order.extend(sorted(seen - set(order)))
+            return order
+
+    def _parse(self, file_path: str, code: str, language: str):
+        if language == "python":
+            symbols = extract_python_symbols(code)
+            imports = [python_import_candidates(file_path, imp) for imp in symbols["imports"]]
+            return imports, symbols["api"]
+        if language in ("javascript", "typescript"):
+            imports = [js_import_candidates(file_path, spec) for spec in _JS_IMPORT.findall(code)]
+            return imports, sorted(" ".join(m.split()) for m in _JS_EXPORT.findall(code))
+        return [], {}
+
+    def _register(self, file_path: str) -> None:
+        names = module_names(file_path)
+        waiting = set()
+        for name in names:
+            self.module_index[name].add(file_path)
+            waiting |= self.unresolved.pop(name, set())
+        for importer in waiting:
+            record = self.store.get(importer)
+            if record and importer != file_path:
+                self._resolve(importer, record["imports"])
+
+    def _resolve(self, file_path: str, imports: List[List[str]]) -> None:
+        resolved = set()
+        for candidates in imports:
+            for name in candidates:
+                targets = self.module_index.get(name, set()) - {file_path}
+                if targets:
+                    resolved |= targets
+                    break
+            else:
+                for name in candidates:
+                    self.unresolved[name].add(file_path)
+        for old in self.dependencies.get(file_path, set()) - resolved:
+            self.dependents[old].discard(file_path)
+        for new in resolved:
+            self.dependents[new].add(file_path)
+        self.dependencies[file_path] = resolved
+
+    def _load(self) -> None:
+        data = self.store.read()
+        with self._lock:
+            for file_path in data:
+                for name in module_names(file_path):
+                    self.module_index[name].add(file_path)
+            for file_path, record in data.items():
+                self._resolve(file_path, record["imports"])
+
+
+# Initialize the dependency graph
+dependency_graph = DependencyGraph(DEPENDENCY_GRAPH_PATH)
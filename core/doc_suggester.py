@@ -1,7 +1,7 @@
 import os
 import json
 import re
-from utils.helpers import load_json, save_json
+from utils.json_store import get_store
 from agents.retriever_agent import retrieve_concept_explanation
 
 DOC_MAP_PATH = "docs/keywords_to_docs.json"
@@ -12,10 +12,12 @@ os.makedirs(os.path.dirname(METADATA_PATH), exist_ok=True)
 
 
 def suggest_docs():
-    doc_map = load_json(DOC_MAP_PATH)
-    all_meta = load_json(METADATA_PATH)
+    doc_map = get_store(DOC_MAP_PATH).read()
+    metadata = get_store(METADATA_PATH)
 
-    for file_path, meta in all_meta.items():
+    # Lookups may hit the network, so collect them from a snapshot without holding the store
+    suggestions = {}
+    for file_path, meta in dict(metadata.read()).items():
         summary = meta.get("summary", "")
         found_docs = []
 
@@ -24,23 +26,28 @@ def suggest_docs():
             if keyword in seen: continue
             seen.add(keyword)
 
-        if keyword in doc_map:
-            found_docs.append({
-                "keyword": keyword,
-                "source": "official",
-                "url": doc_map[keyword]
-            })
-        else:
-            explanation = retrieve_concept_explanation(keyword)
-            if explanation:
+            if keyword in doc_map:
                 found_docs.append({
-                    "keyword":keyword,
-                    "source":"knowledge_base",
-                    "explanation": explanation
+                    "keyword": keyword,
+                    "source": "official",
+                    "url": doc_map[keyword]
                 })
-
-    meta[SUGGESTED_FIELD] = found_docs
-    all_meta[file_path] = meta
-
-save_json(METADATA_PATH, all_meta)
-print("[Junior] Smart documentation suggestion complete.")
+            else:
+                explanation = retrieve_concept_explanation(keyword)
+                if explanation:
+                    found_docs.append({
+                        "keyword":keyword,
+                        "source":"knowledge_base",
+                        "explanation": explanation
+                    })
+
+        suggestions[file_path] = found_docs
+
+    with metadata.transaction() as all_meta:
+        for file_path, found_docs in suggestions.items():
+            # Skip files removed while the lookups ran
+            if file_path in all_meta:
+                all_meta[file_path][SUGGESTED_FIELD] = found_docs
+
+    print("[Junior] Smart documentation suggestion complete.")
+    return suggestions
@@ -1,15 +1,28 @@
 import ast
+import bisect
 import os
 import subprocess
 import json
 import re
-from typing import Dict, List, Any, Tuple
-from utils.helpers import load_json, save_json
+from contextlib import contextmanager
+from functools import partial
+from typing import Callable, Dict, List, Any, Optional, Tuple
+from utils.json_store import get_store
 from inference.groq_client import query_llama
+from core.language_hub import language_hub
+from core.semantic_cache import semantic_cache
+from core.rule_fixes import suggest_fix
+from core.code_index import code_index
+from core.incremental import diff_lines, enclosing_regions, reusable_suggestions, finding_key
+from utils.metrics import stage_seconds, record_lookup
+from utils.tracing import span, traced
 
 ERROR_CACHE_PATH = "core/knowledge_base/error_solutions.json"
 METADATA_PATH = "core/code_metadata.json"
 
+# Suggestions are written once per new finding; coalesce bursts from a rescan
+solutions_store = get_store(ERROR_CACHE_PATH, flush_interval=1.0)
+
 class PythonErrorDetector:
     @staticmethod
     def detect_syntax_errors(code: str, file_path: str) -> List[Dict[str, Any]]:
@@ -60,15 +73,20 @@ class PythonErrorDetector:
         # Check for unused imports
         try:
             tree = ast.parse(code)
-            imports = {node.names[0].name for node in ast.walk(tree) if isinstance(node, ast.Import)}
+            imports = {
+                node.names[0].name: node.lineno
+                for node in ast.walk(tree) if isinstance(node, ast.Import)
+            }
             names_used = {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}
             
-            for imp in imports:
+            for imp, line in imports.items():
                 # Simple check - doesn't handle from ... import ...
                 if imp not in names_used:
                     errors.append({
                         "type": "logical",
+                        "line": line,
                         "message": f"Unused import: {imp}",
+                        "code": "unused-import",
                         "severity": "warning"
                     })
         except Exception as e:
@@ -76,20 +94,23 @@ class PythonErrorDetector:
             
         # Check for common anti-patterns
         patterns = [
-            (r"except\s*:", "Bare except clause", "warning"),
-            (r"except\s+Exception\s*:", "Too broad exception clause", "info"),
-            (r"print\s*\(", "Print statement in production code", "info"),
-            (r"\.sort\(\)\s*\.sort\(", "Double sorting", "warning"),
-            (r"for\s+\w+\s+in\s+range\(len\((\w+)\)\):", "Using range(len()) instead of enumerate", "info"),
+            (r"except\s*:", "Bare except clause", "warning", "bare-except"),
+            (r"except\s+Exception\s*:", "Too broad exception clause", "info", "broad-except"),
+            (r"print\s*\(", "Print statement in production code", "info", "print-statement"),
+            (r"\.sort\(\)\s*\.sort\(", "Double sorting", "warning", "double-sort"),
+            (r"for\s+\w+\s+in\s+range\(len\((\w+)\)\):", "Using range(len()) instead of enumerate", "info", "consider-using-enumerate"),
         ]
         
-        for pattern, message, severity in patterns:
+        # Offsets of every newline, so a match's line number is a binary search
+        newlines = [m.start() for m in re.finditer("\n", code)]
+        for pattern, message, severity, rule in patterns:
             matches = re.finditer(pattern, code)
             for match in matches:
                 errors.append({
                     "type": "pattern",
-                    "line": code[:match.start()].count('\n') + 1,
+                    "line": bisect.bisect_left(newlines, match.start()) + 1,
                     "message": message,
+                    "code": rule,
                     "severity": severity
                 })
                 
@@ -133,24 +154,41 @@ class JavaScriptErrorDetector:
             print(f"[Junior] Error running ESLint: {e}")
         return errors
 
+DETECTORS = {
+    "python": PythonErrorDetector,
+    "javascript": JavaScriptErrorDetector,
+    # Add more language detectors as implemented
+}
+
 # Factory to get the appropriate detector
 def get_detector(language: str):
-    detectors = {
-        "python": PythonErrorDetector,
-        "javascript": JavaScriptErrorDetector,
-        # Add more language detectors as implemented
-    }
-    return detectors.get(language)
+    return DETECTORS.get(language)
+
+def get_ai_suggestion(
+    error: Dict[str, Any], code_context: str, related: Optional[Callable[[], str]] = None
+) -> str:
+    """Get AI-powered suggestions for fixing an error.
 
-def get_ai_suggestion(error: Dict[str, Any], code_context: str) -> str:
-    """Get AI-powered suggestions for fixing an error"""
+    ``related`` is only called once both caches miss, since retrieval costs an
+    embedding and a vector search.
+    """
     # Check if we have a cached solution
-    solutions = load_json(ERROR_CACHE_PATH)
+    solutions = solutions_store.read()
     error_key = f"{error['type']}:{error.get('code', '')}:{error['message']}"
     
+    record_lookup("error_solutions", error_key in solutions)
     if error_key in solutions:
         return solutions[error_key]
+
+    # Reuse the fix for a near-duplicate finding (e.g. another unused import)
+    similar = semantic_cache.lookup(error, code_context)
+    record_lookup("semantic_cache", similar is not None)
+    if similar:
+        return similar
     
+    related_code = related() if related else ""
+    related_section = f"Related definitions from the codebase:\n```\n{related_code}\n```" if related_code else ""
+
     # Generate suggestion using LLaMA
     prompt = f"""
     I have the following code error:
@@ -162,6 +200,7 @@ def get_ai_suggestion(error: Dict[str, Any], code_context: str) -> str:
     ```python
     {code_context}
     ```
+    {related_section}
     
     Please provide:
     1. A brief explanation of what's wrong
@@ -169,12 +208,13 @@ def get_ai_suggestion(error: Dict[str, Any], code_context: str) -> str:
     3. An example of the fixed code
     """
     
-    suggestion = query_llama(prompt)
+    suggestion = query_llama(prompt, site="error_suggestion")
     
     # Cache the solution
     if suggestion:
-        solutions[error_key] = suggestion
-        save_json(ERROR_CACHE_PATH, solutions)
+        with solutions_store.transaction() as solutions:
+            solutions[error_key] = suggestion
+        semantic_cache.add(error, code_context, suggestion)
     
     return suggestion
 
@@ -192,20 +232,31 @@ def get_code_context(code: str, line_number: int, context_lines: int = 3) -> str
     
     return '\n'.join(lines[start:end])
 
-def analyze_file_for_errors(file_path: str) -> Dict[str, Any]:
-    """Main function to analyze a file for errors and generate suggestions"""
+@contextmanager
+def _stage(name: str):
+    """Time a pipeline stage in the metrics, and as a span when tracing"""
+    with stage_seconds.time(stage=name), span(name):
+        yield
+
+@traced("analyze_file_for_errors")
+def analyze_file_for_errors(
+    file_path: str,
+    previous: Optional[Dict[str, Any]] = None,
+    code: Optional[str] = None
+) -> Dict[str, Any]:
+    """Main function to analyze a file for errors and generate suggestions.
+
+    ``previous`` is the last snapshot of this file ({"code", "suggestions"});
+    suggestions for findings outside the edited functions are carried over to
+    their new line numbers instead of being generated again.
+    """
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            code = f.read()
+        if code is None:
+            with open(file_path, "r", encoding="utf-8") as f:
+                code = f.read()
             
         # Determine language
-        _, ext = os.path.splitext(file_path)
-        language = {
-            ".py": "python",
-            ".js": "javascript",
-            ".ts": "typescript",
-            # Add more mappings as needed
-        }.get(ext, "unknown")
+        language = language_hub.get_language_for_path(file_path)
         
         if language == "unknown":
             return {"errors": [], "suggestions": []}
@@ -219,44 +270,63 @@ def analyze_file_for_errors(file_path: str) -> Dict[str, Any]:
         
         # Collect errors from different detection methods
         if language == "python":
-            errors.extend(detector_class.detect_syntax_errors(code, file_path))
-            errors.extend(detector_class.check_common_mistakes(code))
+            with _stage("parse"):
+                errors.extend(detector_class.detect_syntax_errors(code, file_path))
+            with _stage("patterns"):
+                errors.extend(detector_class.check_common_mistakes(code))
             # Only run pylint if it's installed
             try:
                 import pylint
-                errors.extend(detector_class.run_pylint(file_path))
+                with _stage("pylint"):
+                    errors.extend(detector_class.run_pylint(file_path))
             except ImportError:
                 pass
         elif language == "javascript":
-            errors.extend(detector_class.detect_errors(code, file_path))
+            with _stage("eslint"):
+                errors.extend(detector_class.detect_errors(code, file_path))
             
-        # Generate suggestions for each error
+        # Work out which scopes the edit touched since the last analysis
+        reusable, regions = {}, None
+        if previous and previous.get("code") is not None:
+            mapping, hunks = diff_lines(previous["code"], code)
+            regions = enclosing_regions(code, hunks, language)
+            reusable = reusable_suggestions(previous.get("suggestions", []), mapping, regions)
+
+        # Generate suggestions for each error, answering known rules locally
         suggestions = []
         for error in errors:
+            carried = reusable.get(finding_key(error))
+            if carried:
+                suggestions.append(dict(carried, error=error, reused=True))
+                continue
+
+            local = suggest_fix(error, code)
+            if local:
+                suggestions.append({"error": error, **local})
+                continue
+
             if error.get("line"):
                 context = get_code_context(code, error["line"])
             else:
                 context = code[:500]  # Use first 500 chars if no line number
                 
-            suggestion = get_ai_suggestion(error, context)
+            related = partial(code_index.related_context, context, file_path, error.get("line"))
+            suggestion = get_ai_suggestion(error, context, related)
             if suggestion:
                 suggestions.append({
                     "error": error,
-                    "suggestion": suggestion
+                    "suggestion": suggestion,
+                    "source": "llm"
                 })
                 
         return {
             "file": file_path,
             "language": language,
             "errors": errors,
-            "suggestions": suggestions
+            "suggestions": suggestions,
+            "changed_regions": regions
         }
                 
     except Exception as e:
         print(f"[Junior] Error analyzing file: {e}")
-        return {"errors": [], "suggestions": []}
-
-# Initialize error cache if it doesn't exist
-if not os.path.exists(ERROR_CACHE_PATH):
-    os.makedirs(os.path.dirname(ERROR_CACHE_PATH), exist_ok=True)
-    save_json(ERROR_CACHE_PATH, {})
\ No newline at end of file
+        return {"errors": [], "suggestions": []}
\ No newline at end of file
@@ -0,0 +1,96 @@
+import json
+import time
+import asyncio
+import itertools
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+HISTORY_SIZE = 1000
+SUBSCRIBER_QUEUE_SIZE = 256
+
+
+class Subscription:
+    """One listener's bounded event queue, living on the listener's event loop"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, path_prefix: Optional[str], max_queue: int):
+        self.loop = loop
+        self.path_prefix = path_prefix
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.overflowed = False
+
+    def wants(self, event: Dict[str, Any]) -> bool:
+        path = event.get("path")
+        return not self.path_prefix or path is None or path.startswith(self.path_prefix)
+
+    def offer(self, event: Dict[str, Any]) -> None:
+        """Queue an event, dropping the oldest one if the listener fell behind"""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.overflowed = True
+        self.queue.put_nowait(event)
+
+    async def get(self) -> Dict[str, Any]:
+        event = await self.queue.get()
+        if self.overflowed:
+            # Tell the client it missed deltas and should refetch /errors
+            self.overflowed = False
+            event = dict(event, resync=True)
+        return event
+
+
+class EventBus:
+    """Fan-out of watcher progress and results to API listeners.
+
+    ``publish`` may be called from any thread; events are handed to each
+    subscriber's event loop with ``call_soon_threadsafe``. Recent events are
+    kept in a ring so a reconnecting client can resume from its last event ID.
+    """
+
+    def __init__(self, history_size: int = HISTORY_SIZE, max_queue: int = SUBSCRIBER_QUEUE_SIZE):
+        self.max_queue = max_queue
+        self._history: deque = deque(maxlen=history_size)
+        self._subscribers: List[Subscription] = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def publish(self, event_type: str, data: Dict[str, Any], path: Optional[str] = None) -> None:
+        with self._lock:
+            event = {"id": next(self._ids), "type": event_type, "time": time.time(), "path": path, "data": data}
+            self._history.append(event)
+            subscribers = [s for s in self._subscribers if s.wants(event)]
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                self.unsubscribe(subscription)  # The listener's loop is closed
+
+    def subscribe(self, path_prefix: Optional[str] = None, after: Optional[int] = None) -> Subscription:
+        """Listen from the running event loop, replaying buffered events newer than ``after``"""
+        subscription = Subscription(asyncio.get_running_loop(), path_prefix, self.max_queue)
+        with self._lock:
+            if after is not None:
+                for event in self._history:
+                    if event["id"] > after and subscription.wants(event):
+                        subscription.offer(event)
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """Render an event in text/event-stream framing"""
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+# Initialize the event bus
+event_bus = EventBus()
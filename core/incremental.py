@@ -0,0 +1,192 @@
+import ast
+import re
+import difflib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+SNAPSHOT_LIMIT = 500
+# Above this share of changed lines a full re-analysis is cheaper than stitching
+FULL_REANALYSIS_RATIO = 0.5
+CONTEXT_LINES = 5
+_LINE_REF = re.compile(r"\b(lines?\s+)(\d+)", re.IGNORECASE)
+
+Region = Tuple[int, int]
+
+
+class SnapshotCache:
+    """Last analysed content and results per file, bounded LRU"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._snapshots: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, file_path: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            snapshot = self._snapshots.get(file_path)
+            if snapshot is not None:
+                self._snapshots.move_to_end(file_path)
+            return snapshot
+
+    def put(self, file_path: str, snapshot: Dict[str, Any]) -> None:
+        with self._lock:
+            self._snapshots[file_path] = snapshot
+            self._snapshots.move_to_end(file_path)
+            while len(self._snapshots) > self.capacity:
+                self._snapshots.popitem(last=False)
+
+    def discard(self, file_path: str) -> None:
+        with self._lock:
+            self._snapshots.pop(file_path, None)
+
+
+def diff_lines(old_code: str, new_code: str) -> Tuple[Dict[int, int], List[Region]]:
+    """Map unchanged old line numbers to new ones and list changed new-line ranges"""
+    old_lines, new_lines = old_code.split("\n"), new_code.split("\n")
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    mapping, hunks = {}, []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            for offset in range(i2 - i1):
+                mapping[i1 + offset + 1] = j1 + offset + 1
+        else:
+            # Pure deletions still mark the line where the removal happened
+            hunks.append((j1 + 1, max(j2, j1 + 1)))
+    return mapping, hunks
+
+
+def enclosing_regions(code: str, hunks: List[Region], language: str) -> List[Region]:
+    """Widen each hunk to the innermost function or class around it"""
+    scopes: List[Region] = []
+    if language == "python":
+        try:
+            tree = ast.parse(code)
+            # Decorators can span lines or be separated by comments, so start at the first one
+            scopes = [
+                (min([d.lineno for d in node.decorator_list] + [node.lineno]), node.end_lineno)
+                for node in ast.walk(tree)
+                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+            ]
+        except SyntaxError:
+            scopes = []
+
+    regions = []
+    for start, end in hunks:
+        around = [s for s in scopes if s[0] <= start and end <= s[1]]
+        if around:
+            regions.append(min(around, key=lambda s: s[1] - s[0]))
+        elif language == "python":
+            regions.append((start, end))  # Module-level statement
+        else:
+            regions.append((max(1, start - CONTEXT_LINES), end + CONTEXT_LINES))
+    return merge_regions(regions)
+
+
+def merge_regions(regions: List[Region]) -> List[Region]:
+    merged: List[Region] = []
+    for start, end in sorted(regions):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def in_regions(line: Optional[int], regions: List[Region]) -> bool:
+    return bool(line) and any(start <= line <= end for start, end in regions)
+
+
+def changed_ratio(code: str, regions: List[Region]) -> float:
+    total = max(1, code.count("\n") + 1)
+    return sum(end - start + 1 for start, end in regions) / total
+
+
+def finding_key(error: Dict[str, Any]) -> Tuple[Any, ...]:
+    return (error.get("line"), error.get("type"), error.get("code", ""), error.get("message"))
+
+
+def reusable_suggestions(
+    previous_suggestions: List[Dict[str, Any]],
+    mapping: Dict[int, int],
+    regions: List[Region]
+) -> Dict[Tuple[Any, ...], Dict[str, Any]]:
+    """Previous suggestions outside the changed regions, moved to their new lines"""
+    reusable = {}
+    for entry in previous_suggestions:
+        error = entry["error"]
+        old_line = error.get("line")
+        new_line = mapping.get(old_line) if old_line else None
+        if old_line and (new_line is None or in_regions(new_line, regions)):
+            continue  # The line changed or moved into an edited scope
+        moved = dict(error, line=new_line) if new_line else dict(error)
+        reusable[finding_key(moved)] = dict(entry, error=moved)
+    return reusable
+
+
+def entry_line(entry: Any) -> Optional[int]:
+    """Line an analysis finding refers to: a line field, or "line N" in its text"""
+    if isinstance(entry, dict):
+        line = entry.get("line", entry.get("start_line"))
+        return line if isinstance(line, int) else None
+    if isinstance(entry, str):
+        match = _LINE_REF.search(entry)
+        return int(match.group(2)) if match else None
+    return None
+
+
+def _move_entry(entry: Any, line: int) -> Any:
+    if isinstance(entry, dict):
+        key = "line" if "line" in entry else "start_line"
+        return dict(entry, **{key: line})
+    return _LINE_REF.sub(lambda m: f"{m.group(1)}{line}", entry, count=1)
+
+
+def merge_region_analysis(
+    previous: Dict[str, Any],
+    region_results: List[Dict[str, Any]],
+    mapping: Dict[int, int],
+    regions: List[Region]
+) -> Dict[str, Any]:
+    """Fold fresh analyses of edited regions into a file's stored AI analysis.
+
+    Earlier region analyses and line-referenced findings are moved to their new
+    lines, or dropped when their lines changed or now overlap an edited region;
+    findings without a line are kept as they are.
+    """
+    merged: Dict[str, Any] = {}
+    for key, value in previous.items():
+        if key == "changed_regions":
+            continue
+        if not isinstance(value, list):
+            merged[key] = value
+            continue
+        kept = []
+        for entry in value:
+            old_line = entry_line(entry)
+            if old_line is None:
+                kept.append(entry)
+                continue
+            new_line = mapping.get(old_line)
+            if new_line is None or in_regions(new_line, regions):
+                continue
+            kept.append(_move_entry(entry, new_line) if new_line != old_line else entry)
+        merged[key] = kept
+
+    carried = []
+    for region in previous.get("changed_regions") or []:
+        start, end = mapping.get(region["start_line"]), mapping.get(region["end_line"])
+        if start is None or end is None or any(s <= end and start <= e for s, e in regions):
+            continue
+        carried.append(dict(region, start_line=start, end_line=end))
+    merged["changed_regions"] = sorted(carried + region_results, key=lambda r: r["start_line"])
+    return merged
+
+
+def region_text(code: str, region: Region) -> str:
+    lines = code.split("\n")
+    return "\n".join(lines[region[0] - 1:region[1]])
+
+
+# Initialize the snapshot cache
+snapshot_cache = SnapshotCache(SNAPSHOT_LIMIT)
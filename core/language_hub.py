@@ -1,11 +1,48 @@
 import os
 from typing import Dict, Any, List
 import importlib
-from utils.helpers import load_json, save_json
+from utils.json_store import get_store
 
-# Path to store language-specific handlers and plugins
-LANGUAGE_HUB_PATH = "core/language_hub"
-LANGUAGE_CONFIG_PATH = "core/language_hub/config.json"
+# Path to store language-specific handlers and plugins. This must not be
+# core/language_hub, which would shadow this module once the directory exists.
+LANGUAGE_HUB_PATH = "core/language_handlers"
+LANGUAGE_HANDLER_PACKAGE = "core.language_handlers"
+LANGUAGE_CONFIG_PATH = "core/language_handlers/config.json"
+
+DEFAULT_CONFIG = {
+    "registered_languages": {
+        "python": {
+            "extensions": [".py"],
+            "module": "python_handler",
+            "enabled": True
+        },
+        "javascript": {
+            "extensions": [".js"],
+            "module": "javascript_handler",
+            "enabled": True
+        },
+        "typescript": {
+            "extensions": [".ts"],
+            "module": "typescript_handler",
+            "enabled": True
+        },
+        "java": {
+            "extensions": [".java"],
+            "module": "java_handler",
+            "enabled": False
+        },
+        "cpp": {
+            "extensions": [".cpp"],
+            "module": "cpp_handler",
+            "enabled": False
+        }
+    },
+    "default_handlers": {
+        "error_detection": True,
+        "code_completion": False,
+        "refactoring": False
+    }
+}
 
 class LanguageHub:
     """Central hub for managing language-specific processing modules"""
@@ -14,7 +51,8 @@ class LanguageHub:
         self._ensure_dirs()
         self.config = self._load_config()
         self.language_modules = {}
-        self._load_registered_modules()
+        self._missing_modules = set()
+        self.extension_index = self._build_extension_index()
         
     def _ensure_dirs(self):
         """Ensure necessary directories exist"""
@@ -28,71 +66,61 @@ class LanguageHub:
     
     def _load_config(self) -> Dict[str, Any]:
         """Load language hub configuration"""
+        store = get_store(LANGUAGE_CONFIG_PATH)
         if os.path.exists(LANGUAGE_CONFIG_PATH):
-            return load_json(LANGUAGE_CONFIG_PATH)
+            return store.read()
         else:
             # Initialize with default configuration
-            default_config = {
-                "registered_languages": {
-                    "python": {
-                        "extensions": [".py"],
-                        "module": "python_handler",
-                        "enabled": True
-                    },
-                    "javascript": {
-                        "extensions": [".js"],
-                        "module": "javascript_handler",
-                        "enabled": True
-                    },
-                    "typescript": {
-                        "extensions": [".ts"],
-                        "module": "typescript_handler",
-                        "enabled": True
-                    }
-                },
-                "default_handlers": {
-                    "error_detection": True,
-                    "code_completion": False,
-                    "refactoring": False
-                }
-            }
-            save_json(LANGUAGE_CONFIG_PATH, default_config)
-            return default_config
+            with store.transaction() as config:
+                config.update(DEFAULT_CONFIG)
+            return store.read()
     
-    def _load_registered_modules(self):
-        """Load all registered language modules"""
-        for lang, config in self.config["registered_languages"].items():
-            if config["enabled"]:
-                try:
-                    # Try to dynamically import the module
-                    module_path = f"core.language_hub.{config['module']}"
-                    module = importlib.import_module(module_path)
-                    self.language_modules[lang] = module
-                    print(f"[Junior] Loaded language module for {lang}")
-                except ImportError:
-                    print(f"[Junior] Language module for {lang} not found, will be created on demand")
+    def _build_extension_index(self) -> Dict[str, str]:
+        """Precompute the extension -> language map used for every lookup"""
+        index = {}
+        # Built-in languages still resolve when an older config file omits them
+        languages = {**DEFAULT_CONFIG["registered_languages"], **self.config["registered_languages"]}
+        for lang, config in languages.items():
+            # Disabled languages stay unknown so nothing queues analysis for them
+            if config.get("enabled") is False:
+                continue
+            for ext in config["extensions"]:
+                index.setdefault(ext.lower(), lang)
+        return index
     
     def get_handler_for_language(self, language: str):
-        """Get the appropriate handler for a language"""
+        """Get the handler for a language, importing it on first use"""
         if language in self.language_modules:
             return self.language_modules[language]
         
-        # If module doesn't exist but is registered, create a skeleton
-        if language in self.config["registered_languages"]:
-            self._create_skeleton_module(language)
-            return self.language_modules.get(language)
-            
-        return None
+        config = self.config["registered_languages"].get(language)
+        if not config or not config["enabled"] or language in self._missing_modules:
+            return None
+        
+        try:
+            module = importlib.import_module(f"{LANGUAGE_HANDLER_PACKAGE}.{config['module']}")
+        except ImportError:
+            # Remember the miss; skeletons are only created via create_skeleton_module
+            self._missing_modules.add(language)
+            return None
+        self.language_modules[language] = module
+        print(f"[Junior] Loaded language module for {language}")
+        return module
     
     def get_language_by_extension(self, file_extension: str) -> str:
         """Determine language from file extension"""
-        for lang, config in self.config["registered_languages"].items():
-            if file_extension in config["extensions"]:
-                return lang
-        return "unknown"
+        return self.extension_index.get(file_extension.lower(), "unknown")
+    
+    def get_language_for_path(self, file_path: str) -> str:
+        """Determine language from a file path"""
+        return self.get_language_by_extension(os.path.splitext(file_path)[1])
     
-    def _create_skeleton_module(self, language: str):
-        """Create a skeleton module for a language if it doesn't exist"""
+    def create_skeleton_module(self, language: str):
+        """Create a skeleton handler module for a language if it doesn't exist.
+
+        This writes into the package, so call it from setup tooling rather
+        than while serving requests.
+        """
         config = self.config["registered_languages"][language]
         module_name = config["module"]
         file_path = os.path.join(LANGUAGE_HUB_PATH, f"{module_name}.py")
@@ -130,19 +158,11 @@ class {language.capitalize()}Handler:
 # Export the handler
 handler = {language.capitalize()}Handler()
 """)
-            
-            # Make sure we have an updated __init__.py that imports this module
-            init_path = os.path.join(LANGUAGE_HUB_PATH, "__init__.py")
-            with open(init_path, "a") as f:
-                f.write(f"from .{module_name} import handler as {language}_handler\n")
-            
-            # Try to import the newly created module
-            try:
-                module_path = f"core.language_hub.{module_name}"
-                self.language_modules[language] = importlib.import_module(module_path)
-                print(f"[Junior] Created and loaded skeleton module for {language}")
-            except ImportError as e:
-                print(f"[Junior] Failed to load newly created module: {e}")
+            print(f"[Junior] Created skeleton module for {language}")
+        
+        self._missing_modules.discard(language)
+        importlib.invalidate_caches()
+        return self.get_handler_for_language(language)
 
 # Initialize the language hub
 language_hub = LanguageHub()
\ No newline at end of file
@@ -1,100 +1,280 @@
-from typing import Dict, Any, List
+import json
+import hashlib
+import threading
+from concurrent.futures import Future
+from datetime import timedelta
+from typing import Dict, Any, List, Callable, Optional
 from inference.groq_client import query_llama
+from core.cache_manager import cache_manager
+from utils.tracing import traced
+
+# Solutions do not go stale the way file analyses do
+RESULT_TTL = timedelta(days=30)
+
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+
+
+def normalize_text(text: str) -> str:
+    """Problem statements that differ only in spacing share a cache entry.
+
+    Case is kept: identifiers and literals (``N`` vs ``n``, ``'YES'`` vs
+    ``'yes'``) can change what the right answer is.
+    """
+    return " ".join((text or "").split())
+
+
+def normalize_code(code: str) -> str:
+    """Code stays case-sensitive; only trailing whitespace and blank edges are ignored"""
+    return "\n".join(line.rstrip() for line in (code or "").strip().splitlines())
+
+
+def result_key(kind: str, *parts: str) -> str:
+    digest = hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+    return f"problem_{kind}_{digest}"
+
+
+def cached_result(key: str, compute: Callable[[], Dict[str, Any]], valid: Callable[[Dict[str, Any]], bool]) -> Dict[str, Any]:
+    """Serve a persisted result, or compute it once even when identical requests race.
+
+    Concurrent callers with the same key wait for the first one's LLM call
+    instead of making their own; only results ``valid`` accepts are persisted.
+    """
+    cached = cache_manager.get(key, "long_term")
+    if cached is not None:
+        return {**cached, "cached": True}
+
+    with _inflight_lock:
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = _inflight[key] = Future()
+    if not owner:
+        return future.result()
+
+    try:
+        result = compute()
+        if valid(result):
+            cache_manager.set(key, result, "long_term", RESULT_TTL)
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+def _parse_sections(text: Optional[str]) -> Optional[Dict[str, Any]]:
+    """The JSON object in a combined reply, if it has both sections"""
+    if not text:
+        return None
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        data = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data.get("analysis"), dict) or not isinstance(data.get("solution"), dict):
+        return None
+    return data if data["solution"].get("code") else None
+
+
+def _render(sections: Dict[str, Any]) -> str:
+    """Plain-text form of a section, for clients that display the old string fields"""
+    lines = []
+    for name, value in sections.items():
+        title = name.replace("_", " ").capitalize()
+        if isinstance(value, list):
+            lines.append(f"{title}:")
+            lines.extend(f"- {item}" for item in value)
+        elif isinstance(value, dict):
+            lines.append(f"{title}: " + ", ".join(f"{k}: {v}" for k, v in value.items()))
+        else:
+            lines.append(f"{title}:\n{value}" if name == "code" else f"{title}: {value}")
+    return "\n".join(lines)
+
 
 class ProblemSolver:
     """Advanced problem-solving system that can generate solutions for complex programming problems"""
     
     @staticmethod
+    @traced()
     def analyze_problem(problem_description: str) -> Dict[str, Any]:
         """Analyze a problem description to identify key components"""
-        prompt = f"""
-        Analyze the following programming problem description and break it down into components:
-        
-        {problem_description}
-        
-        Please identify:
-        1. The main problem type (e.g., sorting, search, optimization)
-        2. Input constraints and data structures needed
-        3. Key algorithms or techniques that might be applicable
-        4. Potential edge cases to consider
-        5. Time and space complexity requirements if specified
-        
-        Format your response as a structured analysis.
-        """
-        
-        analysis = query_llama(prompt)
-        return {
-            "description": problem_description,
-            "analysis": analysis
-        }
+        def compute():
+            prompt = f"""
+            Analyze the following programming problem description and break it down into components:
+            
+            {problem_description}
+            
+            Please identify:
+            1. The main problem type (e.g., sorting, search, optimization)
+            2. Input constraints and data structures needed
+            3. Key algorithms or techniques that might be applicable
+            4. Potential edge cases to consider
+            5. Time and space complexity requirements if specified
+            
+            Format your response as a structured analysis.
+            """
+            
+            analysis = query_llama(prompt, site="problem_analysis")
+            return {
+                "description": problem_description,
+                "analysis": analysis
+            }
+
+        key = result_key("analysis", normalize_text(problem_description))
+        return cached_result(key, compute, lambda result: bool(result["analysis"]))
     
     @staticmethod
+    @traced()
     def generate_solution(problem_analysis: Dict[str, Any], language: str = "python") -> Dict[str, Any]:
         """Generate a solution for the analyzed problem"""
-        prompt = f"""
-        Based on the following problem analysis, generate a {language} solution:
-        
-        PROBLEM DESCRIPTION:
-        {problem_analysis['description']}
-        
-        ANALYSIS:
-        {problem_analysis['analysis']}
-        
-        Please provide:
-        1. A step-by-step approach to solving this problem
-        2. Complete {language} code implementation
-        3. Explanation of your solution's time and space complexity
-        4. Any alternative approaches that could be considered
+        def compute():
+            prompt = f"""
+            Based on the following problem analysis, generate a {language} solution:
+            
+            PROBLEM DESCRIPTION:
+            {problem_analysis['description']}
+            
+            ANALYSIS:
+            {problem_analysis['analysis']}
+            
+            Please provide:
+            1. A step-by-step approach to solving this problem
+            2. Complete {language} code implementation
+            3. Explanation of your solution's time and space complexity
+            4. Any alternative approaches that could be considered
+            """
+            
+            solution = query_llama(prompt, site="solution")
+            return {
+                "language": language,
+                "solution": solution
+            }
+
+        key = result_key(
+            "solution", normalize_text(problem_analysis["description"]),
+            problem_analysis["analysis"] or "", language.lower()
+        )
+        return cached_result(key, compute, lambda result: bool(result["solution"]))
+
+    @staticmethod
+    @traced()
+    def solve(problem_description: str, language: str = "python") -> Dict[str, Any]:
+        """Analysis and solution from a single LLM call, as structured sections.
+
+        Returns the same ``analysis``/``solution`` fields as the two-step path,
+        plus ``sections`` holding the parsed structure. If a reply arrives but is
+        not the requested JSON, falls back to ``analyze_problem`` +
+        ``generate_solution``; a failed call returns empty fields and is not cached.
         """
-        
-        solution = query_llama(prompt)
-        return {
-            "language": language,
-            "solution": solution
-        }
+        def compute():
+            prompt = f"""
+            Solve the following programming problem in {language}:
+            
+            {problem_description}
+            
+            Respond with only a JSON object of this shape:
+            {{
+              "analysis": {{
+                "problem_type": "e.g. sorting, search, optimization",
+                "constraints": ["input constraints and data structures needed"],
+                "techniques": ["applicable algorithms or techniques"],
+                "edge_cases": ["edge cases to consider"],
+                "complexity_requirements": "time and space requirements, if specified"
+              }},
+              "solution": {{
+                "approach": ["step-by-step approach"],
+                "code": "complete {language} implementation",
+                "complexity": {{"time": "...", "space": "..."}},
+                "alternatives": ["alternative approaches"]
+              }}
+            }}
+            """
+            
+            reply = query_llama(prompt, site="problem_solve")
+            if reply is None:
+                # The call itself failed (or the circuit is open); two more calls would too
+                return {
+                    "analysis": {"description": problem_description, "analysis": None},
+                    "solution": {"language": language, "solution": None},
+                    "mode": "combined"
+                }
+            sections = _parse_sections(reply)
+            if sections is None:
+                analysis = ProblemSolver.analyze_problem(problem_description)
+                return {
+                    "analysis": analysis,
+                    "solution": ProblemSolver.generate_solution(analysis, language),
+                    "mode": "two_step"
+                }
+            return {
+                "analysis": {"description": problem_description, "analysis": _render(sections["analysis"])},
+                "solution": {"language": language, "solution": _render(sections["solution"])},
+                "sections": sections,
+                "mode": "combined"
+            }
+
+        key = result_key("solve", normalize_text(problem_description), language.lower())
+        return cached_result(key, compute, lambda result: bool(result["solution"]["solution"]))
     
     @staticmethod
+    @traced()
     def translate_math_to_code(math_expression: str, language: str = "python") -> Dict[str, Any]:
         """Translate mathematical expressions or equations into code"""
-        prompt = f"""
-        Translate the following mathematical expression into {language} code:
-        
-        {math_expression}
-        
-        Please provide:
-        1. The complete code implementation
-        2. Explanation of how the implementation works
-        3. Any necessary imports or libraries
-        4. Example usage of the implementation
-        """
-        
-        translated_code = query_llama(prompt)
-        return {
-            "original_math": math_expression,
-            "language": language,
-            "code": translated_code
-        }
+        def compute():
+            prompt = f"""
+            Translate the following mathematical expression into {language} code:
+            
+            {math_expression}
+            
+            Please provide:
+            1. The complete code implementation
+            2. Explanation of how the implementation works
+            3. Any necessary imports or libraries
+            4. Example usage of the implementation
+            """
+            
+            translated_code = query_llama(prompt, site="math_translation")
+            return {
+                "original_math": math_expression,
+                "language": language,
+                "code": translated_code
+            }
+
+        # Whitespace is insignificant in maths but case is not (x vs X)
+        key = result_key("math", " ".join(math_expression.split()), language.lower())
+        return cached_result(key, compute, lambda result: bool(result["code"]))
     
     @staticmethod
+    @traced()
     def optimize_solution(code: str, language: str, optimization_goal: str = "time") -> Dict[str, Any]:
         """Optimize an existing solution based on specified goals"""
-        prompt = f"""
-        Optimize the following {language} code for {optimization_goal}:
-        
-        ```{language}
-        {code}
-        ```
-        
-        Please provide:
-        1. The optimized code
-        2. Explanation of the optimizations made
-        3. Before and after complexity analysis
-        4. Any tradeoffs involved in your optimization
-        """
-        
-        optimized_solution = query_llama(prompt)
-        return {
-            "original_code": code,
-            "optimization_goal": optimization_goal,
-            "optimized_solution": optimized_solution
-        }
\ No newline at end of file
+        def compute():
+            prompt = f"""
+            Optimize the following {language} code for {optimization_goal}:
+            
+            ```{language}
+            {code}
+            ```
+            
+            Please provide:
+            1. The optimized code
+            2. Explanation of the optimizations made
+            3. Before and after complexity analysis
+            4. Any tradeoffs involved in your optimization
+            """
+            
+            optimized_solution = query_llama(prompt, site="optimization")
+            return {
+                "original_code": code,
+                "optimization_goal": optimization_goal,
+                "optimized_solution": optimized_solution
+            }
+
+        key = result_key("optimize", normalize_code(code), language.lower(), normalize_text(optimization_goal))
+        return cached_result(key, compute, lambda result: bool(result["optimized_solution"]))
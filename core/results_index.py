@@ -0,0 +1,268 @@
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+from utils.json_store import get_store
+from core.incremental import finding_key, entry_line
+from utils.workers import after_fork, connect_sqlite
+
+RESULTS_DB_PATH = Path("core/cache/results.db")
+# Legacy flat results file, imported once into an empty index
+ERROR_ANALYSIS_PATH = "core/error_analysis.json"
+MAX_PAGE_SIZE = 500
+# AI analysis keys that hold findings -> (issue type, severity when the finding has none)
+AI_CATEGORIES = {
+    "bugs": ("bug", "warning"),
+    "security": ("security", "warning"),
+    "security_issues": ("security", "warning"),
+    "performance": ("performance", "info"),
+    "optimizations": ("optimization", "info"),
+    "documentation": ("documentation", "info")
+}
+
+class ResultsIndex:
+    """SQLite index of per-file analysis results and their individual issues.
+
+    Each issue is a row, so filtering, paging and counting never load the full
+    result set. Issues come from both the detectors (syntax and lint errors,
+    ``source`` "detector") and the AI analysis (bugs, security, performance,
+    optimization and documentation findings, ``source`` "ai"). ``version`` is
+    bumped on every write and is used as the ETag for pollers.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = connect_sqlite(db_path)
+        self._lock = threading.Lock()
+        self._create_tables()
+        after_fork(self._reopen)
+
+    def _reopen(self):
+        # A connection must not be carried into a forked worker
+        self.conn = connect_sqlite(self.db_path)
+        self._lock = threading.Lock()
+
+    def _create_tables(self):
+        with self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    updated_at REAL,
+                    analysis TEXT
+                );
+                CREATE TABLE IF NOT EXISTS issues (
+                    path TEXT,
+                    updated_at REAL,
+                    severity TEXT,
+                    type TEXT,
+                    line INTEGER,
+                    column INTEGER,
+                    code TEXT,
+                    message TEXT,
+                    source TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_issues_path ON issues(path);
+                CREATE INDEX IF NOT EXISTS idx_issues_severity ON issues(severity, updated_at);
+                CREATE INDEX IF NOT EXISTS idx_issues_type ON issues(type, updated_at);
+                CREATE INDEX IF NOT EXISTS idx_issues_updated_at ON issues(updated_at);
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value INTEGER
+                );
+                INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+            """)
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(issues)")]
+            if "source" not in columns:
+                # Older indexes only held detector issues; re-derive every file's issues
+                self.conn.execute("ALTER TABLE issues ADD COLUMN source TEXT")
+                self.conn.execute("DELETE FROM issues")
+                for path, analysis in self.conn.execute("SELECT path, analysis FROM files").fetchall():
+                    self._insert_issues(path, json.loads(analysis))
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_issues_source ON issues(source, updated_at)")
+
+    @property
+    def version(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    def record(self, file_path: str, analysis: Dict[str, Any]) -> None:
+        """Replace the stored result and issues for one file"""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO files (path, updated_at, analysis) VALUES (?, ?, ?)",
+                (file_path, analysis.get("timestamp", 0), json.dumps(analysis, default=str))
+            )
+            self.conn.execute("DELETE FROM issues WHERE path = ?", (file_path,))
+            self._insert_issues(file_path, analysis)
+            self.conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+
+    def _insert_issues(self, file_path: str, analysis: Dict[str, Any]) -> None:
+        self.conn.executemany(
+            """
+            INSERT INTO issues (path, updated_at, severity, type, line, column, code, message, source)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            issue_rows(file_path, analysis)
+        )
+
+    def remove(self, file_path: str) -> bool:
+        """Drop a deleted file's result and issues; True if it was indexed"""
+        with self._lock, self.conn:
+            removed = self.conn.execute("DELETE FROM files WHERE path = ?", (file_path,)).rowcount
+            self.conn.execute("DELETE FROM issues WHERE path = ?", (file_path,))
+            if removed:
+                self.conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+        return bool(removed)
+
+    def get_file(self, file_path: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self.conn.execute("SELECT analysis FROM files WHERE path = ?", (file_path,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def query(
+        self,
+        severity: Optional[str] = None,
+        error_type: Optional[str] = None,
+        path_prefix: Optional[str] = None,
+        since: Optional[float] = None,
+        limit: int = 50,
+        offset: int = 0,
+        source: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Return one page of matching issues and the total match count"""
+        where, params = self._filters(severity, error_type, path_prefix, since, source)
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        with self._lock:
+            total = self.conn.execute(f"SELECT COUNT(*) FROM issues {where}", params).fetchone()[0]
+            cursor = self.conn.execute(
+                f"""
+                SELECT path, updated_at, severity, type, line, column, code, message, source
+                FROM issues {where}
+                ORDER BY updated_at DESC, path, line
+                LIMIT ? OFFSET ?
+                """,
+                params + [limit, max(0, offset)]
+            )
+            columns = [c[0] for c in cursor.description]
+            issues = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return issues, total
+
+    def summary(self, path_prefix: Optional[str] = None) -> Dict[str, Any]:
+        """Issue counts by severity, type and source, computed in SQL"""
+        where, params = self._filters(path_prefix=path_prefix)
+        with self._lock:
+            by_severity = dict(self.conn.execute(
+                f"SELECT severity, COUNT(*) FROM issues {where} GROUP BY severity", params
+            ).fetchall())
+            by_type = dict(self.conn.execute(
+                f"SELECT type, COUNT(*) FROM issues {where} GROUP BY type", params
+            ).fetchall())
+            by_source = dict(self.conn.execute(
+                f"SELECT source, COUNT(*) FROM issues {where} GROUP BY source", params
+            ).fetchall())
+            file_where, file_params = self._filters(path_prefix=path_prefix)
+            files = self.conn.execute(f"SELECT COUNT(*) FROM files {file_where}", file_params).fetchone()[0]
+        return {
+            "files": files,
+            "issues": sum(by_severity.values()),
+            "by_severity": by_severity,
+            "by_type": by_type,
+            "by_source": by_source
+        }
+
+    def backfill(self, error_data: Dict[str, Any]) -> None:
+        """Import results from the legacy error_analysis.json if the index is empty"""
+        with self._lock:
+            has_rows = self.conn.execute("SELECT 1 FROM files LIMIT 1").fetchone()
+        if has_rows or not error_data:
+            return
+        for file_path, analysis in error_data.items():
+            self.record(file_path, analysis)
+        print(f"[Junior] Imported {len(error_data)} results into the results index")
+
+    @staticmethod
+    def _filters(
+        severity: Optional[str] = None,
+        error_type: Optional[str] = None,
+        path_prefix: Optional[str] = None,
+        since: Optional[float] = None,
+        source: Optional[str] = None
+    ) -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        if severity:
+            clauses.append("severity = ?")
+            params.append(severity)
+        if error_type:
+            clauses.append("type = ?")
+            params.append(error_type)
+        if path_prefix:
+            # Range scan instead of LIKE so the path index is usable
+            clauses.append("path >= ? AND path < ?")
+            params.extend([path_prefix, path_prefix + "\U0010ffff"])
+        if since is not None:
+            clauses.append("updated_at >= ?")
+            params.append(since)
+        if source:
+            clauses.append("source = ?")
+            params.append(source)
+        return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+def issue_rows(file_path: str, analysis: Dict[str, Any]) -> List[Tuple]:
+    """One row per detector error and per AI finding in a file's result"""
+    updated_at = analysis.get("timestamp", 0)
+    rows = [
+        (
+            file_path,
+            updated_at,
+            issue.get("severity", "info"),
+            issue.get("type", ""),
+            issue.get("line"),
+            issue.get("column"),
+            issue.get("code", ""),
+            issue.get("message", ""),
+            "detector"
+        )
+        for issue in analysis.get("syntax_errors", [])
+    ]
+    ai_analysis = analysis.get("ai_analysis") or {}
+    # Replies that were not JSON keep their sections under "parsed"
+    for findings in (ai_analysis, ai_analysis.get("parsed") or {}):
+        for key, (issue_type, default_severity) in AI_CATEGORIES.items():
+            entries = findings.get(key)
+            if not isinstance(entries, list):
+                continue
+            for entry in entries:
+                if isinstance(entry, dict):
+                    message = entry.get("message") or entry.get("description") or json.dumps(entry, default=str)
+                    severity = entry.get("severity", default_severity)
+                else:
+                    message, severity = str(entry), default_severity
+                rows.append((
+                    file_path, updated_at, severity, issue_type, entry_line(entry), None, "", message, "ai"
+                ))
+    return rows
+
+def diff_analysis(previous: Optional[Dict[str, Any]], current: Dict[str, Any]) -> Dict[str, Any]:
+    """What changed between two results for the same file, for push listeners"""
+    previous = previous or {}
+    old_issues = {finding_key(i): i for i in previous.get("syntax_errors", [])}
+    new_issues = {finding_key(i): i for i in current.get("syntax_errors", [])}
+    old_suggestions = {finding_key(s["error"]) for s in previous.get("linting_issues", [])}
+    delta = {
+        "timestamp": current.get("timestamp"),
+        "issue_count": len(new_issues),
+        "added": [issue for key, issue in new_issues.items() if key not in old_issues],
+        "resolved": [issue for key, issue in old_issues.items() if key not in new_issues],
+        "suggestions": [
+            s for s in current.get("linting_issues", [])
+            if finding_key(s["error"]) not in old_suggestions
+        ]
+    }
+    if current.get("ai_analysis") != previous.get("ai_analysis"):
+        delta["ai_analysis"] = current.get("ai_analysis")
+    return delta
+
+# Initialize the results index
+results_index = ResultsIndex(RESULTS_DB_PATH)
+results_index.backfill(get_store(ERROR_ANALYSIS_PATH).read())
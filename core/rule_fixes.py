@@ -0,0 +1,218 @@
+import ast
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+# A fix is a line-range replacement (1-based, inclusive) applied to the file
+Edit = Dict[str, Any]
+
+
+def _lines(code: str) -> List[str]:
+    return code.split("\n")
+
+
+def _parse(code: str) -> Optional[ast.AST]:
+    try:
+        return ast.parse(code)
+    except SyntaxError:
+        return None
+
+
+def _message_name(error: Dict[str, Any]) -> Optional[str]:
+    """Pull the identifier out of messages like "Unused import: os" or "'x' imported but unused" """
+    match = re.search(r"['\"`]([\w.]+)['\"`]", error.get("message", ""))
+    if match:
+        return match.group(1)
+    match = re.search(r":\s*([\w.]+)\s*$", error.get("message", ""))
+    return match.group(1) if match else None
+
+
+def fix_unused_import(error: Dict[str, Any], code: str) -> Optional[Edit]:
+    """Drop the unused name, or the whole import statement if it was the only one"""
+    # pylint says "Unused import os" / "Unused path imported from os"; check_common_mistakes "Unused import: os"
+    match = re.search(r"Unused (?:import:?\s+)?([\w.]+)", error.get("message", ""))
+    tree, line = _parse(code), error.get("line")
+    name = match.group(1) if match else _message_name(error)
+    if tree is None or not name:
+        return None
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.Import, ast.ImportFrom)):
+            continue
+        if line and node.lineno != line:
+            continue
+        kept = [alias for alias in node.names if name not in (alias.asname, alias.name, alias.name.split(".")[0])]
+        if len(kept) == len(node.names):
+            continue
+        indent = " " * node.col_offset
+        if not kept:
+            replacement = None
+        else:
+            node.names = kept
+            replacement = indent + ast.unparse(node)
+        return {"start_line": node.lineno, "end_line": node.end_lineno, "replacement": replacement}
+    return None
+
+
+def fix_bare_except(error: Dict[str, Any], code: str) -> Optional[Edit]:
+    line = error.get("line")
+    if not line:
+        return None
+    text = _lines(code)[line - 1]
+    fixed = re.sub(r"\bexcept\s*:", "except Exception:", text, count=1)
+    if fixed == text:
+        return None
+    return {"start_line": line, "end_line": line, "replacement": fixed}
+
+
+def fix_trailing_whitespace(error: Dict[str, Any], code: str) -> Optional[Edit]:
+    line = error.get("line")
+    if not line:
+        return None
+    return {"start_line": line, "end_line": line, "replacement": _lines(code)[line - 1].rstrip()}
+
+
+class RuleFix:
+    """Canned explanation and example for one linter rule, plus an optional autofix"""
+
+    def __init__(self, explanation: str, fix: str, example: str, autofix: Optional[Callable[[Dict[str, Any], str], Optional[Edit]]] = None):
+        self.explanation = explanation
+        self.fix = fix
+        self.example = example
+        self.autofix = autofix
+
+    def render(self) -> str:
+        return (
+            f"1. What's wrong: {self.explanation}\n"
+            f"2. How to fix it: {self.fix}\n"
+            f"3. Example:\n{self.example}"
+        )
+
+
+_UNUSED_IMPORT = RuleFix(
+    "The module is imported but never used, which slows start-up and hides real dependencies.",
+    "Remove the import (or the unused name from a multi-name import).",
+    "# before\nimport os\nimport sys\nprint(sys.argv)\n\n# after\nimport sys\nprint(sys.argv)",
+    fix_unused_import
+)
+_BARE_EXCEPT = RuleFix(
+    "A bare `except:` also catches KeyboardInterrupt and SystemExit and hides real bugs.",
+    "Catch the specific exceptions you expect, or at least `Exception`.",
+    "try:\n    value = int(text)\nexcept ValueError:\n    value = 0",
+    fix_bare_except
+)
+_BROAD_EXCEPT = RuleFix(
+    "Catching `Exception` swallows unexpected errors along with the ones you meant to handle.",
+    "Narrow the clause to the exceptions the block can actually raise, and log or re-raise the rest.",
+    "try:\n    data = json.loads(raw)\nexcept json.JSONDecodeError as e:\n    logger.warning(\"bad payload: %s\", e)"
+)
+_ENUMERATE = RuleFix(
+    "`for i in range(len(items))` indexes back into the list on every iteration.",
+    "Iterate with `enumerate`, which yields the index and the item together.",
+    "# before\nfor i in range(len(items)):\n    print(i, items[i])\n\n# after\nfor i, item in enumerate(items):\n    print(i, item)"
+)
+_MISSING_DOCSTRING = RuleFix(
+    "Public modules, classes and functions should say what they do.",
+    "Add a one-line docstring as the first statement.",
+    'def total(prices):\n    """Return the sum of all prices."""\n    return sum(prices)'
+)
+_PRINT = RuleFix(
+    "`print` in library or server code bypasses log levels and handlers.",
+    "Use the `logging` module instead.",
+    "import logging\nlogger = logging.getLogger(__name__)\nlogger.info(\"processed %d items\", count)"
+)
+_DOUBLE_SORT = RuleFix(
+    "The data is sorted twice; the second sort repeats the work of the first.",
+    "Sort once, combining keys into a tuple if you need a secondary order.",
+    "rows.sort(key=lambda r: (r.last_name, r.first_name))"
+)
+_TRAILING_WHITESPACE = RuleFix(
+    "The line ends with spaces or tabs.",
+    "Strip the trailing whitespace (most editors can do this on save).",
+    "x = 1  # no spaces after this",
+    fix_trailing_whitespace
+)
+_LINE_TOO_LONG = RuleFix(
+    "The line is longer than the configured maximum, which hurts readability in reviews.",
+    "Break the expression inside parentheses or extract a variable.",
+    "result = compute(\n    first_argument,\n    second_argument,\n)"
+)
+_SINGLETON_COMPARISON = RuleFix(
+    "Comparing to None/True/False with `==` can be overridden by `__eq__` and reads oddly.",
+    "Use `is None`, `is not None`, or the truthiness of the value.",
+    "if value is None:\n    ..."
+)
+_NO_UNUSED_VARS = RuleFix(
+    "The variable is declared but never read.",
+    "Remove it, or prefix intentionally unused parameters with `_`.",
+    "// before\nconst unused = compute();\n\n// after\ncompute();"
+)
+_NO_VAR = RuleFix(
+    "`var` is function-scoped and hoisted, which causes surprising bugs.",
+    "Use `const` for values that are not reassigned and `let` otherwise.",
+    "const total = items.length;\nlet index = 0;"
+)
+_EQEQEQ = RuleFix(
+    "`==` performs type coercion (`0 == ''` is true).",
+    "Use `===` and `!==`.",
+    "if (count === 0) { ... }"
+)
+_NO_CONSOLE = RuleFix(
+    "`console` calls left in production code leak noise and data.",
+    "Remove them or route through a logger that can be disabled.",
+    "logger.debug('state', state);"
+)
+_NO_EMPTY = RuleFix(
+    "An empty block silently ignores whatever should happen there.",
+    "Handle the case, or leave a comment explaining why nothing is done.",
+    "catch (err) {\n  // Optional feature; safe to ignore when unavailable\n}"
+)
+
+# Keyed by pylint symbol, ESLint rule ID or the codes check_common_mistakes emits
+RULE_FIXES: Dict[str, RuleFix] = {
+    "unused-import": _UNUSED_IMPORT,
+    "bare-except": _BARE_EXCEPT,
+    "broad-except": _BROAD_EXCEPT,
+    "broad-exception-caught": _BROAD_EXCEPT,
+    "consider-using-enumerate": _ENUMERATE,
+    "missing-module-docstring": _MISSING_DOCSTRING,
+    "missing-class-docstring": _MISSING_DOCSTRING,
+    "missing-function-docstring": _MISSING_DOCSTRING,
+    "print-statement": _PRINT,
+    "double-sort": _DOUBLE_SORT,
+    "trailing-whitespace": _TRAILING_WHITESPACE,
+    "line-too-long": _LINE_TOO_LONG,
+    "singleton-comparison": _SINGLETON_COMPARISON,
+    "no-unused-vars": _NO_UNUSED_VARS,
+    "@typescript-eslint/no-unused-vars": _NO_UNUSED_VARS,
+    "no-var": _NO_VAR,
+    "eqeqeq": _EQEQEQ,
+    "no-console": _NO_CONSOLE,
+    "no-empty": _NO_EMPTY,
+}
+
+
+def suggest_fix(error: Dict[str, Any], code: str) -> Optional[Dict[str, Any]]:
+    """Answer a finding locally, or return None so it escalates to the LLM"""
+    rule = RULE_FIXES.get(error.get("code") or "")
+    if rule is None:
+        return None
+    result = {"suggestion": rule.render(), "source": "rule"}
+    if rule.autofix:
+        try:
+            edit = rule.autofix(error, code)
+        except Exception as e:
+            print(f"[Junior] Autofix failed for {error.get('code')}: {e}")
+            edit = None
+        if edit:
+            result["fix"] = edit
+    return result
+
+
+def apply_edits(code: str, edits: List[Edit]) -> str:
+    """Apply non-overlapping edits bottom-up so earlier line numbers stay valid"""
+    lines = _lines(code)
+    for edit in sorted(edits, key=lambda e: e["start_line"], reverse=True):
+        start = edit["start_line"] - 1
+        end = max(edit["end_line"], start)
+        replacement = [] if edit["replacement"] is None else edit["replacement"].split("\n")
+        lines[start:end] = replacement
+    return "\n".join(lines)
@@ -0,0 +1,200 @@
+import os
+import re
+import keyword
+import builtins
+import threading
+import numpy as np
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from utils.json_store import get_store
+from utils.metrics import cache_evictions
+from utils.tracing import span
+from utils.workers import after_fork, connect_sqlite
+
+SEMANTIC_CACHE_DB_PATH = Path("core/cache/semantic_cache.db")
+# Legacy JSON cache, imported once into an empty table
+SEMANTIC_CACHE_PATH = "core/knowledge_base/semantic_cache.json"
+SIMILARITY_THRESHOLD = 0.92
+MAX_ENTRIES_PER_RULE = 200
+
+_KEEP_WORDS = set(keyword.kwlist) | set(dir(builtins))
+_QUOTED = re.compile(r"(['\"`])(?:(?!\1).)*\1")
+_NUMBER = re.compile(r"\b\d+\b")
+_TRAILING_NAME = re.compile(r":\s*[A-Za-z_][\w.]*\s*$")
+_IDENTIFIER = re.compile(r"\b[A-Za-z_]\w*\b")
+
+
+def normalize_message(message: str) -> str:
+    """Mask identifiers and numbers so findings differing only in names match.
+
+    "Unused import: os" and "Unused import: sys" both become
+    "Unused import: <ID>"; quoted names and line numbers are masked too.
+    """
+    message = _QUOTED.sub("<ID>", message)
+    message = _TRAILING_NAME.sub(": <ID>", message)
+    return _NUMBER.sub("<N>", message).strip()
+
+
+def normalize_code(code: str) -> str:
+    """Keep keywords, builtins and structure; mask user identifiers and literals"""
+    code = _QUOTED.sub("STR", code)
+    code = _NUMBER.sub("N", code)
+    code = _IDENTIFIER.sub(lambda m: m.group(0) if m.group(0) in _KEEP_WORDS else "ID", code)
+    return " ".join(code.split())
+
+
+def rule_of(error: Dict[str, Any]) -> str:
+    return f"{error['type']}:{error.get('code', '')}"
+
+
+class SemanticCache:
+    """Reuses LLM fixes for findings that are near-duplicates of earlier ones.
+
+    Entries are bucketed by rule (error type + linter code) and matched on the
+    cosine similarity of MiniLM embeddings of the normalized message and code
+    context. An optional verifier gets the final say on every candidate hit.
+    Each entry is one SQLite row (embedding as a float32 blob), so adding one
+    never rewrites the others; per-rule matrices are rebuilt lazily when
+    ``PRAGMA data_version`` shows another process wrote.
+    """
+
+    def __init__(self, db_path: Path, threshold: float = SIMILARITY_THRESHOLD, max_per_rule: int = MAX_ENTRIES_PER_RULE):
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = connect_sqlite(db_path)
+        self.threshold = threshold
+        self.max_per_rule = max_per_rule
+        self.verifier: Optional[Callable[[Dict[str, Any], str, Dict[str, Any]], bool]] = None
+        self._matrices: Dict[str, Tuple[List[int], np.ndarray]] = {}
+        self._data_version: Optional[int] = None
+        self._lock = threading.Lock()
+        self._create_tables()
+        after_fork(self._reopen)
+
+    def _reopen(self):
+        # A connection must not be carried into a forked worker
+        self.conn = connect_sqlite(self.db_path)
+        self._lock = threading.Lock()
+        self._matrices, self._data_version = {}, None
+
+    def _create_tables(self):
+        with self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    rule TEXT,
+                    message TEXT,
+                    normalized TEXT,
+                    suggestion TEXT,
+                    embedding BLOB
+                );
+                CREATE INDEX IF NOT EXISTS idx_entries_rule ON entries(rule, id);
+            """)
+
+    def set_verifier(self, verifier: Optional[Callable[[Dict[str, Any], str, Dict[str, Any]], bool]]) -> None:
+        """Install a check(error, code_context, cached_entry) -> bool run on every hit"""
+        self.verifier = verifier
+
+    def lookup(self, error: Dict[str, Any], code_context: str) -> Optional[str]:
+        rule = rule_of(error)
+        ids, matrix = self._matrix(rule)
+        if not ids:
+            return None
+
+        scores = matrix @ self._embed(error, code_context)
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT message, normalized, suggestion FROM entries WHERE id = ?", (ids[best],)
+            ).fetchone()
+        if row is None:  # Trimmed by another process since the matrix was built
+            return None
+        entry = dict(zip(("message", "normalized", "suggestion"), row))
+        if self.verifier and not self.verifier(error, code_context, entry):
+            return None
+        return f"(Reused fix for a similar finding: {entry['message']})\n{entry['suggestion']}"
+
+    def add(self, error: Dict[str, Any], code_context: str, suggestion: str) -> None:
+        rule = rule_of(error)
+        embedding = self._embed(error, code_context)
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO entries (rule, message, normalized, suggestion, embedding) VALUES (?, ?, ?, ?, ?)",
+                (rule, error["message"], normalize_message(error["message"]), suggestion, embedding.tobytes())
+            )
+            overflow = self._trim(rule)
+            self._matrices.pop(rule, None)
+        if overflow:
+            cache_evictions.inc(overflow, cache="semantic_cache")
+
+    def clear(self) -> None:
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM entries")
+            self._matrices = {}
+
+    def backfill(self, data: Dict[str, List[Dict[str, Any]]]) -> None:
+        """Import entries from the legacy semantic_cache.json if the table is empty"""
+        with self._lock:
+            has_rows = self.conn.execute("SELECT 1 FROM entries LIMIT 1").fetchone()
+        if has_rows or not data:
+            return
+        rows = [
+            (rule, entry["message"], entry.get("normalized", ""), entry["suggestion"],
+             np.asarray(entry["embedding"], dtype=np.float32).tobytes())
+            for rule, entries in data.items()
+            for entry in entries[-self.max_per_rule:]
+        ]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO entries (rule, message, normalized, suggestion, embedding) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._matrices = {}
+        print(f"[Junior] Imported {len(rows)} entries into the semantic cache")
+
+    def _trim(self, rule: str) -> int:
+        """Drop a rule's oldest entries beyond max_per_rule; caller holds the lock"""
+        return self.conn.execute(
+            """
+            DELETE FROM entries WHERE rule = ? AND id <= (
+                SELECT id FROM entries WHERE rule = ? ORDER BY id DESC LIMIT 1 OFFSET ?
+            )
+            """,
+            (rule, rule, self.max_per_rule)
+        ).rowcount
+
+    def _matrix(self, rule: str) -> Tuple[List[int], np.ndarray]:
+        with self._lock:
+            # data_version moves when another process commits, e.g. a trim plus an add
+            data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version != self._data_version:
+                self._matrices, self._data_version = {}, data_version
+            cached = self._matrices.get(rule)
+            if cached is None:
+                rows = self.conn.execute(
+                    "SELECT id, embedding FROM entries WHERE rule = ? ORDER BY id", (rule,)
+                ).fetchall()
+                cached = (
+                    [row[0] for row in rows],
+                    np.vstack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+                    if rows else np.zeros((0, 0), dtype=np.float32)
+                )
+                self._matrices[rule] = cached
+            return cached
+
+    @staticmethod
+    def _embed(error: Dict[str, Any], code_context: str) -> np.ndarray:
+        # Reuse the MiniLM instance the context manager already loaded
+        from core.context_manager import model
+        text = f"{normalize_message(error['message'])}\n{normalize_code(code_context)}"
+        with span("embed", texts=1):
+            return model.encode(text, normalize_embeddings=True).astype(np.float32)
+
+
+# Initialize the semantic cache, importing entries from the old JSON file once
+semantic_cache = SemanticCache(SEMANTIC_CACHE_DB_PATH)
+if os.path.exists(SEMANTIC_CACHE_PATH):
+    semantic_cache.backfill(get_store(SEMANTIC_CACHE_PATH).read())
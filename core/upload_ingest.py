@@ -0,0 +1,208 @@
+import os
+import zlib
+import fnmatch
+import asyncio
+import hashlib
+import tarfile
+import zipfile
+import posixpath
+from typing import Any, Awaitable, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from core.language_hub import language_hub
+from watcher.indexer import DEFAULT_EXCLUDES
+
+# Entries over the cap are skipped rather than truncated, so findings stay trustworthy
+UPLOAD_MAX_ENTRY_BYTES = int(os.getenv("UPLOAD_MAX_ENTRY_BYTES", str(1024 * 1024)))
+UPLOAD_MAX_ENTRIES = int(os.getenv("UPLOAD_MAX_ENTRIES", "2000"))
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "8"))
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+
+class ArchiveError(ValueError):
+    """The upload looked like an archive but could not be read"""
+
+
+class UploadEntry:
+    """One file from an upload: its text, or the reason it was skipped"""
+
+    def __init__(self, name: str, text: Optional[str] = None, reason: Optional[str] = None, size: int = 0):
+        self.name = name
+        self.text = text
+        self.reason = reason
+        self.size = size
+
+
+def is_archive(filename: str) -> bool:
+    return (filename or "").lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def clean_name(name: str) -> str:
+    """Entry names are only labels, but keep them relative and free of '..'"""
+    parts = [p for p in posixpath.normpath(name.replace("\\", "/")).split("/") if p not in ("", ".", "..")]
+    return "/".join(parts)
+
+
+def _excluded(name: str) -> bool:
+    return any(fnmatch.fnmatch(part, pattern) for part in name.split("/")[:-1] for pattern in DEFAULT_EXCLUDES)
+
+
+def _entry(name: str, data: bytes, max_bytes: int) -> UploadEntry:
+    if len(data) > max_bytes:
+        return UploadEntry(name, reason="too_large", size=len(data))
+    if b"\0" in data:
+        return UploadEntry(name, reason="binary", size=len(data))
+    try:
+        return UploadEntry(name, text=data.decode("utf-8"), size=len(data))
+    except UnicodeDecodeError:
+        return UploadEntry(name, reason="binary", size=len(data))
+
+
+def read_upload(name: str, stream: BinaryIO, max_bytes: int = UPLOAD_MAX_ENTRY_BYTES) -> UploadEntry:
+    """Read a plain uploaded file straight from its buffer, reading at most one byte past the cap"""
+    return _entry(clean_name(os.path.basename(name or "upload")), stream.read(max_bytes + 1), max_bytes)
+
+
+def _wanted(name: str) -> bool:
+    return not _excluded(name) and language_hub.get_language_for_path(name) != "unknown"
+
+
+def _zip_entries(archive_name: str, stream: BinaryIO, max_bytes: int) -> Iterator[Tuple[str, Any]]:
+    try:
+        archive = zipfile.ZipFile(stream)
+    except zipfile.BadZipFile as e:
+        raise ArchiveError(f"{archive_name}: {e}")
+    with archive:
+        for info in archive.infolist():
+            name = clean_name(info.filename)
+            if info.is_dir() or not _wanted(name):
+                yield name, None
+            elif info.file_size > max_bytes:
+                yield name, UploadEntry(name, reason="too_large", size=info.file_size)
+            else:
+                # The header size can lie (zip bombs), so the read is capped too
+                try:
+                    with archive.open(info) as f:
+                        data = f.read(max_bytes + 1)
+                except (zipfile.BadZipFile, zlib.error, RuntimeError, NotImplementedError):
+                    # Corrupt, encrypted or unsupported compression
+                    yield name, UploadEntry(name, reason="unreadable", size=info.file_size)
+                    continue
+                yield name, _entry(name, data, max_bytes)
+
+
+def _tar_entries(archive_name: str, stream: BinaryIO, max_bytes: int) -> Iterator[Tuple[str, Any]]:
+    try:
+        # Stream mode reads members in order without seeking
+        archive = tarfile.open(fileobj=stream, mode="r|*")
+    except tarfile.TarError as e:
+        raise ArchiveError(f"{archive_name}: {e}")
+    with archive:
+        try:
+            for member in archive:
+                name = clean_name(member.name)
+                if not member.isfile() or not _wanted(name):
+                    yield name, None
+                elif member.size > max_bytes:
+                    yield name, UploadEntry(name, reason="too_large", size=member.size)
+                else:
+                    yield name, _entry(name, archive.extractfile(member).read(), max_bytes)
+        except tarfile.TarError as e:
+            raise ArchiveError(f"{archive_name}: {e}")
+
+
+def iter_uploads(
+    uploads: Iterable[Tuple[str, BinaryIO]],
+    max_bytes: int = UPLOAD_MAX_ENTRY_BYTES,
+    max_entries: int = UPLOAD_MAX_ENTRIES
+) -> Iterator[UploadEntry]:
+    """Yield source files from plain uploads and zip/tar archives, one entry at a time.
+
+    Archive members that are directories, unsupported languages or under
+    vendored/build directories are passed over without being decompressed.
+    """
+    count = 0
+    for filename, stream in uploads:
+        if not is_archive(filename):
+            members = iter([(filename, read_upload(filename, stream, max_bytes))])
+        elif filename.lower().endswith(".zip"):
+            members = _zip_entries(filename, stream, max_bytes)
+        else:
+            members = _tar_entries(filename, stream, max_bytes)
+        prefix = "" if not is_archive(filename) else clean_name(os.path.basename(filename)) + "/"
+        for name, entry in members:
+            if entry is None:
+                continue
+            if count >= max_entries:
+                yield UploadEntry(prefix + name, reason="entry_limit")
+                return
+            count += 1
+            entry.name = prefix + entry.name
+            yield entry
+
+
+async def analyze_entries(
+    entries: Iterable[UploadEntry],
+    analyze: Callable[[str, str], Awaitable[Dict[str, Any]]],
+    concurrency: int = UPLOAD_CONCURRENCY
+) -> Dict[str, Any]:
+    """Analyse entries concurrently as they are read, once per distinct content.
+
+    Reading (decompression included) runs in a worker thread and feeds a
+    bounded queue, so memory stays at a few entries however large the archive.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    iterator = iter(entries)
+    results: List[Tuple[int, Dict[str, Any]]] = []
+    skipped: List[Dict[str, Any]] = []
+    first_by_digest: Dict[str, str] = {}
+    failure: List[BaseException] = []
+
+    async def produce():
+        index = 0
+        try:
+            while True:
+                entry = await loop.run_in_executor(None, next, iterator, None)
+                if entry is None:
+                    break
+                await queue.put((index, entry))
+                index += 1
+        except Exception as e:
+            failure.append(e)
+        finally:
+            for _ in range(concurrency):
+                await queue.put(None)
+
+    async def consume():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            index, entry = item
+            if entry.reason:
+                skipped.append({"file": entry.name, "reason": entry.reason, "size": entry.size})
+                continue
+            digest = hashlib.sha256(entry.text.encode("utf-8")).hexdigest()
+            if digest in first_by_digest:
+                results.append((index, {"file": entry.name, "sha256": digest, "duplicate_of": first_by_digest[digest]}))
+                continue
+            first_by_digest[digest] = entry.name
+            try:
+                analysis = await analyze(entry.text, entry.name)
+                results.append((index, {"file": entry.name, "sha256": digest, "analysis": analysis}))
+            except Exception as e:
+                results.append((index, {"file": entry.name, "sha256": digest, "error": str(e)}))
+
+    await asyncio.gather(produce(), *(consume() for _ in range(concurrency)))
+    if failure:
+        raise failure[0]
+
+    files = [result for _, result in sorted(results, key=lambda item: item[0])]
+    return {
+        "files": files,
+        "skipped": skipped,
+        "stats": {
+            "analyzed": len(first_by_digest),
+            "duplicates": sum(1 for f in files if "duplicate_of" in f),
+            "skipped": len(skipped)
+        }
+    }
@@ -1,25 +1,58 @@
 import yaml
-import threading
 from fastapi import FastAPI
-from watcher.folder_watcher import start_watch
+from watcher.folder_watcher import watcher_manager
 from api.routes import router as api_router
+from api.folder_routes import router as folder_router
+from api.event_routes import router as event_router
+from api.metrics_routes import router as metrics_router
+from api.trace_routes import router as trace_router
+from utils.tracing import trace_middleware
+from utils.workers import watcher_lock, watcher_mode
 
 app = FastAPI()
 app.include_router(api_router)
+app.include_router(folder_router)
+app.include_router(event_router)
+app.include_router(metrics_router)
+app.include_router(trace_router)
+app.middleware("http")(trace_middleware)
 
 def load_config():
     with open("config.yaml", "r") as f:
         return yaml.safe_load(f)
     
-def start_watcher_thread():
+def start_watcher():
     config = load_config()
     watch_paths = config.get("watch_paths", [])
-    file_types = config.get("file_types", [])
-    watcher_thread = threading.Thread(target=start_watch, args=(watch_paths, file_types), daemon=True)
-    watcher_thread.start()
+    # Older configs spelled the key "file_type"
+    file_types = config.get("file_types", config.get("file_type", []))
+    excludes = config.get("exclude")
+    for path in watch_paths:
+        try:
+            watcher_manager.add_root(path, file_types, excludes)
+        except ValueError as e:
+            print(f"[Junior] Skipping watch path: {e}")
+
+
+def claim_watcher():
+    """Start the watcher in exactly one process when several workers serve the app"""
+    mode = watcher_mode()
+    if mode == "off":
+        print("[Junior] Folder watcher disabled in this process")
+    elif mode == "on" or watcher_lock.acquire():
+        start_watcher()
+    else:
+        print(f"[Junior] Folder watcher runs in process {watcher_lock.owner_pid()}; standing by")
+        watcher_lock.acquire_when_free(start_watcher)
 
 
 @app.on_event("startup")
 def on_startup():
     print("[Junior] Starting FastAPI app and folder watcher...")
-    start_watcher_thread()
+    claim_watcher()
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    watcher_manager.shutdown()
+    watcher_lock.release()
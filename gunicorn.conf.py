@@ -0,0 +1,29 @@
+"""Multi-worker deployment of either backend app.
+
+    JUNIOR_WORKERS=4 gunicorn -c gunicorn.conf.py main:app
+    JUNIOR_WORKERS=2 JUNIOR_BIND=0.0.0.0:8001 gunicorn -c gunicorn.conf.py fastapi_app:app
+
+The app and the MiniLM model are loaded once in the master and the workers
+are forked from it, so the model weights are shared copy-on-write instead of
+loaded per worker. Setting JUNIOR_WORKERS before the app is imported switches
+the caches to shared SQLite tables and splits the LLM rate limits between
+workers; with fastapi_app only one worker runs the folder watcher.
+"""
+import os
+
+workers = int(os.getenv("JUNIOR_WORKERS", "4"))
+os.environ["JUNIOR_WORKERS"] = str(workers)
+# Tokenizer thread pools do not survive a fork
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+bind = os.getenv("JUNIOR_BIND", "0.0.0.0:8000")
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+# LLM calls queue behind the rate limiter, so allow slow requests
+timeout = int(os.getenv("JUNIOR_WORKER_TIMEOUT", "180"))
+graceful_timeout = 30
+
+
+def on_starting(server):
+    # main.py only loads the embedding model on first use; load it pre-fork instead
+    import core.context_manager  # noqa: F401
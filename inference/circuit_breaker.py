@@ -0,0 +1,78 @@
+import time
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without contacting the provider while the circuit is open"""
+
+
+class CircuitBreaker:
+    """Fail fast after repeated upstream failures.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls are rejected for ``reset_timeout`` seconds; then a single probe is
+    let through and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = "half_open"
+            if self.state == "half_open":
+                if self._probing:
+                    return False
+                self._probing = True
+            return True
+
+    @contextmanager
+    def attempt(self) -> Iterator[None]:
+        """Record the outcome of a call that ``allow`` let through.
+
+        A call that is cancelled (``CancelledError``, ``KeyboardInterrupt``)
+        says nothing about the upstream, so it only gives up the probe slot;
+        otherwise a cancelled probe would keep the circuit half-open forever.
+        """
+        try:
+            yield
+        except Exception:
+            self.record_failure()
+            raise
+        except BaseException:
+            self.release()
+            raise
+        else:
+            self.record_success()
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    print(f"[Junior] LLM circuit opened after {self.failures} failures")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """Let another call probe without counting this one either way"""
+        with self._lock:
+            self._probing = False
@@ -1,28 +1,145 @@
 import os
+import time
+import random
+import asyncio
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
 from dotenv import load_dotenv
+from typing import Any, List, Optional
+from inference.scheduler import llm_scheduler, Priority
+from inference.circuit_breaker import CircuitBreaker, CircuitOpenError
+from utils.metrics import metrics, stage_seconds
+from utils.tracing import span
 
 load_dotenv()
 
+# Upstream call policy; retries are ours, so the client's own retries are off
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_RETRIES = int(os.getenv("LLM_RETRIES", "2"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", "30"))
+# Point at any OpenAI-compatible endpoint, e.g. the local mock in benchmarks/
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "https://api.groq.com/openai/v1")
+LLM_MODEL = os.getenv("LLM_MODEL", "llama3-70b-8192")
+
 
 llm = ChatOpenAI(
-    base_url="https://api.groq.com/openai/v1",
-    model_name="llama3-70b-8192",
+    base_url=LLM_BASE_URL,
+    model_name=LLM_MODEL,
     api_key=os.getenv("OPENAI_API_KEY"),
     temperature=0.5,
-    max_completion_tokens= 1024
+    max_completion_tokens= 1024,
+    timeout=LLM_TIMEOUT,
+    max_retries=0
 )
 
 
+breaker = CircuitBreaker(LLM_BREAKER_THRESHOLD, LLM_BREAKER_RESET)
+
+llm_requests = metrics.counter("junior_llm_requests_total", "LLM calls by call site and outcome", ("site", "outcome"))
+llm_seconds = metrics.histogram("junior_llm_seconds", "LLM call latency including retries", ("site",))
+llm_tokens = metrics.counter("junior_llm_tokens_total", "Tokens reported by the provider", ("site", "kind"))
+
+
+def _record_llm(site: str, started: float, response: Any = None, error: Optional[Exception] = None) -> None:
+    elapsed = time.perf_counter() - started
+    llm_seconds.observe(elapsed, site=site)
+    stage_seconds.observe(elapsed, stage="llm")
+    if error is not None:
+        outcome = "circuit_open" if isinstance(error, CircuitOpenError) else "error"
+        llm_requests.inc(site=site, outcome=outcome)
+        return
+    llm_requests.inc(site=site, outcome="ok")
+    usage = getattr(response, "usage_metadata", None) or {}
+    for kind in ("input_tokens", "output_tokens"):
+        if usage.get(kind):
+            llm_tokens.inc(usage[kind], site=site, kind=kind.split("_")[0])
+
+
+def _is_transient(error: Exception) -> bool:
+    """Timeouts, connection problems and 5xx are worth retrying; other 4xx are not"""
+    status = getattr(error, "status_code", None)
+    return status is None or status >= 500
+
+
+def _retry_delay(attempt: int) -> float:
+    return LLM_RETRY_BASE_DELAY * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+
+def call_llm(
+    client: Any,
+    messages: List[Any],
+    priority: Optional[Priority] = None,
+    timeout: Optional[float] = None,
+    retries: Optional[int] = None,
+    site: str = "default",
+    circuit: Optional[CircuitBreaker] = None
+) -> Any:
+    """Invoke a chat model through the scheduler with timeout, retries and the breaker"""
+    circuit = circuit or breaker
+    timeout = LLM_TIMEOUT if timeout is None else timeout
+    retries = LLM_RETRIES if retries is None else retries
+    started = time.perf_counter()
+    for attempt in range(retries + 1):
+        if not circuit.allow():
+            error = CircuitOpenError("LLM upstream is unhealthy; failing fast")
+            _record_llm(site, started, error=error)
+            raise error
+        try:
+            with span("llm", site=site, attempt=attempt), circuit.attempt():
+                response = llm_scheduler.invoke(client, messages, priority, timeout)
+        except Exception as e:
+            if attempt == retries or not _is_transient(e):
+                _record_llm(site, started, error=e)
+                raise
+            time.sleep(_retry_delay(attempt))
+        else:
+            _record_llm(site, started, response)
+            return response
+
+
+async def acall_llm(
+    client: Any,
+    messages: List[Any],
+    priority: Optional[Priority] = None,
+    timeout: Optional[float] = None,
+    retries: Optional[int] = None,
+    site: str = "default",
+    circuit: Optional[CircuitBreaker] = None
+) -> Any:
+    """Async variant of call_llm for the FastAPI handlers"""
+    circuit = circuit or breaker
+    timeout = LLM_TIMEOUT if timeout is None else timeout
+    retries = LLM_RETRIES if retries is None else retries
+    started = time.perf_counter()
+    for attempt in range(retries + 1):
+        if not circuit.allow():
+            error = CircuitOpenError("LLM upstream is unhealthy; failing fast")
+            _record_llm(site, started, error=error)
+            raise error
+        try:
+            with span("llm", site=site, attempt=attempt), circuit.attempt():
+                response = await llm_scheduler.ainvoke(client, messages, priority, timeout)
+        except Exception as e:
+            if attempt == retries or not _is_transient(e):
+                _record_llm(site, started, error=e)
+                raise
+            await asyncio.sleep(_retry_delay(attempt))
+        else:
+            _record_llm(site, started, response)
+            return response
+
 
-def query_llama(prompt: str) -> str:
+def query_llama(prompt: str, priority: Optional[Priority] = None, site: str = "query_llama") -> str:
+    # The router imports this module, so import it at call time
+    from inference.router import model_router
     try:
-        res = llm.invoke([
+        res = model_router.call(site, llm, [
             SystemMessage(content="You are a helpful programming assistant.Who implement code, find bug, debug it.Also suggest documentation related to my code."),
             HumanMessage(content=prompt)
-        ])
+        ], priority)
         return res.content.strip()
     except Exception as e:
         print(f"[Junior] Groq LLaMa query error: {e}")
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,349 @@
+import os
+import re
+import time
+import threading
+from collections import Counter, deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import yaml
+from langchain_openai import ChatOpenAI
+from langchain_core.messages import SystemMessage
+from inference.groq_client import (
+    call_llm, acall_llm, CircuitBreaker, LLM_BASE_URL, LLM_MODEL, LLM_TIMEOUT,
+    LLM_BREAKER_THRESHOLD, LLM_BREAKER_RESET
+)
+from inference.scheduler import Priority
+from utils.metrics import metrics
+
+# Empty disables routing: every call goes to LLM_MODEL as before
+LLM_SMALL_MODEL = os.getenv("LLM_SMALL_MODEL", "llama-3.1-8b-instant")
+LLM_ROUTING = os.getenv("LLM_ROUTING", "on").lower() not in ("0", "off", "false")
+MIN_CONFIDENCE = float(os.getenv("LLM_MIN_CONFIDENCE", "0.6"))
+CONFIG_PATH = "config.yaml"
+
+# USD per million (input, output) tokens; override with llm_prices in config.yaml
+MODEL_PRICES = {
+    "llama3-70b-8192": (0.59, 0.79),
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+    "llama3-8b-8192": (0.05, 0.08),
+    "llama-3.1-8b-instant": (0.05, 0.08)
+}
+
+# "small" tries the fast model first; with escalate it retries on the large one
+# when the answer is unusable or unsure. Unknown sites go to the large model.
+DEFAULT_ROUTES = {
+    "term_explanation": {"model": "small", "escalate": True},
+    "error_suggestion": {"model": "small", "escalate": True},
+    "error_fix": {"model": "small", "escalate": True},
+    "code_analysis": {"model": "small", "escalate": True},
+    "problem_analysis": {"model": "small", "escalate": True},
+    "math_translation": {"model": "small", "escalate": True},
+    "json_reformat": {"model": "small", "escalate": True},
+    "solution": {"model": "large"},
+    "problem_solve": {"model": "large"},
+    "optimization": {"model": "large"}
+}
+
+CONFIDENCE_INSTRUCTION = (
+    "After your answer, add one final line of the form `CONFIDENCE: <number from 0 to 1>` "
+    "saying how sure you are that the answer is correct and complete."
+)
+_CONFIDENCE_LINE = re.compile(r"\n?[ \t>*`]*CONFIDENCE:\s*([01](?:\.\d+)?)\W*\s*$", re.IGNORECASE)
+# response_metadata key recording which model ("small" or "large") answered a routed call
+ROUTED_MODEL_KEY = "junior_routed_model"
+_HEDGES = ("i'm not sure", "i am not sure", "i cannot determine", "i don't know", "unable to determine")
+
+route_calls = metrics.counter(
+    "junior_llm_route_calls_total", "Routed LLM calls by site and how they were answered", ("site", "path")
+)
+route_seconds = metrics.histogram(
+    "junior_llm_route_seconds", "End-to-end latency of routed calls, escalation included", ("site", "path")
+)
+route_cost = metrics.counter(
+    "junior_llm_route_cost_usd_total", "Estimated spend from provider token counts", ("site", "model")
+)
+
+
+def load_routes(path: str = CONFIG_PATH) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Tuple[float, float]]]:
+    """Default routes and prices, overridden by llm_routes / llm_prices in config.yaml"""
+    routes = {site: dict(route) for site, route in DEFAULT_ROUTES.items()}
+    prices = dict(MODEL_PRICES)
+    try:
+        with open(path, "r") as f:
+            config = yaml.safe_load(f) or {}
+    except (OSError, yaml.YAMLError):
+        return routes, prices
+    for site, route in (config.get("llm_routes") or {}).items():
+        routes[site] = {**routes.get(site, {}), **route}
+    for model, price in (config.get("llm_prices") or {}).items():
+        prices[model] = tuple(price)
+    return routes, prices
+
+
+def parse_confidence(content: str) -> Tuple[str, Optional[float]]:
+    """Split the trailing CONFIDENCE line off an answer"""
+    match = _CONFIDENCE_LINE.search(content or "")
+    if not match:
+        return content, None
+    return content[:match.start()].rstrip(), float(match.group(1))
+
+
+def default_validate(content: str) -> bool:
+    text = (content or "").strip().lower()
+    return bool(text) and not any(hedge in text for hedge in _HEDGES)
+
+
+class RouteStats:
+    """Per-site latency, token, cost and escalation figures for the routing report"""
+
+    def __init__(self, prices: Dict[str, Tuple[float, float]], samples: int = 1000):
+        self.prices = prices
+        self.samples = samples
+        self._routes: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, site: str) -> Dict[str, Any]:
+        entry = self._routes.get(site)
+        if entry is None:
+            entry = self._routes[site] = {
+                "paths": Counter(),
+                "escalation_reasons": Counter(),
+                "latencies": deque(maxlen=self.samples),
+                "tokens": {},
+                "cost_usd": 0.0
+            }
+        return entry
+
+    def record_usage(self, site: str, model: str, response: Any) -> None:
+        usage = getattr(response, "usage_metadata", None) or {}
+        tokens_in, tokens_out = usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+        price_in, price_out = self.prices.get(model, (0.0, 0.0))
+        cost = (tokens_in * price_in + tokens_out * price_out) / 1_000_000
+        with self._lock:
+            entry = self._entry(site)
+            totals = entry["tokens"].setdefault(model, {"input": 0, "output": 0})
+            totals["input"] += tokens_in
+            totals["output"] += tokens_out
+            entry["cost_usd"] += cost
+        if cost:
+            route_cost.inc(cost, site=site, model=model)
+
+    def record_call(self, site: str, path: str, seconds: float, reason: Optional[str] = None) -> None:
+        with self._lock:
+            entry = self._entry(site)
+            entry["paths"][path] += 1
+            entry["latencies"].append(seconds)
+            if reason:
+                entry["escalation_reasons"][reason] += 1
+        route_calls.inc(site=site, path=path)
+        route_seconds.observe(seconds, site=site, path=path)
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            routes = {site: (dict(e["paths"]), dict(e["escalation_reasons"]), sorted(e["latencies"]),
+                             {m: dict(t) for m, t in e["tokens"].items()}, e["cost_usd"])
+                      for site, e in self._routes.items()}
+        report = {}
+        for site, (paths, reasons, latencies, tokens, cost) in routes.items():
+            calls = sum(paths.values())
+            tried_small = paths.get("small", 0) + paths.get("escalated", 0)
+            report[site] = {
+                "calls": calls,
+                "paths": paths,
+                "escalation_rate": paths.get("escalated", 0) / tried_small if tried_small else None,
+                "escalation_reasons": reasons,
+                "p50_seconds": latencies[len(latencies) // 2] if latencies else None,
+                "p95_seconds": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else None,
+                "tokens": tokens,
+                "cost_usd": round(cost, 6)
+            }
+        return report
+
+
+class ModelRouter:
+    """Sends each call site to a small or large model, escalating small-model answers.
+
+    A cascaded call first goes to the small model, which is asked to end with
+    a CONFIDENCE line. It is re-asked on the large model when the small call
+    fails, the answer is empty or hedged, the caller's ``validate`` rejects it
+    (e.g. JSON that does not parse) or the confidence is below the route's
+    ``min_confidence``. The CONFIDENCE line is stripped from what callers see.
+    """
+
+    def __init__(self, small_model: str, large_model: str, enabled: bool = True):
+        self.small_model = small_model
+        self.large_model = large_model
+        self.enabled = enabled and bool(small_model) and small_model != large_model
+        self.routes, prices = load_routes()
+        self.stats = RouteStats(prices)
+        # Small-model failures must not open the circuit for the large model
+        self.small_breaker = CircuitBreaker(LLM_BREAKER_THRESHOLD, LLM_BREAKER_RESET)
+        self._clients: Dict[float, Any] = {}
+        self._lock = threading.Lock()
+
+    def route(self, site: str) -> Dict[str, Any]:
+        route = self.routes.get(site, {"model": "large"})
+        if not self.enabled:
+            return {"model": "large"}
+        return route
+
+    def small_client(self, client: Any) -> Any:
+        """The small model with the same sampling settings as the caller's client"""
+        temperature = getattr(client, "temperature", 0.3)
+        with self._lock:
+            if temperature not in self._clients:
+                self._clients[temperature] = ChatOpenAI(
+                    base_url=LLM_BASE_URL,
+                    model_name=self.small_model,
+                    api_key=os.getenv("OPENAI_API_KEY"),
+                    temperature=temperature,
+                    max_completion_tokens=getattr(client, "max_tokens", None) or 1024,
+                    timeout=LLM_TIMEOUT,
+                    max_retries=0
+                )
+            return self._clients[temperature]
+
+    def _small_messages(self, messages: List[Any]) -> List[Any]:
+        return list(messages) + [SystemMessage(content=CONFIDENCE_INSTRUCTION)]
+
+    def _verdict(self, route: Dict[str, Any], response: Any, validate: Callable[[str], bool]) -> Optional[str]:
+        """Strip the confidence line; return why the answer should be escalated, if it should"""
+        content, confidence = parse_confidence(response.content)
+        response.content = content
+        if not validate(content):
+            return "rejected"
+        if confidence is not None and confidence < route.get("min_confidence", MIN_CONFIDENCE):
+            return "low_confidence"
+        return None
+
+    def call(
+        self,
+        site: str,
+        client: Any,
+        messages: List[Any],
+        priority: Optional[Priority] = None,
+        validate: Callable[[str], bool] = default_validate
+    ) -> Any:
+        route, started = self.route(site), time.perf_counter()
+        if route.get("model") != "small":
+            response = self._large(site, "large", started, lambda: call_llm(client, messages, priority, site=site))
+            self.stats.record_usage(site, self._model_of(client), response)
+            return self._tag(response, "large")
+
+        reason = None
+        try:
+            response = call_llm(self.small_client(client), self._small_messages(messages), priority,
+                                site=site, circuit=self.small_breaker)
+            self.stats.record_usage(site, self.small_model, response)
+            reason = self._verdict(route, response, validate)
+        except Exception as e:
+            if not route.get("escalate"):
+                self.stats.record_call(site, "failed", time.perf_counter() - started)
+                raise
+            print(f"[Junior] Small model failed for {site}, escalating: {e}")
+            reason = "error"
+        if reason is None or not route.get("escalate"):
+            self.stats.record_call(site, "small", time.perf_counter() - started)
+            return self._tag(response, "small")
+
+        response = self._large(site, "escalated", started, lambda: call_llm(client, messages, priority, site=site), reason)
+        self.stats.record_usage(site, self._model_of(client), response)
+        return self._tag(response, "large")
+
+    async def acall(
+        self,
+        site: str,
+        client: Any,
+        messages: List[Any],
+        priority: Optional[Priority] = None,
+        validate: Callable[[str], bool] = default_validate
+    ) -> Any:
+        route, started = self.route(site), time.perf_counter()
+        if route.get("model") != "small":
+            response = await self._alarge(site, "large", started, acall_llm(client, messages, priority, site=site))
+            self.stats.record_usage(site, self._model_of(client), response)
+            return self._tag(response, "large")
+
+        reason = None
+        try:
+            response = await acall_llm(self.small_client(client), self._small_messages(messages), priority,
+                                       site=site, circuit=self.small_breaker)
+            self.stats.record_usage(site, self.small_model, response)
+            reason = self._verdict(route, response, validate)
+        except Exception as e:
+            if not route.get("escalate"):
+                self.stats.record_call(site, "failed", time.perf_counter() - started)
+                raise
+            print(f"[Junior] Small model failed for {site}, escalating: {e}")
+            reason = "error"
+        if reason is None or not route.get("escalate"):
+            self.stats.record_call(site, "small", time.perf_counter() - started)
+            return self._tag(response, "small")
+
+        response = await self._alarge(site, "escalated", started, acall_llm(client, messages, priority, site=site), reason)
+        self.stats.record_usage(site, self._model_of(client), response)
+        return self._tag(response, "large")
+
+    async def acall_on(
+        self,
+        model: str,
+        site: str,
+        client: Any,
+        messages: List[Any],
+        priority: Optional[Priority] = None
+    ) -> Any:
+        """Call one model directly, e.g. to continue a reply on the model that wrote it"""
+        started = time.perf_counter()
+        if model == "small" and self.enabled:
+            pending = acall_llm(self.small_client(client), messages, priority, site=site, circuit=self.small_breaker)
+            response = await self._alarge(site, "small", started, pending)
+            self.stats.record_usage(site, self.small_model, response)
+            return self._tag(response, "small")
+        response = await self._alarge(site, "large", started, acall_llm(client, messages, priority, site=site))
+        self.stats.record_usage(site, self._model_of(client), response)
+        return self._tag(response, "large")
+
+    @staticmethod
+    def _tag(response: Any, model: str) -> Any:
+        metadata = getattr(response, "response_metadata", None)
+        if isinstance(metadata, dict):
+            metadata[ROUTED_MODEL_KEY] = model
+        return response
+
+    @staticmethod
+    def answered_by(response: Any) -> str:
+        """Which model ("small" or "large") produced a routed response"""
+        return (getattr(response, "response_metadata", None) or {}).get(ROUTED_MODEL_KEY, "large")
+
+    def _model_of(self, client: Any) -> str:
+        return getattr(client, "model_name", None) or self.large_model
+
+    def _large(self, site: str, path: str, started: float, invoke: Callable[[], Any], reason: Optional[str] = None) -> Any:
+        try:
+            response = invoke()
+        except Exception:
+            self.stats.record_call(site, "failed", time.perf_counter() - started, reason)
+            raise
+        self.stats.record_call(site, path, time.perf_counter() - started, reason)
+        return response
+
+    async def _alarge(self, site: str, path: str, started: float, pending: Awaitable[Any], reason: Optional[str] = None) -> Any:
+        try:
+            response = await pending
+        except Exception:
+            self.stats.record_call(site, "failed", time.perf_counter() - started, reason)
+            raise
+        self.stats.record_call(site, path, time.perf_counter() - started, reason)
+        return response
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "small_model": self.small_model,
+            "large_model": self.large_model,
+            "routes": self.routes,
+            "stats": self.stats.report()
+        }
+
+
+# Initialize the model router
+model_router = ModelRouter(LLM_SMALL_MODEL, LLM_MODEL, LLM_ROUTING)
@@ -0,0 +1,264 @@
+import os
+import time
+import heapq
+import random
+import asyncio
+import itertools
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import Future, InvalidStateError
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import Any, Dict, List, Optional
+from utils.workers import after_fork, worker_count
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0  # API requests a user is waiting on
+    BACKGROUND = 1   # Watcher analysis of files that just changed
+    BULK = 2         # Start-up indexing of existing files
+
+
+_current_priority = contextvars.ContextVar("llm_priority", default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def llm_priority(priority: Priority):
+    """Run LLM calls made inside the block at the given priority"""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def is_rate_limited(error: Exception) -> bool:
+    return getattr(error, "status_code", None) == 429 or "429" in str(error)
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds requested by the provider's Retry-After header, if any"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class _Job:
+    def __init__(self, priority: int, seq: int, llm: Any, messages: List[Any], tokens: int, timeout: Optional[float]):
+        self.priority = priority
+        self.seq = seq
+        self.llm = llm
+        self.messages = messages
+        self.tokens = tokens
+        self.timeout = timeout
+        self.attempts = 0
+        self.future: Future = Future()
+
+    def resolve(self, result: Any = None, error: Optional[BaseException] = None) -> None:
+        """Settle the future unless a timeout or cancellation already did"""
+        try:
+            if error is not None:
+                self.future.set_exception(error)
+            else:
+                self.future.set_result(result)
+        except InvalidStateError:
+            pass
+
+    def __lt__(self, other: "_Job") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class LLMScheduler:
+    """Single gate for every chat-model call in the process.
+
+    Calls are queued by priority and dispatched only while the sliding
+    one-minute request and token windows have room, with at most
+    ``max_concurrency`` in flight. A 429 pauses dispatching (honouring
+    Retry-After, otherwise exponential backoff) and requeues the call in its
+    original position; successful calls shrink the backoff again. A call's
+    ``timeout`` counts from dispatch, so time spent waiting for budget is not
+    mistaken for a slow upstream.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_concurrency: int = 4,
+        max_retries: int = 5,
+        max_backoff: float = 60.0
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self._heap: List[_Job] = []
+        self._seq = itertools.count()
+        self._window: deque = deque()  # [timestamp, tokens] per dispatched call
+        self._cond = threading.Condition()
+        self._slots = threading.Semaphore(max_concurrency)
+        self._max_concurrency = max_concurrency
+        self._paused_until = 0.0
+        self._backoff = 1.0
+        self._dispatcher: Optional[threading.Thread] = None
+        after_fork(self._after_fork)
+
+    def _after_fork(self) -> None:
+        # Threads, queued calls and lock state belong to the parent process
+        self._heap = []
+        self._window = deque()
+        self._cond = threading.Condition()
+        self._slots = threading.Semaphore(self._max_concurrency)
+        self._dispatcher = None
+
+    def submit(
+        self,
+        llm: Any,
+        messages: List[Any],
+        priority: Optional[Priority] = None,
+        timeout: Optional[float] = None
+    ) -> Future:
+        """Queue a call and return a future for the model response"""
+        if priority is None:
+            priority = _current_priority.get()
+        tokens = self._estimate_tokens(llm, messages)
+        job = _Job(int(priority), next(self._seq), llm, messages, tokens, timeout)
+        with self._cond:
+            self._ensure_dispatcher()
+            heapq.heappush(self._heap, job)
+            self._cond.notify_all()
+        return job.future
+
+    def invoke(
+        self,
+        llm: Any,
+        messages: List[Any],
+        priority: Optional[Priority] = None,
+        timeout: Optional[float] = None
+    ) -> Any:
+        return self.submit(llm, messages, priority, timeout).result()
+
+    async def ainvoke(
+        self,
+        llm: Any,
+        messages: List[Any],
+        priority: Optional[Priority] = None,
+        timeout: Optional[float] = None
+    ) -> Any:
+        return await asyncio.wrap_future(self.submit(llm, messages, priority, timeout))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            self._prune(time.monotonic())
+            return {
+                "queued": len(self._heap),
+                "queued_interactive": sum(1 for job in self._heap if job.priority == Priority.INTERACTIVE),
+                "requests_last_minute": len(self._window),
+                "tokens_last_minute": sum(entry[1] for entry in self._window),
+                "paused_for": max(0.0, self._paused_until - time.monotonic()),
+                "backoff": self._backoff
+            }
+
+    def _ensure_dispatcher(self) -> None:
+        if self._dispatcher is None:
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True)
+            self._dispatcher.start()
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            self._slots.acquire()
+            with self._cond:
+                while True:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    # Always look at the current head so late interactive calls jump ahead
+                    wait = self._wait_time(self._heap[0].tokens)
+                    if wait > 0:
+                        self._cond.wait(wait)
+                        continue
+                    job = heapq.heappop(self._heap)
+                    if job.future.done():
+                        continue  # Cancelled or timed out while queued
+                    entry = [time.monotonic(), job.tokens]
+                    self._window.append(entry)
+                    break
+            threading.Thread(target=self._run, args=(job, entry), daemon=True).start()
+
+    def _run(self, job: _Job, entry: List[float]) -> None:
+        timer = None
+        if job.timeout:
+            timer = threading.Timer(
+                job.timeout,
+                job.resolve,
+                kwargs={"error": TimeoutError(f"LLM call exceeded {job.timeout}s")}
+            )
+            timer.daemon = True
+            timer.start()
+        try:
+            job.attempts += 1
+            response = job.llm.invoke(job.messages)
+        except Exception as e:
+            if is_rate_limited(e) and job.attempts <= self.max_retries and not job.future.done():
+                self._on_rate_limit(e, job)
+            else:
+                job.resolve(error=e)
+            return
+        finally:
+            if timer:
+                timer.cancel()
+            self._slots.release()
+
+        usage = getattr(response, "usage_metadata", None) or {}
+        with self._cond:
+            if usage.get("total_tokens"):
+                entry[1] = usage["total_tokens"]
+            self._backoff = max(1.0, self._backoff / 2)
+            self._cond.notify_all()
+        job.resolve(response)
+
+    def _on_rate_limit(self, error: Exception, job: _Job) -> None:
+        with self._cond:
+            delay = retry_after(error) or self._backoff * (1 + random.random())
+            self._backoff = min(self._backoff * 2, self.max_backoff)
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            heapq.heappush(self._heap, job)
+            self._cond.notify_all()
+        print(f"[Junior] LLM rate limited, pausing dispatch for {delay:.1f}s")
+
+    def _wait_time(self, tokens: int) -> float:
+        """Seconds until a call of this size fits in the current budgets"""
+        now = time.monotonic()
+        if now < self._paused_until:
+            return self._paused_until - now
+        self._prune(now)
+        if not self._window:
+            return 0.0  # Never block a call that is larger than the whole budget
+        used = sum(entry[1] for entry in self._window)
+        if len(self._window) < self.requests_per_minute and used + tokens <= self.tokens_per_minute:
+            return 0.0
+        return max(0.01, self._window[0][0] + 60.0 - now)
+
+    def _prune(self, now: float) -> None:
+        while self._window and self._window[0][0] <= now - 60.0:
+            self._window.popleft()
+
+    @staticmethod
+    def _estimate_tokens(llm: Any, messages: List[Any]) -> int:
+        """Rough prompt size (4 chars per token) plus the completion cap"""
+        prompt_chars = sum(len(str(getattr(message, "content", message))) for message in messages)
+        return prompt_chars // 4 + (getattr(llm, "max_tokens", None) or 1024)
+
+
+# Shared scheduler; the defaults are conservative, raise them to match the account tier.
+# The limits are per account, so with several workers each gets an equal share.
+_workers = worker_count()
+llm_scheduler = LLMScheduler(
+    requests_per_minute=max(1, int(os.getenv("LLM_REQUESTS_PER_MINUTE", "30")) // _workers),
+    tokens_per_minute=max(1, int(os.getenv("LLM_TOKENS_PER_MINUTE", "6000")) // _workers),
+    max_concurrency=max(1, int(os.getenv("LLM_MAX_CONCURRENCY", "4")) // _workers)
+)
@@ -3,13 +3,21 @@ from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional
 import yaml
-from core.ai_analyzer import AIAnalyzer
-from core.cache_manager import CacheManager
+from core.ai_analyzer import ai_analyzer
+from core.cache_manager import cache_manager
+from api.metrics_routes import router as metrics_router
+from api.trace_routes import router as trace_router
+from utils.tracing import trace_middleware, TRACE_ID_HEADER
+from core.upload_ingest import ArchiveError, analyze_entries, is_archive, iter_uploads, read_upload, UPLOAD_MAX_ENTRY_BYTES
+from inference.scheduler import llm_priority, Priority
 import os
 from github import Github
 from pathlib import Path
 
 app = FastAPI()
+app.include_router(metrics_router)
+app.include_router(trace_router)
+app.middleware("http")(trace_middleware)
 
 # Configure CORS
 app.add_middleware(
@@ -18,50 +26,66 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[TRACE_ID_HEADER],
 )
 
 class AnalysisRequest(BaseModel):
     code: str
     file_path: str
     context: Optional[str] = None
+    session_id: Optional[str] = None
+    project: Optional[str] = None
 
 class GitHubRepo(BaseModel):
     owner: str
     repo: str
     path: Optional[str] = None
 
-# Initialize components
-ai_analyzer = AIAnalyzer()
-cache_manager = CacheManager()
-
 @app.post("/analyze")
 async def analyze_code(request: AnalysisRequest):
     try:
-        result = await ai_analyzer.analyze_code(request.code, request.file_path)
+        if request.context:
+            cache_manager.add_to_context({"note": request.context}, request.session_id, request.project)
+        result = await ai_analyzer.analyze_code(
+            request.code,
+            request.file_path,
+            session_id=request.session_id,
+            project=request.project
+        )
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/upload")
-async def upload_file(file: UploadFile = File(...)):
+async def upload_file(file: Optional[UploadFile] = File(None), files: List[UploadFile] = File([])):
+    """Analyze uploaded files straight from the request buffers.
+
+    A single source file returns its analysis as before; several files or
+    zip/tar archives return per-file results, analysed concurrently and once
+    per distinct content.
+    """
+    uploads = ([file] if file else []) + files
+    if not uploads:
+        raise HTTPException(status_code=400, detail="No file uploaded")
     try:
-        # Save uploaded file temporarily
-        file_location = f"uploads/{file.filename}"
-        os.makedirs("uploads", exist_ok=True)
-        
-        with open(file_location, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-            
-        # Analyze the file
-        with open(file_location, "r") as f:
-            code = f.read()
-            result = await ai_analyzer.analyze_code(code, file_location)
-            
-        # Clean up
-        os.remove(file_location)
-        
-        return result
+        if len(uploads) == 1 and not is_archive(uploads[0].filename):
+            entry = read_upload(uploads[0].filename, uploads[0].file)
+            if entry.reason == "too_large":
+                raise HTTPException(status_code=413, detail=f"File exceeds {UPLOAD_MAX_ENTRY_BYTES} bytes")
+            if entry.reason:
+                raise HTTPException(status_code=415, detail="File is not UTF-8 text")
+            return await ai_analyzer.analyze_code(entry.text, f"uploads/{entry.name}")
+
+        async def analyze(code: str, name: str):
+            return await ai_analyzer.analyze_code(code, f"uploads/{name}")
+
+        # Archives can hold thousands of files; keep them behind interactive requests
+        with llm_priority(Priority.BULK):
+            return await analyze_entries(iter_uploads((u.filename, u.file) for u in uploads), analyze)
+    except HTTPException:
+        raise
+    except ArchiveError as e:
+        raise HTTPException(status_code=400, detail=f"Unreadable archive: {e}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -83,7 +107,8 @@ async def analyze_github_repo(repo: GitHubRepo):
                 file_content = repository.get_contents(content.path).decoded_content.decode()
                 analysis = await ai_analyzer.analyze_code(
                     file_content,
-                    content.path
+                    content.path,
+                    project=f"{repo.owner}/{repo.repo}"
                 )
                 results.append({
                     "file": content.path,
@@ -0,0 +1,141 @@
+import json
+import sqlite3
+import pytest
+from core.analysis_sink import AnalysisSink
+
+
+def make_sink(tmp_path, **kwargs):
+    options = dict(
+        url=f"sqlite:///{tmp_path / 'sink.db'}",
+        user_id="user-1",
+        batch_size=4,
+        flush_seconds=0.05,
+        spool_path=str(tmp_path / "spool.jsonl"),
+        dead_letter_path=str(tmp_path / "dead.jsonl")
+    )
+    options.update(kwargs)
+    return AnalysisSink(**options)
+
+
+def stored_rows(tmp_path):
+    conn = sqlite3.connect(tmp_path / "sink.db")
+    try:
+        return conn.execute("SELECT user_id, code, context, analysis FROM code_analysis ORDER BY code").fetchall()
+    finally:
+        conn.close()
+
+
+def spooled_lines(path):
+    try:
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+@pytest.fixture
+def sink(tmp_path):
+    sink = make_sink(tmp_path)
+    yield sink
+    sink.close()
+
+
+def test_disabled_without_url_or_user(tmp_path):
+    assert not AnalysisSink(url="", user_id="user-1").enabled
+    assert not AnalysisSink(url=f"sqlite:///{tmp_path / 'sink.db'}", user_id="").enabled
+
+
+def test_rows_are_written_in_batches(sink, tmp_path):
+    batches = []
+    write = sink.backend.write
+    sink.backend.write = lambda rows: (batches.append(len(rows)), write(rows))
+
+    for i in range(10):
+        sink.submit(f"code{i:02d}", {"bugs": [i]}, context=f"file{i}.py")
+    assert sink.flush(timeout=5)
+
+    rows = stored_rows(tmp_path)
+    assert len(rows) == 10
+    assert rows[0] == ("user-1", "code00", "file0.py", json.dumps({"bugs": [0]}))
+    assert sum(batches) == 10 and max(batches) <= 4 and len(batches) < 10
+
+
+def test_failed_writes_are_spooled_and_replayed(sink, tmp_path):
+    write = sink.backend.write
+
+    def down(rows):
+        raise sqlite3.OperationalError("database is locked")
+
+    sink.backend.write = down
+    for i in range(3):
+        sink.submit(f"code{i}", {})
+    assert sink.flush(timeout=5)
+    assert len(spooled_lines(sink.spool.path)) == 3
+
+    sink.backend.write = write
+    sink._retry_at = 0.0
+    sink.submit("code3", {})
+    assert sink.flush(timeout=5)
+
+    assert [row[1] for row in stored_rows(tmp_path)] == ["code0", "code1", "code2", "code3"]
+    assert not sink.spool.pending()
+
+
+def test_rejected_rows_are_dead_lettered_not_retried(sink, tmp_path):
+    sink.submit("good", {})
+    sink.submit(None, {})  # violates code NOT NULL
+    sink.submit("also good", {})
+    assert sink.flush(timeout=5)
+
+    assert [row[1] for row in stored_rows(tmp_path)] == ["also good", "good"]
+    assert [row[1] for row in spooled_lines(sink.dead_letter.path)] == [None]
+    assert not sink.spool.pending()
+
+
+def test_full_buffer_spills_to_the_spool(tmp_path):
+    sink = make_sink(tmp_path, buffer_size=2)
+    sink._ensure_writer = lambda: None  # keep the buffer from draining
+    for i in range(5):
+        sink.submit(f"code{i}", {})
+
+    assert sink.depth() == 2
+    assert [row[1] for row in spooled_lines(sink.spool.path)] == ["code2", "code3", "code4"]
+
+    # close() writes what is buffered, then replays the spool
+    sink.close()
+    assert len(stored_rows(tmp_path)) == 5
+
+
+def test_full_spool_drops_rows(tmp_path):
+    sink = make_sink(tmp_path, spool_max_bytes=1)
+    assert sink.spool.append([("user-1", "a", None, "{}", None, "t")]) == 1
+    assert sink.spool.append([("user-1", "b", None, "{}", None, "t")]) == 0
+    assert [row[1] for row in spooled_lines(sink.spool.path)] == ["a"]
+
+
+def test_replay_streams_batches_without_blocking_appends(sink, tmp_path):
+    sink.spool.append([("user-1", f"code{i}", None, "{}", None, "t") for i in range(10)])
+    batches = []
+
+    def write(rows):
+        batches.append(len(rows))
+        # Would deadlock if the replay held the append lock during writes
+        sink.spool.append([("user-1", "late", None, "{}", None, "t")])
+
+    assert sink.spool.replay(write, batch_size=4) == 10
+    assert batches == [4, 4, 2]
+    assert [row[1] for row in spooled_lines(sink.spool.path)] == ["late"] * 3
+
+
+def test_replay_keeps_unwritten_rows_after_a_failure(sink):
+    sink.spool.append([("user-1", f"code{i}", None, "{}", None, "t") for i in range(10)])
+    calls = []
+
+    def write(rows):
+        calls.append(rows)
+        if len(calls) == 2:
+            raise sqlite3.OperationalError("disk I/O error")
+
+    with pytest.raises(sqlite3.OperationalError):
+        sink.spool.replay(write, batch_size=4)
+    assert [row[1] for row in spooled_lines(sink.spool.path)] == [f"code{i}" for i in range(4, 10)]
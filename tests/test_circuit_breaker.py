@@ -0,0 +1,75 @@
+import asyncio
+import pytest
+from inference.circuit_breaker import CircuitBreaker
+
+
+def fail(breaker):
+    with pytest.raises(ValueError):
+        with breaker.attempt():
+            raise ValueError("upstream down")
+
+
+def half_open(breaker):
+    fail(breaker)
+    breaker._opened_at -= breaker.reset_timeout
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+
+
+def test_opens_after_threshold_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    assert breaker.allow()
+    fail(breaker)
+    assert breaker.state == "closed" and breaker.allow()
+    fail(breaker)
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    fail(breaker)
+    with breaker.attempt():
+        pass
+    fail(breaker)
+    assert breaker.state == "closed"
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    half_open(breaker)
+    assert not breaker.allow()  # Only one probe at a time
+
+    with breaker.attempt():
+        pass
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_failed_probe_reopens_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    breaker.failures = 2
+    half_open(breaker)
+    fail(breaker)
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_cancelled_probe_frees_the_probe_slot():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    half_open(breaker)
+
+    async def probe():
+        with breaker.attempt():
+            await asyncio.sleep(10)
+
+    async def cancel_probe():
+        task = asyncio.create_task(probe())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_probe())
+    # Not counted as a failure, and the next call may probe again
+    assert breaker.state == "half_open" and breaker.failures == 1
+    assert breaker.allow()
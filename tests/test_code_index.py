@@ -0,0 +1,59 @@
+import zlib
+import numpy as np
+import pytest
+from core.code_index import CodeIndex, chunk_python
+
+SHARED = "def parse_config(path):\n    return open(path).read()\n"
+
+
+def fake_embed(texts):
+    vectors = []
+    for text in texts:
+        rng = np.random.default_rng(zlib.crc32(text.encode()))
+        vector = rng.standard_normal(16).astype(np.float32)
+        vectors.append(vector / np.linalg.norm(vector))
+    return np.vstack(vectors)
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    monkeypatch.setattr(CodeIndex, "_embed", staticmethod(fake_embed))
+    index = CodeIndex(tmp_path / "code_index.db")
+    index.index_file(str(tmp_path / "a" / "config.py"), SHARED, "python", root=str(tmp_path / "a"))
+    index.index_file(str(tmp_path / "b" / "other.py"), "def unrelated():\n    pass\n", "python", root=str(tmp_path / "b"))
+    return index
+
+
+def test_chunks_from_another_root_are_never_returned(index, tmp_path):
+    snippet = "settings = parse_config('x.toml')"
+    assert "parse_config" in index.related_context(snippet, str(tmp_path / "a" / "main.py"))
+
+    b_file = str(tmp_path / "b" / "main.py")
+    assert index.root_for(b_file) == str(tmp_path / "b")
+    assert "parse_config" not in index.related_context(snippet, b_file, k=10)
+    assert all(c["path"].startswith(str(tmp_path / "b")) for c in index.search(snippet, str(tmp_path / "b"), k=10))
+    assert index.lookup(["parse_config"], str(tmp_path / "b")) == []
+
+
+def test_files_outside_every_root_get_no_context(index, tmp_path):
+    snippet = "settings = parse_config('x.toml')"
+    assert index.root_for("uploads/config.py") is None
+    assert index.related_context(snippet, "uploads/config.py") == ""
+    assert index.related_context(snippet, str(tmp_path / "elsewhere" / "main.py")) == ""
+
+
+def test_python_chunks_start_at_the_first_decorator():
+    code = (
+        "@app.route(\n"
+        "    '/items',\n"
+        "    methods=['GET'],\n"
+        ")\n"
+        "# cached for a minute\n"
+        "\n"
+        "@cache(60)\n"
+        "def items():\n"
+        "    return []\n"
+    )
+    [chunk] = chunk_python(code)
+    assert chunk["start_line"] == 1
+    assert chunk["text"].startswith("@app.route(")
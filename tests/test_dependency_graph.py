@@ -0,0 +1,16 @@
+from core.dependency_graph import module_names, js_import_candidates
+
+
+def test_python_index_module_is_not_its_package(tmp_path):
+    pkg = tmp_path / "pkg"
+    names = module_names(str(pkg / "index.py"))
+    assert "index" in names and "pkg" not in names
+    assert "pkg" in module_names(str(pkg / "__init__.py"))
+
+
+def test_js_index_file_is_its_directory(tmp_path):
+    app = str(tmp_path / "src" / "app.js")
+    [candidate] = js_import_candidates(app, "./components")
+    assert candidate.endswith("src.components")
+    assert candidate in module_names(str(tmp_path / "src" / "components" / "index.js"))
+    assert candidate in module_names(str(tmp_path / "src" / "components" / "index.ts"))
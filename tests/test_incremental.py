@@ -0,0 +1,17 @@
+from core.incremental import diff_lines, enclosing_regions
+
+DECORATED = (
+    "@app.route(\n"
+    "    '/items',\n"
+    ")\n"
+    "# cached for a minute\n"
+    "@cache(60)\n"
+    "def items():\n"
+    "    return []\n"
+)
+
+
+def test_region_starts_at_the_first_decorator():
+    edited = DECORATED.replace("return []", "return [1]")
+    _, hunks = diff_lines(DECORATED, edited)
+    assert enclosing_regions(edited, hunks, "python") == [(1, 7)]
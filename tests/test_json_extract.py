@@ -0,0 +1,40 @@
+import time
+from utils.json_extract import JSONExtractor, extract_json
+
+
+def test_prose_fences_and_trailing_commas_are_tolerated():
+    assert extract_json('```json\n{"a": [1, 2,],}\n```', dict) == ({"a": [1, 2]}, "ok")
+    assert extract_json('Here you go: {"bugs": []} Hope that helps {"x": 1}', dict) == ({"bugs": []}, "ok")
+
+
+def test_brackets_that_are_not_the_wanted_json_are_rescanned():
+    assert extract_json('Returns list[int]. Result: {"bugs": ["x"]}', dict) == ({"bugs": ["x"]}, "ok")
+    assert extract_json('[3] issues found: {"ok": true}', dict) == ({"ok": True}, "ok")
+    assert extract_json('[1, 2] then {"a": 1}', list) == ([1, 2], "ok")
+
+
+def test_truncated_output_is_repaired():
+    # The partial last string is kept and the containers closed
+    assert extract_json('{"bugs": ["line 3 is', dict) == ({"bugs": ["line 3 is"]}, "repaired")
+    # A dangling key is cut back to the last complete element
+    assert extract_json('{"bugs": ["a", "b"], "sec', dict) == ({"bugs": ["a", "b"]}, "repaired")
+
+
+def test_no_json_fails():
+    assert extract_json("no json here", dict) == (None, "failed")
+    assert extract_json("", dict) == (None, "failed")
+
+
+def test_chunks_can_be_fed_as_they_stream():
+    extractor = JSONExtractor(dict)
+    for chunk in ['Sure: {"a"', ": [1, ", "2]}", " and more"]:
+        extractor.feed(chunk)
+    assert extractor.complete
+    assert extractor.result() == ({"a": [1, 2]}, "ok")
+
+
+def test_deeply_nested_prose_brackets_stay_bounded():
+    started = time.monotonic()
+    value, status = extract_json("[" * 3000 + '{"a": 1}', dict)
+    assert time.monotonic() - started < 5
+    assert status in ("ok", "repaired", "failed")
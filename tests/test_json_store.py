@@ -0,0 +1,37 @@
+from utils.json_store import JsonStore
+
+
+def test_deferred_writes_merge_with_another_writer(tmp_path):
+    path = str(tmp_path / "store.json")
+    first = JsonStore(path, flush_interval=60)
+    second = JsonStore(path, flush_interval=60)
+
+    with first.transaction() as data:
+        data["kept"] = 1
+        data["deleted"] = 0
+    first.flush()
+
+    with second.transaction() as data:
+        data["second"] = 2
+        del data["deleted"]
+    with first.transaction() as data:
+        data["first"] = 3
+    second.flush()
+    first.flush()
+
+    assert JsonStore(path).read() == {"kept": 1, "first": 3, "second": 2}
+
+
+def test_our_pending_change_wins_on_the_same_key(tmp_path):
+    path = str(tmp_path / "store.json")
+    first = JsonStore(path, flush_interval=60)
+    second = JsonStore(path, flush_interval=60)
+
+    with first.transaction() as data:
+        data["key"] = "first"
+    with second.transaction() as data:
+        data["key"] = "second"
+    second.flush()
+    first.flush()
+
+    assert JsonStore(path).read() == {"key": "first"}
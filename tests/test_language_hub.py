@@ -0,0 +1,25 @@
+import copy
+from core.language_hub import DEFAULT_CONFIG, LanguageHub
+
+
+def make_hub(config):
+    hub = LanguageHub.__new__(LanguageHub)
+    hub.config = config
+    hub.extension_index = hub._build_extension_index()
+    return hub
+
+
+def test_disabled_languages_do_not_resolve():
+    hub = make_hub(copy.deepcopy(DEFAULT_CONFIG))
+    assert hub.get_language_for_path("src/Main.java") == "unknown"
+    assert hub.get_language_for_path("src/main.cpp") == "unknown"
+    assert hub.get_language_for_path("src/main.py") == "python"
+
+
+def test_config_file_can_enable_or_disable_a_language():
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    config["registered_languages"]["java"]["enabled"] = True
+    config["registered_languages"]["typescript"]["enabled"] = False
+    hub = make_hub(config)
+    assert hub.get_language_for_path("Main.JAVA") == "java"
+    assert hub.get_language_for_path("app.ts") == "unknown"
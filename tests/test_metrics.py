@@ -0,0 +1,36 @@
+import os
+from utils.metrics import MetricsRegistry
+
+
+def test_samples_carry_the_worker_pid():
+    registry = MetricsRegistry()
+    registry.counter("test_requests_total", "Requests", ("site",)).inc(site="a")
+    registry.histogram("test_seconds", "Latency", buckets=(1.0,)).observe(0.5)
+    registry.gauge("test_depth", "Depth", lambda: 3)
+
+    worker = f'worker="{os.getpid()}"'
+    text = registry.render()
+    assert f'test_requests_total{{site="a",{worker}}} 1.0' in text
+    assert f'test_seconds_bucket{{{worker},le="1.0"}} 1' in text
+    assert f"test_seconds_count{{{worker}}} 1" in text
+    assert f"test_depth{{{worker}}} 3.0" in text
+
+
+def test_forked_worker_starts_from_zero_under_its_own_pid():
+    registry = MetricsRegistry()
+    counter = registry.counter("test_forked_total", "Requests")
+    counter.inc(5)
+
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        counter.inc()
+        os.write(write, registry.render().encode())
+        os._exit(0)
+    os.close(write)
+    os.waitpid(pid, 0)
+    with os.fdopen(read) as f:
+        child = f.read()
+
+    assert f'test_forked_total{{worker="{pid}"}} 1.0' in child
+    assert counter.value() == 5
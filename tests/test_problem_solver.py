@@ -0,0 +1,56 @@
+import threading
+import pytest
+
+pytest.importorskip("langchain_openai")
+pytest.importorskip("dotenv")
+
+from core import problem_solver
+from core.problem_solver import cached_result
+
+
+@pytest.fixture
+def long_term(monkeypatch):
+    store = {}
+    monkeypatch.setattr(problem_solver.cache_manager, "get", lambda key, level: store.get(key))
+    monkeypatch.setattr(problem_solver.cache_manager, "set", lambda key, value, level, ttl: store.__setitem__(key, value))
+    return store
+
+
+def test_concurrent_identical_requests_compute_once(long_term):
+    calls, started, release = [], threading.Event(), threading.Event()
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"solution": "x"}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cached_result("key", compute, bool))) for _ in range(5)]
+    threads[0].start()
+    assert started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    # Late arrivals may find the persisted result instead of waiting on the call
+    assert len(results) == 5 and all(result["solution"] == "x" for result in results)
+    assert cached_result("key", compute, bool) == {"solution": "x", "cached": True}
+
+
+def test_invalid_results_are_not_persisted(long_term):
+    assert cached_result("key", lambda: {}, bool) == {}
+    assert "key" not in long_term
+
+
+def test_failures_reach_every_waiter_and_are_not_cached(long_term):
+    def compute():
+        raise RuntimeError("LLM down")
+
+    with pytest.raises(RuntimeError):
+        cached_result("key", compute, bool)
+    assert not problem_solver._inflight
+    assert cached_result("key", lambda: {"solution": "y"}, bool) == {"solution": "y"}
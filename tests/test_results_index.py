@@ -0,0 +1,63 @@
+import json
+import sqlite3
+from core.results_index import ResultsIndex
+
+ANALYSIS = {
+    "timestamp": 100.0,
+    "syntax_errors": [{"type": "syntax", "severity": "error", "line": 2, "message": "invalid syntax"}],
+    "linting_issues": [],
+    "ai_analysis": {
+        "bugs": ["Off-by-one in the loop on line 7"],
+        "security": [{"message": "eval on user input", "severity": "error", "line": 3}],
+        "documentation": [],
+        "changed_regions": [{"start_line": 1, "end_line": 4, "analysis": {}}]
+    }
+}
+
+
+def test_detector_and_ai_findings_are_indexed(tmp_path):
+    index = ResultsIndex(tmp_path / "results.db")
+    index.record("/repo/a.py", ANALYSIS)
+
+    issues, total = index.query(source="ai")
+    assert total == 2
+    assert {(i["type"], i["severity"], i["line"]) for i in issues} == {("bug", "warning", 7), ("security", "error", 3)}
+    assert index.query(error_type="syntax")[1] == 1
+    assert index.query(severity="error")[1] == 2
+
+    summary = index.summary()
+    assert summary["issues"] == 3
+    assert summary["by_source"] == {"ai": 2, "detector": 1}
+
+
+def test_prose_replies_are_indexed_from_their_sections(tmp_path):
+    index = ResultsIndex(tmp_path / "results.db")
+    index.record("/repo/b.py", {"timestamp": 1.0, "ai_analysis": {"raw_analysis": "...", "parsed": {"performance": ["slow loop"]}}})
+    issues, total = index.query(error_type="performance")
+    assert total == 1 and issues[0]["message"] == "slow loop"
+
+
+def test_remove_drops_the_file_and_its_issues(tmp_path):
+    index = ResultsIndex(tmp_path / "results.db")
+    index.record("/repo/a.py", ANALYSIS)
+    version = index.version
+    assert index.remove("/repo/a.py")
+    assert index.get_file("/repo/a.py") is None
+    assert index.query()[1] == 0
+    assert index.version == version + 1
+    assert not index.remove("/repo/a.py")
+
+
+def test_older_index_is_reindexed_with_ai_findings(tmp_path):
+    conn = sqlite3.connect(tmp_path / "results.db")
+    conn.executescript("""
+        CREATE TABLE files (path TEXT PRIMARY KEY, updated_at REAL, analysis TEXT);
+        CREATE TABLE issues (path TEXT, updated_at REAL, severity TEXT, type TEXT,
+                             line INTEGER, column INTEGER, code TEXT, message TEXT);
+    """)
+    conn.execute("INSERT INTO files VALUES (?, ?, ?)", ("/repo/a.py", 100.0, json.dumps(ANALYSIS)))
+    conn.commit()
+    conn.close()
+
+    index = ResultsIndex(tmp_path / "results.db")
+    assert index.summary()["by_source"] == {"ai": 2, "detector": 1}
@@ -0,0 +1,27 @@
+import pytest
+from core.cache_manager import ContextCache
+
+
+@pytest.mark.parametrize("compact_after", [1000, 2])
+def test_windows_survive_a_restart(tmp_path, compact_after):
+    path = tmp_path / "context.jsonl"
+    cache = ContextCache(path, max_context=5, compact_after=compact_after)
+    cache.set_window("session", 2)
+    for i in range(4):
+        cache.add({"i": i}, "session")
+    cache.flush()
+
+    reloaded = ContextCache(path, max_context=5)
+    assert reloaded.windows == {"session": 2}
+    assert [e["data"]["i"] for e in reloaded.entries("session")] == [2, 3]
+    reloaded.add({"i": 4}, "session")
+    assert [e["data"]["i"] for e in reloaded.entries("session")] == [3, 4]
+
+
+def test_window_is_dropped_with_its_evicted_key(tmp_path):
+    cache = ContextCache(tmp_path / "context.jsonl", max_context=5, max_keys=2)
+    cache.set_window("old", 1)
+    cache.add({}, "b")
+    cache.add({}, "c")
+    assert "old" not in cache.buffers
+    assert cache.windows == {}
@@ -0,0 +1,68 @@
+import threading
+import pytest
+from inference.scheduler import LLMScheduler, Priority
+
+
+class FakeLLM:
+    max_tokens = 10
+
+    def __init__(self, replies=()):
+        self.calls = []
+        self.replies = list(replies)
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def invoke(self, messages):
+        self.calls.append(messages[0])
+        self.started.set()
+        if messages[0] == "blocker":
+            self.release.wait(5)
+        if self.replies:
+            reply = self.replies.pop(0)
+            if isinstance(reply, Exception):
+                raise reply
+        return f"reply to {messages[0]}"
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+def test_interactive_calls_jump_ahead_of_queued_bulk_calls():
+    scheduler = LLMScheduler(requests_per_minute=100, tokens_per_minute=100_000, max_concurrency=1)
+    llm = FakeLLM()
+    blocker = scheduler.submit(llm, ["blocker"], Priority.BULK)
+    assert llm.started.wait(5)
+
+    bulk = scheduler.submit(llm, ["bulk"], Priority.BULK)
+    interactive = scheduler.submit(llm, ["interactive"], Priority.INTERACTIVE)
+    llm.release.set()
+
+    assert interactive.result(5) == "reply to interactive"
+    assert bulk.result(5) == "reply to bulk"
+    assert blocker.result(5) == "reply to blocker"
+    assert llm.calls == ["blocker", "interactive", "bulk"]
+
+
+def test_rate_limited_call_is_retried_after_a_pause():
+    scheduler = LLMScheduler(requests_per_minute=100, tokens_per_minute=100_000, max_backoff=0.05)
+    scheduler._backoff = 0.01
+    llm = FakeLLM([RateLimited("429 Too Many Requests")])
+    assert scheduler.invoke(llm, ["hello"]) == "reply to hello"
+    assert llm.calls == ["hello", "hello"]
+
+
+def test_other_errors_are_not_retried():
+    scheduler = LLMScheduler(requests_per_minute=100, tokens_per_minute=100_000)
+    llm = FakeLLM([ValueError("bad request")])
+    with pytest.raises(ValueError):
+        scheduler.invoke(llm, ["hello"])
+    assert llm.calls == ["hello"]
+
+
+def test_timeout_counts_from_dispatch():
+    scheduler = LLMScheduler(requests_per_minute=100, tokens_per_minute=100_000)
+    llm = FakeLLM()
+    with pytest.raises(TimeoutError):
+        scheduler.invoke(llm, ["blocker"], timeout=0.05)
+    llm.release.set()
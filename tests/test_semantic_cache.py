@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from core.semantic_cache import SemanticCache
+
+ERROR = {"type": "lint", "code": "W0611", "message": "Unused import: os"}
+
+
+def embed(error, code_context):
+    # Same vector for findings that normalize alike, unrelated ones for the rest
+    seed = sum(map(ord, code_context)) % 1000
+    vector = np.random.default_rng(seed).standard_normal(8).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+@pytest.fixture
+def make_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(SemanticCache, "_embed", staticmethod(embed))
+    return lambda **kwargs: SemanticCache(tmp_path / "semantic_cache.db", **kwargs)
+
+
+def test_similar_finding_reuses_the_fix(make_cache):
+    cache = make_cache()
+    cache.add(ERROR, "import os", "Remove the import.")
+    hit = cache.lookup(dict(ERROR, message="Unused import: sys"), "import os")
+    assert hit.endswith("Remove the import.")
+    assert cache.lookup(ERROR, "something else entirely") is None
+    assert cache.lookup(dict(ERROR, code="W0612"), "import os") is None
+
+
+def test_oldest_entries_are_trimmed_per_rule(make_cache):
+    cache = make_cache(max_per_rule=2)
+    for i in range(4):
+        cache.add(ERROR, f"context {i}", f"fix {i}")
+    assert cache.lookup(ERROR, "context 0") is None
+    assert cache.lookup(ERROR, "context 3").endswith("fix 3")
+    assert cache.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0] == 2
+
+
+def test_writes_from_another_process_are_seen(make_cache):
+    reader, writer = make_cache(max_per_rule=1), make_cache(max_per_rule=1)
+    writer.add(ERROR, "context a", "fix a")
+    assert reader.lookup(ERROR, "context a").endswith("fix a")
+
+    # Trim plus add leaves the row count unchanged; the reader must still notice
+    writer.add(ERROR, "context b", "fix b")
+    assert reader.lookup(ERROR, "context a") is None
+    assert reader.lookup(ERROR, "context b").endswith("fix b")
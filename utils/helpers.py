@@ -1,34 +1,60 @@
 import json
 import os
 import ast
+from utils import json_store
 
 def detect_language(file_path):
-    ext = os.path.splitext(file_path)[1]
-    return {
-        ".py": "python",
-        ".js": "javascript",
-        ".ts": "typescript",
-        ".java": "java",
-        ".cpp": "cpp",
-    }.get(ext, "unknown")
+    # Imported lazily so utils stays importable without the core package
+    from core.language_hub import language_hub
+    return language_hub.get_language_for_path(file_path)
+
+def extract_python_symbols(code):
+    """Imports (including from-imports and aliases) and definitions of a module"""
+    tree = ast.parse(code)
+    imports = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                imports.append({"module": alias.name, "name": None, "alias": alias.asname, "level": 0})
+        elif isinstance(node, ast.ImportFrom):
+            for alias in node.names:
+                imports.append({"module": node.module or "", "name": alias.name, "alias": alias.asname, "level": node.level})
+    funcs = [node.name for node in ast.walk(tree) if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))]
+    classes = [node.name for node in ast.walk(tree) if isinstance(node, ast.ClassDef)]
+    # Public top-level API: what dependents can see, with argument names
+    api = {}
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and not node.name.startswith("_"):
+            api[node.name] = ast.unparse(node.args)
+        elif isinstance(node, ast.ClassDef) and not node.name.startswith("_"):
+            api[node.name] = sorted(
+                f"{item.name}({ast.unparse(item.args)})"
+                for item in node.body
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef))
+                and (not item.name.startswith("_") or item.name == "__init__")
+            )
+    return {"imports": imports, "functions": funcs, "classes": classes, "api": api}
+
+def _describe_import(imp):
+    target = f"{'.' * imp['level']}{imp['module']}"
+    if imp["name"]:
+        target = f"{target}.{imp['name']}" if imp["module"] else f"{target}{imp['name']}"
+    return f"{target} as {imp['alias']}" if imp["alias"] else target
 
 def extract_python_metadata(code):
     try:
-        tree = ast.parse(code)
-        imports = [node.names[0].name for node in tree.body if isinstance(node, ast.Import)]
-        funcs = [node.name for node in ast.walk(tree) if isinstance(node, ast.FunctionDef)]
-        classes = [node.name for node in ast.walk(tree) if isinstance(node, ast.ClassDef)]
-        summary = f"Imports: {', '.join(imports)}; Functions: {', '.join(funcs)}; Classes: {', '.join(classes)}"
+        symbols = extract_python_symbols(code)
+        imports = [_describe_import(imp) for imp in symbols["imports"]]
+        summary = f"Imports: {', '.join(imports)}; Functions: {', '.join(symbols['functions'])}; Classes: {', '.join(symbols['classes'])}"
         return summary
     except Exception as e:
         return f"Could not parse Python code: {e}"
-def load_json(path):
+def load_json(path, default=None):
+    """Read a JSON file; prefer utils.json_store.get_store for shared state files"""
     if os.path.exists(path):
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {}
+        with open(path, "rb") as f:
+            return json_store.loads(f.read())
+    return {} if default is None else default
     
 def save_json(path, data):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
-        
\ No newline at end of file
+    json_store.atomic_write(path, data)
@@ -0,0 +1,169 @@
+import json
+from typing import Any, List, Optional, Tuple, Union
+
+_OPENERS = {"{": "}", "[": "]"}
+# Deeply nested brackets (e.g. from prose) can exhaust the decoder's recursion limit
+_PARSE_ERRORS = (json.JSONDecodeError, RecursionError)
+# Rescans from inside a rejected span before the rest of that span is just skipped
+MAX_RESCANS = 32
+
+
+class JSONExtractor:
+    """Incrementally pulls the first JSON object or array out of model output.
+
+    Text before the JSON (prose, a ```json fence) is skipped, and anything after
+    the top-level value closes is ignored. A bracketed span that is not valid
+    JSON of a wanted type (``list[int]``, ``[3] issues``) is given up on and
+    scanning resumes just after its opening bracket. Chunks can be fed as they
+    stream in, since scanner state carries over between ``feed`` calls.
+    ``result`` can be called at any point: truncated output is repaired by
+    closing the open string and containers, or by cutting back to the last
+    complete element when that is not enough.
+    """
+
+    def __init__(self, want: Union[type, Tuple[type, ...]] = (dict, list)):
+        self.want = want
+        self._rescans = 0
+        self._reset()
+        self._value: Any = None
+        self._done = False
+
+    def _reset(self) -> None:
+        # Unmodified text from the current opening bracket, to rescan from if it is not JSON
+        self._raw: List[str] = []
+        self._chars: List[str] = []
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._started = False
+        # (length of _chars, open containers) after the last complete element
+        self._safe: Optional[Tuple[int, Tuple[str, ...]]] = None
+
+    @property
+    def complete(self) -> bool:
+        return self._done
+
+    def feed(self, text: str) -> None:
+        pos = 0
+        while pos < len(text) and not self._done:
+            char = text[pos]
+            pos += 1
+            if not self._started:
+                if char in _OPENERS:
+                    self._started = True
+                    self._raw.append(char)
+                    self._open(char)
+                continue
+            self._raw.append(char)
+            if self._in_string:
+                self._chars.append(char)
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if char == '"':
+                self._in_string = True
+                self._chars.append(char)
+            elif char in _OPENERS:
+                self._open(char)
+            elif char in "}]":
+                if self._close() and not self._accept():
+                    # Not the JSON we want: rescan from just after its opening bracket
+                    if self._rescans < MAX_RESCANS:
+                        self._rescans += 1
+                        text = "".join(self._raw[1:]) + text[pos:]
+                        pos = 0
+                    self._reset()
+            elif char == ",":
+                self._safe = (len(self._chars), tuple(self._stack))
+                self._chars.append(char)
+            else:
+                self._chars.append(char)
+
+    def _open(self, char: str) -> None:
+        self._chars.append(char)
+        self._stack.append(_OPENERS[char])
+        self._safe = (len(self._chars), tuple(self._stack))
+
+    def _close(self) -> bool:
+        """Close the innermost container; True once the top-level value is closed"""
+        self._strip_trailing_comma()
+        self._chars.append(self._stack.pop())
+        if not self._stack:
+            return True
+        self._safe = (len(self._chars), tuple(self._stack))
+        return False
+
+    def _accept(self) -> bool:
+        try:
+            value = json.loads("".join(self._chars))
+        except _PARSE_ERRORS:
+            return False
+        if not isinstance(value, self.want):
+            return False
+        self._value, self._done = value, True
+        return True
+
+    def _strip_trailing_comma(self) -> None:
+        # Models often leave a comma before a closing bracket
+        end = len(self._chars)
+        while end and self._chars[end - 1].isspace():
+            end -= 1
+        if end and self._chars[end - 1] == ",":
+            del self._chars[end - 1:]
+
+    def result(self) -> Tuple[Any, str]:
+        """(value, status): status is "ok", "repaired" (truncated output) or "failed" (no JSON)"""
+        extractor = self
+        for _ in range(MAX_RESCANS + 1):
+            if extractor._done:
+                return extractor._value, "ok"
+            if not extractor._started:
+                return None, "failed"
+            value = extractor._repair()
+            if value is not None:
+                return value, "repaired"
+            # An unclosed bracket in prose may hide the real JSON after it
+            rest = JSONExtractor(self.want)
+            rest.feed("".join(extractor._raw[1:]))
+            extractor = rest
+        return None, "failed"
+
+    def _repair(self) -> Any:
+        text = "".join(self._chars)
+        # Keep the partial last string, which is often most of a useful sentence
+        closed = text
+        if self._in_string:
+            closed = closed[:-1] if self._escape else closed
+            closed += '"'
+        candidates = [closed.rstrip().rstrip(",") + "".join(reversed(self._stack))]
+        if self._safe is not None:
+            length, stack = self._safe
+            candidates.append(text[:length].rstrip().rstrip(",") + "".join(reversed(stack)))
+        for candidate in candidates:
+            try:
+                value = json.loads(candidate)
+            except _PARSE_ERRORS:
+                continue
+            if isinstance(value, self.want):
+                return value
+        return None
+
+
+def strip_fences(text: str) -> str:
+    """Drop a leading ```json fence and a trailing ``` from a model reply"""
+    text = (text or "").strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+    if text.endswith("```"):
+        text = text[:-3]
+    return text
+
+
+def extract_json(text: str, want: Union[type, Tuple[type, ...]] = (dict, list)) -> Tuple[Any, str]:
+    extractor = JSONExtractor(want)
+    extractor.feed(text or "")
+    return extractor.result()
@@ -0,0 +1,215 @@
+import os
+import json
+import atexit
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+from utils.tracing import span
+from utils.workers import after_fork, shared_cache_enabled
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(data: Any) -> bytes:
+    """Serialize state compactly, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def loads(raw: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def atomic_write(path: str, data: Any) -> None:
+    """Write JSON to a temp file in the same directory and rename it into place"""
+    atomic_write_bytes(path, dumps(data))
+
+
+def atomic_write_bytes(path: str, raw: bytes) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class JsonStore:
+    """A JSON state file shared between the API and the watcher thread.
+
+    Reads are served from memory while the file's mtime and size are unchanged.
+    ``transaction`` holds a thread lock plus an advisory ``flock`` on a sidecar
+    lock file, reloads the file if another writer changed it, and yields the
+    data for in-place mutation. With ``flush_interval`` > 0 the write is
+    deferred and coalesced with later transactions in the same process. If
+    another process writes the file in the meantime, the pending changes are
+    re-applied on top of its version, per top-level key, under the ``flock``.
+    """
+
+    def __init__(self, path: str, default: Callable[[], Any] = dict, flush_interval: float = 0.0):
+        self.path = path
+        self.default = default
+        # With several workers a deferred write could overwrite another worker's update
+        self.flush_interval = 0.0 if shared_cache_enabled() else flush_interval
+        self._data: Any = None
+        self._stamp: Optional[tuple] = None
+        # The file as last loaded or written, to tell our pending changes from another writer's
+        self._base: Optional[bytes] = None
+        self._dirty = False
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        after_fork(self._after_fork)
+
+    def _after_fork(self) -> None:
+        # The parent's flush timer does not exist in a forked child
+        self._lock = threading.RLock()
+        self._timer = None
+        if self._dirty:
+            self._schedule_flush()
+
+    def read(self) -> Any:
+        """Return the current data; treat the result as read-only"""
+        with self._lock:
+            self._refresh()
+            return self._data
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.read().get(key, default)
+
+    @contextmanager
+    def transaction(self) -> Iterator[Any]:
+        """Locked read-modify-write of the whole document"""
+        with self._lock, self._file_lock():
+            self._refresh()
+            try:
+                yield self._data
+            except BaseException:
+                if not self._dirty:
+                    self._data = None  # Drop partial edits; reload on next access
+                raise
+            self._dirty = True
+            if self.flush_interval > 0:
+                self._schedule_flush()
+            else:
+                self._write()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._timer = None
+            if self._dirty:
+                with self._file_lock():
+                    self._refresh()
+                    self._write()
+
+    def _refresh(self) -> None:
+        stamp = self._current_stamp()
+        if self._data is not None and stamp == self._stamp:
+            return
+        if self._dirty:
+            # Another process wrote the file while our changes were pending
+            self._merge(*self._load(stamp), stamp)
+            return
+        self._data, self._base = self._load(stamp)
+        self._stamp = stamp
+
+    def _load(self, stamp: Optional[tuple]) -> Tuple[Any, Optional[bytes]]:
+        if stamp is None:
+            return self.default(), None
+        try:
+            with span("json_store.load", path=self.path), open(self.path, "rb") as f:
+                raw = f.read()
+            return loads(raw), raw
+        except ValueError as e:
+            print(f"[Junior] Corrupt JSON store {self.path}: {e}")
+            return self.default(), None
+
+    def _merge(self, theirs: Any, raw: Optional[bytes], stamp: Optional[tuple]) -> None:
+        """Re-apply the top-level keys we changed since ``_base`` onto the file's current data"""
+        base = loads(self._base) if self._base is not None else self.default()
+        ours = self._data
+        if isinstance(ours, dict) and isinstance(theirs, dict) and isinstance(base, dict):
+            merged = dict(theirs)
+            for key in set(base) | set(ours):
+                if key not in ours:
+                    merged.pop(key, None)  # We deleted it
+                elif key not in base or ours[key] != base[key]:
+                    merged[key] = ours[key]
+            self._data = merged
+        else:
+            print(f"[Junior] {self.path} changed on disk while writes were pending; keeping ours")
+        self._base, self._stamp = raw, stamp
+
+    def _write(self) -> None:
+        raw = dumps(self._data)
+        with span("json_store.write", path=self.path):
+            atomic_write_bytes(self.path, raw)
+        self._base = raw
+        self._stamp = self._current_stamp()
+        self._dirty = False
+
+    def _current_stamp(self) -> Optional[tuple]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _schedule_flush(self) -> None:
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_interval, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        lock_path = self.path + ".lock"
+        os.makedirs(os.path.dirname(os.path.abspath(lock_path)), exist_ok=True)
+        with open(lock_path, "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+_stores: Dict[str, JsonStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path: str, **kwargs) -> JsonStore:
+    """Return the process-wide store for a path, creating it on first use"""
+    key = os.path.abspath(path)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = JsonStore(path, **kwargs)
+        return _stores[key]
+
+
+def flush_all() -> None:
+    for store in list(_stores.values()):
+        store.flush()
+
+
+atexit.register(flush_all)
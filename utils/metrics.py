@@ -0,0 +1,200 @@
+"""In-process metrics, rendered in the Prometheus text exposition format.
+
+Each worker process keeps its own counters and histograms and labels every
+sample it renders with ``worker`` (its pid). A scrape of ``/metrics`` only
+reaches one worker, so scrape every worker (or sum ``without (worker)`` over
+what is scraped) rather than comparing successive scrapes of the shared port.
+A forked worker starts from zero under its own pid instead of repeating what
+the parent counted before the fork.
+"""
+import os
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Tuple
+from utils.workers import after_fork
+
+# Seconds; spans in-memory parsing up to slow LLM round trips
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, *extra: str) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(pair for pair in extra if pair)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self, worker: str = "") -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"] + self._samples(worker)
+
+    def reset(self) -> None:
+        self._lock = threading.Lock()
+
+    def _samples(self, worker: str) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def reset(self) -> None:
+        super().reset()
+        self._values = {}
+
+    def _samples(self, worker: str) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key, worker)} {value}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """A value read from a callback at scrape time, so updating it costs nothing"""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], float]):
+        super().__init__(name, documentation)
+        self.callback = callback
+
+    def _samples(self, worker: str) -> List[str]:
+        try:
+            return [f"{self.name}{_format_labels((), (), worker)} {float(self.callback())}"]
+        except Exception as e:
+            print(f"[Junior] Metric {self.name} unavailable: {e}")
+            return []
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (+Inf last), sum]
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def reset(self) -> None:
+        super().reset()
+        self._values = {}
+
+    def _samples(self, worker: str) -> List[str]:
+        with self._lock:
+            items = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(self.label_names, key, worker, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key, worker)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key, worker)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide metrics, rendered in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+        self.worker = str(os.getpid())
+        after_fork(self._after_fork)
+
+    def _after_fork(self) -> None:
+        # The child reports under its own pid, starting from zero
+        self._lock = threading.Lock()
+        self.worker = str(os.getpid())
+        for metric in self._metrics.values():
+            metric.reset()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            # Modules may be re-imported (e.g. by reloaders); keep the first instance
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def gauge(self, name: str, documentation: str, callback: Callable[[], float]) -> Gauge:
+        return self._register(Gauge(name, documentation, callback))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        worker = f'worker="{self.worker}"'
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render(worker))
+        return "\n".join(lines) + "\n"
+
+
+# Initialize the metrics registry and the metrics shared across modules
+metrics = MetricsRegistry()
+
+stage_seconds = metrics.histogram(
+    "junior_stage_seconds", "Time spent in each analysis pipeline stage", ("stage",)
+)
+cache_requests = metrics.counter(
+    "junior_cache_requests_total", "Cache lookups by cache and result (hit/miss)", ("cache", "result")
+)
+cache_evictions = metrics.counter(
+    "junior_cache_evictions_total", "Entries dropped to stay within a cache's bounds", ("cache",)
+)
+
+
+def record_lookup(cache: str, hit: bool) -> None:
+    cache_requests.inc(cache=cache, result="hit" if hit else "miss")
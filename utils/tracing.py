@@ -0,0 +1,256 @@
+import io
+import os
+import time
+import uuid
+import pstats
+import asyncio
+import cProfile
+import functools
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+TRACE_LIMIT = 100
+MAX_SPANS_PER_TRACE = 5000
+PROFILE_LINES = 40
+TRACE_HEADER = "X-Junior-Trace"
+TRACE_ID_HEADER = "X-Junior-Trace-Id"
+
+
+class Trace:
+    """Spans recorded for one request, plus an optional profile"""
+
+    def __init__(self, name: str, profile: bool = False):
+        self.id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.profile = profile
+        self.started_at = time.time()
+        self.duration_ms: Optional[float] = None
+        self.spans: List[Dict[str, Any]] = []
+        self.dropped_spans = 0
+        self.profile_text: Optional[str] = None
+        self._profilers: Dict[int, cProfile.Profile] = {}
+        self._profiling: set = set()
+        self._origin = time.perf_counter()
+        self._ids = 0
+        self._lock = threading.Lock()
+
+    def _open(self, name: str, parent: Optional[int], attrs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if len(self.spans) >= MAX_SPANS_PER_TRACE:
+                self.dropped_spans += 1
+                return None
+            self._ids += 1
+            span = {
+                "id": self._ids,
+                "parent": parent,
+                "name": name,
+                "start_ms": (time.perf_counter() - self._origin) * 1000,
+                "duration_ms": None,
+                "thread": threading.current_thread().name,
+                "attrs": attrs
+            }
+            self.spans.append(span)
+            return span
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "spans": len(self.spans),
+            "profiled": self.profile_text is not None
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Total time per span name answers "where did the time go" at a glance
+        totals: Dict[str, Dict[str, float]] = {}
+        for span in self.spans:
+            entry = totals.setdefault(span["name"], {"count": 0, "total_ms": 0.0})
+            entry["count"] += 1
+            entry["total_ms"] += span["duration_ms"] or 0.0
+        return {
+            **self.summary(),
+            "dropped_spans": self.dropped_spans,
+            "by_name": dict(sorted(totals.items(), key=lambda item: -item[1]["total_ms"])),
+            "span_list": self.spans,
+            "profile": self.profile_text
+        }
+
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("junior_trace", default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("junior_span", default=None)
+
+
+class TraceStore:
+    """Bounded ring of finished traces, newest last.
+
+    Background work such as watcher analyses has no request to carry the
+    header, so a file can instead be armed to trace its next analysis.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._traces: "OrderedDict[str, Trace]" = OrderedDict()
+        self._armed: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+    def arm(self, path: str, profile: bool = False) -> None:
+        with self._lock:
+            self._armed[os.path.abspath(path)] = profile
+
+    def claim(self, path: str) -> Optional[bool]:
+        """Profile flag if the path was armed (disarming it), else None"""
+        if not self._armed:
+            return None
+        with self._lock:
+            return self._armed.pop(os.path.abspath(path), None)
+
+    def armed(self) -> Dict[str, bool]:
+        with self._lock:
+            return dict(self._armed)
+
+    def add(self, trace: Trace) -> None:
+        with self._lock:
+            self._traces[trace.id] = trace
+            while len(self._traces) > self.limit:
+                self._traces.popitem(last=False)
+
+    def get(self, trace_id: str) -> Optional[Trace]:
+        with self._lock:
+            return self._traces.get(trace_id)
+
+    def recent(self, limit: int) -> List[Trace]:
+        with self._lock:
+            return list(reversed(self._traces.values()))[:limit]
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def start_trace(name: str, profile: bool = False) -> Iterator[Trace]:
+    """Record spans for everything run inside the block, then keep the trace"""
+    trace = Trace(name, profile)
+    token = _current_trace.set(trace)
+    try:
+        with span(name):
+            yield trace
+    finally:
+        trace.duration_ms = (time.perf_counter() - trace._origin) * 1000
+        _current_trace.reset(token)
+        if trace._profilers:
+            trace.profile_text = _render_profile(list(trace._profilers.values()))
+        trace_store.add(trace)
+
+
+@contextmanager
+def trace_if_armed(name: str, path: str) -> Iterator[Optional[Trace]]:
+    """Trace the block only if ``path`` was armed through the trace store"""
+    profile = trace_store.claim(path)
+    if profile is None:
+        yield None
+        return
+    with start_trace(name, profile) as trace:
+        yield trace
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Optional[Dict[str, Any]]]:
+    """Time a block as a child of the current span; a no-op unless a trace is active"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    record = trace._open(name, _current_span.get(), attrs)
+    if record is None:
+        yield None
+        return
+    token = _current_span.set(record["id"])
+    profiler = _start_profiler(trace)
+    started = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        record["duration_ms"] = (time.perf_counter() - started) * 1000
+        _current_span.reset(token)
+        if profiler is not None:
+            profiler.disable()
+            with trace._lock:
+                trace._profiling.discard(threading.get_ident())
+
+
+def _start_profiler(trace: Trace) -> Optional[cProfile.Profile]:
+    """Profile the outermost span on each thread the trace runs on.
+
+    cProfile only sees the thread it was enabled on, and sync endpoints run in
+    a worker thread rather than where the middleware opened the trace, so each
+    thread gets its own profiler and they are merged when the trace ends. The
+    event-loop profile also sees other requests running concurrently.
+    """
+    thread = threading.get_ident()
+    with trace._lock:
+        if not trace.profile or thread in trace._profiling:
+            return None
+        profiler = trace._profilers.setdefault(thread, cProfile.Profile())
+        trace._profiling.add(thread)
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is already active on this thread
+        with trace._lock:
+            trace._profilers.pop(thread, None)
+        return None
+    return profiler
+
+
+def _render_profile(profilers: List[cProfile.Profile]) -> str:
+    out = io.StringIO()
+    try:
+        stats = pstats.Stats(*profilers, stream=out)
+    except TypeError:
+        return ""  # None of the profilers recorded anything
+    stats.sort_stats("cumulative").print_stats(PROFILE_LINES)
+    return out.getvalue()
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator wrapping a sync or async function in a span"""
+    def decorator(fn: Callable) -> Callable:
+        span_name = name or fn.__qualname__
+
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+async def trace_middleware(request, call_next):
+    """Trace a request when asked via ``X-Junior-Trace: 1|profile`` or ``?trace=1|profile``"""
+    mode = request.headers.get(TRACE_HEADER) or request.query_params.get("trace")
+    if not mode or mode in ("0", "false"):
+        return await call_next(request)
+    with start_trace(f"{request.method} {request.url.path}", profile=mode == "profile") as trace:
+        response = await call_next(request)
+    response.headers[TRACE_ID_HEADER] = trace.id
+    return response
+
+
+# Initialize the trace store
+trace_store = TraceStore(TRACE_LIMIT)
@@ -0,0 +1,118 @@
+"""Helpers for running the backend as several worker processes.
+
+``gunicorn -c gunicorn.conf.py main:app`` preloads the app (and the embedding
+model) once and forks ``JUNIOR_WORKERS`` workers from it. In that mode the
+in-process caches are replaced by SQLite tables every worker shares, and only
+one process owns the folder watcher.
+"""
+import os
+import sqlite3
+import threading
+from typing import Callable, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, every process may own the watcher
+    fcntl = None
+
+WATCHER_LOCK_PATH = "core/cache/watcher.lock"
+# How long a writer waits for another process's transaction before failing
+SQLITE_BUSY_TIMEOUT_MS = 5000
+
+
+def worker_count() -> int:
+    return max(1, int(os.getenv("JUNIOR_WORKERS", "1")))
+
+
+def shared_cache_enabled() -> bool:
+    """Share caches through SQLite when several workers serve the API"""
+    setting = os.getenv("JUNIOR_SHARED_CACHE", "auto").lower()
+    if setting == "auto":
+        return worker_count() > 1
+    return setting in ("1", "true", "yes")
+
+
+def connect_sqlite(path) -> sqlite3.Connection:
+    """Open a connection usable from several threads and processes at once"""
+    conn = sqlite3.connect(str(path), check_same_thread=False, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    return conn
+
+
+def after_fork(callback: Callable[[], None]) -> None:
+    """Run ``callback`` in the child after a fork, e.g. to reopen connections and reset locks"""
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=callback)
+
+
+class WatcherLock:
+    """Exclusive, process-lifetime claim on running the folder watcher.
+
+    Held as an ``flock`` on a lock file, so it is released by the OS when the
+    owner exits and another worker can take over.
+    """
+
+    def __init__(self, path: str = WATCHER_LOCK_PATH):
+        self.path = path
+        self._file = None
+        self._stop = threading.Event()
+
+    @property
+    def owned(self) -> bool:
+        return self._file is not None or fcntl is None
+
+    def acquire(self) -> bool:
+        if self.owned:
+            return True
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        lock_file = open(self.path, "a+")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        lock_file.truncate(0)
+        lock_file.write(str(os.getpid()))
+        lock_file.flush()
+        self._file = lock_file
+        return True
+
+    def owner_pid(self) -> Optional[int]:
+        try:
+            with open(self.path, "r") as f:
+                return int(f.read().strip() or 0) or None
+        except (OSError, ValueError):
+            return None
+
+    def acquire_when_free(self, on_acquired: Callable[[], None], interval: float = 5.0) -> None:
+        """Keep trying in the background and call ``on_acquired`` once the lock is ours"""
+        def wait():
+            while not self._stop.wait(interval):
+                if self.acquire():
+                    print(f"[Junior] Process {os.getpid()} took over the folder watcher")
+                    on_acquired()
+                    return
+        threading.Thread(target=wait, daemon=True).start()
+
+    def release(self) -> None:
+        self._stop.set()
+        if self._file is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+
+def watcher_mode() -> str:
+    """``auto`` (first worker to take the lock), ``on`` or ``off``"""
+    return os.getenv("JUNIOR_WATCHER", "auto").lower()
+
+
+def owns_watcher() -> bool:
+    mode = watcher_mode()
+    return mode == "on" or (mode == "auto" and watcher_lock.owned)
+
+
+# Initialize the watcher lock
+watcher_lock = WatcherLock()
@@ -1,51 +1,130 @@
 import time
+import asyncio
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 import os
 import threading
-from queue import Queue
+from queue import PriorityQueue
 from core.context_manager import analyze_file_event
 from core.error_detector import analyze_file_for_errors
 from core.ai_analyzer import ai_analyzer
-from utils.helpers import load_json, save_json
+from core.results_index import results_index, diff_analysis
+from core.event_bus import event_bus
+from core.language_hub import language_hub
+from core.dependency_graph import dependency_graph
+from core.code_index import code_index
+from core.incremental import (
+    snapshot_cache, changed_ratio, diff_lines, merge_region_analysis, region_text, FULL_REANALYSIS_RATIO
+)
+from inference.scheduler import llm_priority, Priority
+from utils.json_store import get_store
+from utils.metrics import metrics, stage_seconds
+from utils.tracing import span, trace_if_armed
+from watcher.indexer import IgnoreRules, RepositoryIndexer, record_fingerprint, forget_fingerprint
 
-# Path to store error analysis results
-ERROR_ANALYSIS_PATH = "core/error_analysis.json"
 ANALYSIS_QUEUE_PATH = "core/analysis_queue.json"
+queue_store = get_store(ANALYSIS_QUEUE_PATH, flush_interval=1.0)
+# Sorts ahead of every real priority so shutdown is not stuck behind a backlog
+_STOP = (-1, 0.0, "")
+
+watcher_events = metrics.counter(
+    "junior_watcher_events_total", "Filesystem events seen, and whether they were queued", ("event", "accepted")
+)
+
+
+class WatchRoot:
+    """Per-root settings: which files to analyse and what to ignore"""
+
+    def __init__(self, path, file_types=None, excludes=None):
+        self.path = path
+        self.file_types = frozenset(file_types or ())
+        self.ignore_rules = IgnoreRules(path, excludes)
+        self.started_at = time.time()
+        self.index_stats = None
+
 
 class FileChangeHandler(FileSystemEventHandler):
-    def __init__(self, file_types):
-        self.file_types = file_types
-        self.analysis_queue = Queue()
+    def __init__(self, file_types=None, watch_paths=None, excludes=None):
+        self.roots = {}
+        self._roots_lock = threading.Lock()
+        # Items are (priority, timestamp, path); _pending keeps the best priority per path
+        self.analysis_queue = PriorityQueue()
+        self._pending = {}
+        self._pending_lock = threading.Lock()
         self.analysis_thread = threading.Thread(target=self._process_analysis_queue)
         self.analysis_thread.daemon = True
         self.analysis_thread.start()
-        
-        # Ensure error analysis file exists
-        if not os.path.exists(ERROR_ANALYSIS_PATH):
-            os.makedirs(os.path.dirname(ERROR_ANALYSIS_PATH), exist_ok=True)
-            save_json(ERROR_ANALYSIS_PATH, {})
-            
-        # Load existing analysis queue
-        self._load_analysis_queue()
 
-    def _load_analysis_queue(self):
+        for path in watch_paths or []:
+            self.add_root(path, file_types, excludes)
+
+    def add_root(self, path, file_types=None, excludes=None):
+        """Start routing events under a directory into the pipeline"""
+        root = WatchRoot(os.path.abspath(path), file_types, excludes)
+        with self._roots_lock:
+            self.roots[root.path] = root
+        # Resume whatever was still queued for this root at the last shutdown
+        self._load_analysis_queue(root.path)
+        return root
+
+    def remove_root(self, path):
+        """Stop analysing a directory and drop its queued files"""
+        path = os.path.abspath(path)
+        with self._roots_lock:
+            root = self.roots.pop(path, None)
+        if root is None:
+            return False
+        with self._pending_lock:
+            # Queue entries without a pending record are skipped when popped
+            for file_path in [f for f in self._pending if self._project_for(f) is None]:
+                del self._pending[file_path]
+        self._save_analysis_queue(dropped_root=path)
+        return True
+
+    def queue_depth(self, path=None):
+        """Files waiting for analysis, overall or under one root"""
+        with self._pending_lock:
+            pending = list(self._pending)
+        if path is None:
+            return len(pending)
+        path = os.path.abspath(path)
+        return sum(1 for file_path in pending if self._project_for(file_path) == path)
+
+    def stop(self, timeout=None):
+        """Finish the file being analysed, then stop the worker; the queue stays on disk"""
+        self._save_analysis_queue()
+        self.analysis_queue.put(_STOP)
+        self.analysis_thread.join(timeout)
+        queue_store.flush()
+
+    def _load_analysis_queue(self, root=None):
         """Load existing analysis queue from disk"""
         try:
-            queue_data = load_json(ANALYSIS_QUEUE_PATH, default={})
-            for file_path, timestamp in queue_data.items():
+            queue_data = queue_store.read()
+            for file_path, entry in list(queue_data.items()):
+                # Older queue files stored only the timestamp
+                timestamp, priority = entry if isinstance(entry, list) else (entry, Priority.BACKGROUND)
+                if root is not None and self._project_for(file_path) != root:
+                    continue
                 if os.path.exists(file_path):
-                    self.analysis_queue.put((file_path, timestamp))
+                    self._put(file_path, Priority(priority), timestamp)
         except Exception as e:
             print(f"Error loading analysis queue: {e}")
 
-    def _save_analysis_queue(self):
+    def _save_analysis_queue(self, dropped_root=None):
         """Save current analysis queue to disk"""
         try:
-            queue_data = {}
-            for item in list(self.analysis_queue.queue):
-                queue_data[item[0]] = item[1]
-            save_json(ANALYSIS_QUEUE_PATH, queue_data)
+            with queue_store.transaction() as queue_data:
+                # Keep entries for roots that have not been re-added since the last start
+                for file_path in list(queue_data):
+                    root = self._project_for(file_path)
+                    if root is not None or (dropped_root and file_path.startswith(dropped_root + os.sep)):
+                        del queue_data[file_path]
+                with self._pending_lock:
+                    pending = dict(self._pending)
+                for priority, timestamp, file_path in list(self.analysis_queue.queue):
+                    if pending.get(file_path) == priority:
+                        queue_data[file_path] = [timestamp, int(priority)]
         except Exception as e:
             print(f"Error saving analysis queue: {e}")
 
@@ -53,24 +132,50 @@ class FileChangeHandler(FileSystemEventHandler):
         """Process files in the analysis queue"""
         while True:
             try:
-                file_path, timestamp = self.analysis_queue.get()
-                self._analyze_file(file_path)
+                priority, timestamp, file_path = self.analysis_queue.get()
+                if (priority, timestamp, file_path) == _STOP:
+                    self.analysis_queue.task_done()
+                    break
+                with self._pending_lock:
+                    # Skip entries superseded by a higher-priority copy of the same path
+                    current = self._pending.get(file_path) == priority
+                    if current:
+                        del self._pending[file_path]
+                if current:
+                    event_bus.publish("progress", {"stage": "analyzing", "queue_depth": self.queue_depth()}, file_path)
+                    # Watcher work must not starve interactive API calls of LLM budget
+                    with llm_priority(priority):
+                        self._analyze_file(file_path)
                 self.analysis_queue.task_done()
             except Exception as e:
                 print(f"Error processing file: {e}")
 
     def _analyze_file(self, file_path):
-        """Analyze a single file"""
+        """Analyze a single file, traced if it was armed through /traces/arm"""
+        with trace_if_armed(f"watch {file_path}", file_path):
+            self._run_analysis(file_path)
+
+    def _run_analysis(self, file_path):
         try:
-            # Read file content
+            # Read file content, noting the state it was analysed in
+            stat = os.stat(file_path)
             with open(file_path, 'r') as f:
                 content = f.read()
             
-            # Run syntax and linting checks
-            error_results = analyze_file_for_errors(file_path)
+            # Refresh metadata and the retrieval index before prompting on this file
+            analyze_file_event(file_path, root=self._project_for(file_path))
+
+            # Run syntax and linting checks, reusing findings outside the edit
+            snapshot = snapshot_cache.get(file_path)
+            error_results = analyze_file_for_errors(file_path, previous=snapshot, code=content)
             
-            # Run AI analysis
-            ai_analysis = ai_analyzer.analyze_code(content, file_path)
+            # Run AI analysis, scoped to the watch root so projects don't share context
+            ai_analysis = self._ai_analysis(file_path, content, snapshot, error_results.get("changed_regions"))
+            snapshot_cache.put(file_path, {
+                "code": content,
+                "suggestions": error_results.get("suggestions", []),
+                "ai_analysis": ai_analysis
+            })
             
             # Combine results
             analysis_data = {
@@ -80,65 +185,241 @@ class FileChangeHandler(FileSystemEventHandler):
                 "ai_analysis": ai_analysis
             }
             
-            # Save results
-            error_data = load_json(ERROR_ANALYSIS_PATH)
-            error_data[file_path] = analysis_data
-            save_json(ERROR_ANALYSIS_PATH, error_data)
+            # Save results and push what changed to live listeners
+            previous = results_index.get_file(file_path)
+            with stage_seconds.time(stage="persist"), span("persist"):
+                results_index.record(file_path, analysis_data)
+                record_fingerprint(file_path, stat)
+            event_bus.publish("result", diff_analysis(previous, analysis_data), file_path)
+            event_bus.publish("progress", {"stage": "completed", "queue_depth": self.queue_depth()}, file_path)
             
             print(f"[Junior] Completed analysis for {file_path}")
+
+            # Re-analyse dependents only when this file's public API changed
+            language = language_hub.get_language_for_path(file_path)
+            if dependency_graph.update_file(file_path, content, language):
+                dependents = dependency_graph.affected(file_path)
+                print(f"[Junior] API of {file_path} changed; re-analysing {len(dependents)} dependents")
+                for dependent in dependents:
+                    # Their content is unchanged, so drop the snapshot that would short-circuit the analysis
+                    snapshot_cache.discard(dependent)
+                    self._queue_file(dependent)
             
         except Exception as e:
             print(f"Error analyzing file {file_path}: {e}")
+            event_bus.publish("progress", {"stage": "failed", "error": str(e)}, file_path)
 
-    def on_modified(self, event):
+    def _ai_analysis(self, file_path, content, snapshot, regions):
+        """Analyse only the edited scopes when most of the file is unchanged"""
+        project = self._project_for(file_path)
+        if not snapshot or regions is None or changed_ratio(content, regions) >= FULL_REANALYSIS_RATIO:
+            return asyncio.run(ai_analyzer.analyze_code(content, file_path, session_id="watcher", project=project))
+        if not regions:
+            return snapshot["ai_analysis"]
+
+        region_results = []
+        for start, end in regions:
+            result = asyncio.run(ai_analyzer.analyze_region(
+                region_text(content, (start, end)),
+                file_path,
+                session_id="watcher",
+                project=project
+            ))
+            region_results.append({"start_line": start, "end_line": end, "analysis": result})
+        mapping, _ = diff_lines(snapshot["code"], content)
+        return merge_region_analysis(snapshot["ai_analysis"], region_results, mapping, regions)
+
+    def _root_for(self, file_path):
+        """Return the innermost watch root that contains a file"""
+        file_path = os.path.abspath(file_path)
+        with self._roots_lock:
+            roots = list(self.roots.values())
+        containing = [r for r in roots if file_path == r.path or file_path.startswith(r.path + os.sep)]
+        return max(containing, key=lambda r: len(r.path)) if containing else None
+
+    def _project_for(self, file_path):
+        """Return the watch root that contains a file"""
+        root = self._root_for(file_path)
+        return root.path if root else None
+
+    def _should_analyze(self, file_path):
+        """Watch enabled languages, narrowed to the root's configured extensions if it has any"""
+        if language_hub.get_language_for_path(file_path) == "unknown":
+            return False
+        root = self._root_for(file_path)
+        return not (root and root.file_types) or os.path.splitext(file_path)[1] in root.file_types
+
+    def _is_ignored(self, file_path):
+        """Whether .gitignore or the configured excludes cover a path"""
+        root = self._root_for(file_path)
+        return root is not None and root.ignore_rules.is_ignored(file_path)
+
+    def _wants_event(self, event):
         if event.is_directory:
-            return
-        _, ext = os.path.splitext(event.src_path)
-        if ext in self.file_types:
+            return False
+        if os.path.basename(event.src_path) == ".gitignore":
+            root = self._root_for(event.src_path)
+            if root is not None:
+                root.ignore_rules.invalidate(os.path.dirname(os.path.abspath(event.src_path)))
+            return False
+        return self._should_analyze(event.src_path) and not self._is_ignored(event.src_path)
+
+    def index_existing(self, path=None):
+        """Queue every new or changed file under one or all watch roots at bulk priority"""
+        with self._roots_lock:
+            roots = [self.roots[os.path.abspath(path)]] if path else list(self.roots.values())
+        indexer = RepositoryIndexer(self._should_analyze, lambda paths: self.queue_files(paths, Priority.BULK))
+        stats = indexer.index({root.path: root.ignore_rules for root in roots})
+        for root in roots:
+            root.index_stats = stats
+            event_bus.publish("index", stats, root.path)
+        return stats
+
+    def _accept(self, event, kind):
+        accepted = self._wants_event(event)
+        watcher_events.inc(event=kind, accepted="true" if accepted else "false")
+        return accepted
+
+    def on_modified(self, event):
+        if self._accept(event, "modified"):
             self._queue_file(event.src_path)
 
     def on_created(self, event):
-        if event.is_directory:
-            return
-        _, ext = os.path.splitext(event.src_path)
-        if ext in self.file_types:
+        if self._accept(event, "created"):
             self._queue_file(event.src_path)
 
-    def _queue_file(self, file_path):
+    def on_deleted(self, event):
+        if not self._accept(event, "deleted"):
+            return
+        code_index.remove_file(event.src_path)
+        results_index.remove(event.src_path)
+        forget_fingerprint(event.src_path)
+        snapshot_cache.discard(event.src_path)
+        event_bus.publish("removed", {}, os.path.abspath(event.src_path))
+        # Files importing the deleted module may now be broken
+        for dependent in dependency_graph.remove_file(event.src_path):
+            snapshot_cache.discard(dependent)
+            self._queue_file(dependent)
+
+    def _put(self, file_path, priority, timestamp=None):
+        """Queue a path unless it is already waiting at the same or a higher priority"""
+        with self._pending_lock:
+            queued = self._pending.get(file_path)
+            if queued is not None and queued <= priority:
+                return False
+            self._pending[file_path] = priority
+        self.analysis_queue.put((priority, timestamp or time.time(), file_path))
+        return True
+
+    def _queue_file(self, file_path, priority=Priority.BACKGROUND):
         """Add file to analysis queue"""
         try:
             # Only add if file exists and is not already in queue
-            if os.path.exists(file_path):
-                self.analysis_queue.put((file_path, time.time()))
+            if os.path.exists(file_path) and self._put(file_path, priority):
                 self._save_analysis_queue()
+                event_bus.publish("progress", {"stage": "queued", "queue_depth": self.queue_depth()}, file_path)
                 print(f"[Junior] Queued analysis for {file_path}")
         except Exception as e:
             print(f"Error queuing file: {e}")
-            }
-            save_json(ERROR_ANALYSIS_PATH, error_data)
-            
-            # Log results summary
-            error_count = len(error_results.get("errors", []))
-            suggestion_count = len(error_results.get("suggestions", []))
-            print(f"[Junior] Found {error_count} errors and provided {suggestion_count} suggestions")
-            
-            # Print each error for quick reference
-            for error in error_results.get("errors", []):
-                severity = error.get("severity", "info").upper()
-                message = error.get("message", "Unknown error")
-                line = error.get("line", "?")
-                print(f"[Junior] {severity} at line {line}: {message}")
-
-def start_watch(paths, file_types):
-    event_handler = FileChangeHandler(file_types)
-    observer = Observer()
+
+    def queue_files(self, file_paths, priority=Priority.BULK):
+        """Queue many files, persisting the queue once"""
+        try:
+            # A root removed mid-scan should not keep feeding the queue
+            queued = sum(self._put(path, priority) for path in file_paths if self._root_for(path))
+            if queued:
+                self._save_analysis_queue()
+        except Exception as e:
+            print(f"Error queuing files: {e}")
+
+
+class WatcherManager:
+    """Owns the single observer and analysis pipeline shared by every watch root.
+
+    Roots can be added and removed at runtime; each one gets its own
+    observer watch but all events feed the same queue and worker thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.observer = None
+        self.handler = None
+        self.watches = {}
+
+    def add_root(self, path, file_types=None, excludes=None):
+        """Watch a directory (idempotent) and index its existing files in the background"""
+        path = os.path.abspath(path)
+        if not os.path.isdir(path):
+            raise ValueError(f"Not a directory: {path}")
+
+        with self._lock:
+            if path in self.watches:
+                return self.describe(path)
+            if self.observer is None:
+                self.handler = FileChangeHandler()
+                self.observer = Observer()
+                self.observer.start()
+            self.handler.add_root(path, file_types, excludes)
+            self.watches[path] = self.observer.schedule(self.handler, path=path, recursive=True)
+        print(f"[Junior] Watching folder: {path}")
+
+        # Index after the watch is live so edits made during the scan are not missed
+        threading.Thread(target=self.handler.index_existing, args=(path,), daemon=True).start()
+        return self.describe(path)
+
+    def remove_root(self, path):
+        path = os.path.abspath(path)
+        with self._lock:
+            watch = self.watches.pop(path, None)
+            if watch is None:
+                return False
+            self.observer.unschedule(watch)
+            self.handler.remove_root(path)
+        print(f"[Junior] Stopped watching folder: {path}")
+        return True
+
+    def describe(self, path):
+        root = self.handler.roots.get(path) if self.handler else None
+        if root is None:
+            return None
+        return {
+            "path": path,
+            "file_types": sorted(root.file_types),
+            "started_at": root.started_at,
+            "queue_depth": self.handler.queue_depth(path),
+            "index": root.index_stats
+        }
+
+    def list_watches(self):
+        with self._lock:
+            paths = list(self.watches)
+        watches = [self.describe(path) for path in paths]
+        return [watch for watch in watches if watch]
+
+    def queue_depth(self):
+        return self.handler.queue_depth() if self.handler else 0
+
+    def shutdown(self, timeout=10.0):
+        """Stop the observer and the worker; queued files are resumed on next start"""
+        with self._lock:
+            observer, handler = self.observer, self.handler
+            self.observer, self.handler, self.watches = None, None, {}
+        if observer is not None:
+            observer.stop()
+            observer.join(timeout)
+        if handler is not None:
+            handler.stop(timeout)
+        print("[Junior] Folder watcher stopped")
+
+
+def start_watch(paths, file_types, excludes=None):
+    """Add watch roots to the shared manager; returns immediately"""
     for path in paths:
-        observer.schedule(event_handler, path=path, recursive=True)
-    observer.start()
-    print(f"[Junior] Watching folders: {paths}")
-    try:
-        while True:
-            time.sleep(1)
-    except KeyboardInterrupt:
-        observer.stop()
-    observer.join()
\ No newline at end of file
+        watcher_manager.add_root(path, file_types, excludes)
+    return watcher_manager
+
+
+# Initialize the watcher manager
+watcher_manager = WatcherManager()
+metrics.gauge("junior_watcher_queue_depth", "Files waiting for analysis", watcher_manager.queue_depth)
+metrics.gauge("junior_watcher_roots", "Directories being watched", lambda: len(watcher_manager.watches))
\ No newline at end of file
@@ -0,0 +1,210 @@
+import os
+import time
+import fnmatch
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from utils.json_store import get_store
+
+FINGERPRINTS_PATH = "core/file_fingerprints.json"
+# Directories that are never worth analysing, on top of .gitignore
+DEFAULT_EXCLUDES = [
+    ".git", ".hg", ".svn", "node_modules", "venv", ".venv", "env", "__pycache__",
+    ".mypy_cache", ".pytest_cache", ".tox", "build", "dist", ".next", "coverage", "*.egg-info"
+]
+SCAN_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+fingerprint_store = get_store(FINGERPRINTS_PATH, flush_interval=1.0)
+
+
+def fingerprint(stat: os.stat_result) -> List[int]:
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def record_fingerprint(file_path: str, stat: os.stat_result) -> None:
+    """Remember the state a file was analysed in"""
+    with fingerprint_store.transaction() as data:
+        data[os.path.abspath(file_path)] = fingerprint(stat)
+
+
+def forget_fingerprint(file_path: str) -> None:
+    with fingerprint_store.transaction() as data:
+        data.pop(os.path.abspath(file_path), None)
+
+
+def _compile_gitignore(directory: str) -> Tuple[Tuple[str, str, bool, bool, bool], ...]:
+    """Parse a directory's .gitignore into (base, pattern, negate, dir_only, anchored) rules"""
+    try:
+        with open(os.path.join(directory, ".gitignore"), "r", encoding="utf-8", errors="ignore") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return ()
+    rules = []
+    for line in lines:
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.strip("/") if dir_only else line
+        anchored = "/" in line
+        rules.append((directory, line.lstrip("/"), negate, dir_only, anchored))
+    return tuple(rules)
+
+
+def _matches(pattern: str, rel_path: str, anchored: bool) -> bool:
+    if not anchored:
+        return fnmatch.fnmatch(rel_path.rsplit("/", 1)[-1], pattern)
+    if fnmatch.fnmatch(rel_path, pattern):
+        return True
+    # "a/**/b" also matches "a/b"
+    return "**/" in pattern and fnmatch.fnmatch(rel_path, pattern.replace("**/", ""))
+
+
+class IgnoreRules:
+    """.gitignore files under a root plus name-based excludes.
+
+    Rules are collected per directory (each directory inherits its parent's)
+    and cached, so checking a path costs one pass over the rules that apply
+    to its directory. Later rules win, and ``!`` re-includes, as in git.
+    """
+
+    def __init__(self, root: str, excludes: Optional[Iterable[str]] = None):
+        self.root = os.path.abspath(root)
+        self.excludes = tuple(DEFAULT_EXCLUDES) + tuple(excludes or ())
+        self._rules: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self, directory: str) -> None:
+        """Drop cached rules at and below a directory whose .gitignore changed"""
+        directory = os.path.abspath(directory)
+        with self._lock:
+            for cached in [d for d in self._rules if d == directory or d.startswith(directory + os.sep)]:
+                del self._rules[cached]
+
+    def is_excluded_name(self, name: str) -> bool:
+        return any(fnmatch.fnmatch(name, pattern) for pattern in self.excludes)
+
+    def ignored_entry(self, directory: str, name: str, is_dir: bool) -> bool:
+        """Whether a directory entry is ignored, given its parent is not"""
+        if self.is_excluded_name(name):
+            return True
+        path = os.path.join(directory, name)
+        ignored = False
+        for base, pattern, negate, dir_only, anchored in self._rules_for(directory):
+            if dir_only and not is_dir:
+                continue
+            rel_path = os.path.relpath(path, base).replace(os.sep, "/")
+            if _matches(pattern, rel_path, anchored):
+                ignored = not negate
+        return ignored
+
+    def is_ignored(self, path: str, is_dir: bool = False) -> bool:
+        """Whether a path or any directory above it (up to the root) is ignored"""
+        path = os.path.abspath(path)
+        if path != self.root and not path.startswith(self.root + os.sep):
+            return False
+        parts = os.path.relpath(path, self.root).split(os.sep)
+        directory = self.root
+        for index, name in enumerate(parts):
+            last = index == len(parts) - 1
+            if self.ignored_entry(directory, name, is_dir or not last):
+                return True
+            directory = os.path.join(directory, name)
+        return False
+
+    def _rules_for(self, directory: str) -> tuple:
+        with self._lock:
+            cached = self._rules.get(directory)
+        if cached is not None:
+            return cached
+        parent = os.path.dirname(directory)
+        inherited = self._rules_for(parent) if directory != self.root and parent != directory else ()
+        own = _compile_gitignore(directory)
+        rules = inherited + own if own else inherited
+        with self._lock:
+            self._rules[directory] = rules
+        return rules
+
+
+class RepositoryIndexer:
+    """Walks watch roots once at start-up and queues files that changed since the last run.
+
+    Directories are scanned with ``os.scandir`` on a thread pool, one task per
+    directory, pruning ignored subtrees before descending into them. A file is
+    skipped when its (size, mtime) fingerprint matches the one recorded the last
+    time it was analysed.
+    """
+
+    def __init__(
+        self,
+        should_analyze: Callable[[str], bool],
+        enqueue: Callable[[List[str]], None],
+        workers: int = SCAN_WORKERS
+    ):
+        self.should_analyze = should_analyze
+        self.enqueue = enqueue
+        self.workers = workers
+
+    def index(self, roots: Dict[str, IgnoreRules]) -> Dict[str, Any]:
+        """Scan every root and enqueue new or changed files; returns throughput stats"""
+        started = time.perf_counter()
+        known = dict(fingerprint_store.read())
+        stats = {"directories": 0, "files_seen": 0, "queued": 0, "unchanged": 0, "errors": 0}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = {pool.submit(self._scan, root, rules): rules for root, rules in roots.items()}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    rules = pending.pop(future)
+                    subdirs, files, errors = future.result()
+                    stats["directories"] += 1
+                    stats["errors"] += errors
+                    for subdir in subdirs:
+                        pending[pool.submit(self._scan, subdir, rules)] = rules
+
+                    changed = []
+                    for path, stat in files:
+                        stats["files_seen"] += 1
+                        if known.get(path) == fingerprint(stat):
+                            stats["unchanged"] += 1
+                        else:
+                            changed.append(path)
+                    if changed:
+                        self.enqueue(changed)
+                        stats["queued"] += len(changed)
+
+        elapsed = time.perf_counter() - started
+        stats["seconds"] = round(elapsed, 3)
+        stats["files_per_second"] = round(stats["files_seen"] / elapsed, 1) if elapsed else 0.0
+        print(
+            f"[Junior] Indexed {stats['files_seen']} files in {stats['directories']} directories "
+            f"in {stats['seconds']}s ({stats['files_per_second']} files/s): "
+            f"{stats['queued']} queued, {stats['unchanged']} unchanged"
+        )
+        return stats
+
+    def _scan(self, directory: str, rules: IgnoreRules) -> Tuple[List[str], List[Tuple[str, os.stat_result]], int]:
+        subdirs, files, errors = [], [], 0
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        if not is_dir and not entry.is_file(follow_symlinks=False):
+                            continue
+                        if rules.ignored_entry(directory, entry.name, is_dir):
+                            continue
+                        if is_dir:
+                            subdirs.append(entry.path)
+                        elif self.should_analyze(entry.path):
+                            files.append((os.path.abspath(entry.path), entry.stat(follow_symlinks=False)))
+                    except OSError:
+                        errors += 1
+        except OSError as e:
+            print(f"[Junior] Cannot scan {directory}: {e}")
+            errors += 1
+        return subdirs, files, errors